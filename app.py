@@ -1,10 +1,35 @@
 import dash
-from dash import dcc, html, dash_table, Input, Output, State, callback
+from dash import dcc, html, dash_table, Input, Output, State, ClientsideFunction, callback, ctx, no_update, Patch
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from dash.exceptions import PreventUpdate
 import numpy as np
+import atexit
+import functools
+import hmac
+import os
+import tempfile
+import threading
+import time
+import uuid
+from flask import Response, abort, g, has_request_context, request
+
+from background_jobs import create_manager
+from client_data import build_client_payload
+from compression import available_encodings, compress_response
+from dataset import load_dataset, refresh_dataset
+from export import EXPORT_FORMATS, available_formats, export_chunks
+from figure_templates import FigureTemplate
+from metrics import BYTES_BUCKETS, ROWS_BUCKETS, SECONDS_BUCKETS, MetricsRegistry, SlowRequestProfiler
+from price_stats import box_stats, histogram_bins
+from ranking import RankingWeights
+from refinement import RefinementCache, refinement_filters
+from result_cache import ResultCache, private_directory
+from row_store import FilteredRows, RowStore, pack_rows, unpack_rows
+from search_index import normalize_text
+from shards import ShardPool, ShardedDataset, default_cache_bytes, deployment_authkey, read_shard_manifest, refresh_sharded_dataset
+from table_index import TABLE_COLUMNS
 
 # Configuração inicial do app
 app = dash.Dash(__name__, 
@@ -14,16 +39,254 @@ app = dash.Dash(__name__,
                 external_stylesheets=['https://codepen.io/chriddyp/pen/bWLwgP.css'])  # Adiciona CSS externo para melhor controle do grid
 server = app.server
 
+# Arquivos de dados: CSV original e sua versão colunar mapeável em memória (gerada por columnar.py)
+DATA_FILE = os.environ.get('DASHBOARD_DATA_FILE', 'df_cleaned.csv')
+COLUMNS_DIR = os.environ.get('DASHBOARD_COLUMNS_DIR', os.path.splitext(DATA_FILE)[0] + '.cols')
+
+# Diretório do cache de resultados (compartilhado entre workers), criado só para o usuário do serviço:
+# guarda também o socket do servidor de shards e os jobs em segundo plano
+CACHE_DIR = private_directory(os.environ.get(
+    'DASHBOARD_CACHE_DIR', os.path.join(tempfile.gettempdir(), f'medicine-dashboard-cache-{os.getuid()}')))
+CACHE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_CACHE_MAX_ENTRIES', '512'))
+
+# Dados particionados por cidade (gerados por shards.py): quando existem, têm precedência sobre o CSV.
+# Um servidor de shards por máquina atende todos os workers; cada um dos seus processos mantém em
+# memória os shards que atende, até o limite em bytes (padrão: metade da memória da máquina dividida
+# entre os processos; 0: sem limite)
+SHARDS_DIR = os.environ.get('DASHBOARD_SHARDS_DIR', os.path.splitext(DATA_FILE)[0] + '.shards')
+SHARD_SOCKET = os.environ.get('DASHBOARD_SHARD_SOCKET', os.path.join(CACHE_DIR, 'shards.sock'))
+SHARD_PROCESSES = int(os.environ.get('DASHBOARD_SHARD_PROCESSES', str(os.cpu_count() or 1)))
+SHARD_CACHE_BYTES = int(os.environ.get('DASHBOARD_SHARD_CACHE_BYTES', default_cache_bytes(SHARD_PROCESSES)))
+
+# Conjuntos de linhas filtradas mantidos em memória por worker
+ROW_STORE_MAX_ENTRIES = int(os.environ.get('DASHBOARD_ROW_STORE_MAX_ENTRIES', '64'))
+
+# Último resultado de cada sessão, usado para refinar filtros sem voltar ao conjunto inteiro
+REFINEMENT_MAX_SESSIONS = int(os.environ.get('DASHBOARD_REFINEMENT_MAX_SESSIONS', '256'))
+REFINEMENT_MAX_BYTES = int(os.environ.get('DASHBOARD_REFINEMENT_MAX_BYTES', str(128 * 1024 * 1024)))
+
+# Passo do filtro de preço; também é a largura das faixas de preço do cubo de agregados
+PRICE_STEP = 50
+
+# Atualização dos dados: intervalo de verificação dos arquivos (0 desliga) e token do endpoint de recarga
+RELOAD_INTERVAL = float(os.environ.get('DASHBOARD_RELOAD_INTERVAL', '30'))
+ADMIN_TOKEN = os.environ.get('DASHBOARD_ADMIN_TOKEN')
+
+# Intervalo com que as páginas abertas conferem se há uma nova versão dos dados
+DATA_POLL_INTERVAL = float(os.environ.get('DASHBOARD_DATA_POLL_INTERVAL', '60'))
+
+# Métricas de tempo por etapa (somadas entre workers em /metrics) e perfis opcionais de pedidos lentos
+METRICS_DIR = os.environ.get('DASHBOARD_METRICS_DIR', os.path.join(tempfile.gettempdir(), 'medicine-dashboard-metrics'))
+PROFILE_DIR = os.environ.get('DASHBOARD_PROFILE_DIR')
+PROFILE_SAMPLE_RATE = float(os.environ.get('DASHBOARD_PROFILE_SAMPLE_RATE', '0.05'))
+PROFILE_SLOW_MS = float(os.environ.get('DASHBOARD_PROFILE_SLOW_MS', '500'))
+
+# Até este número de linhas, os dados vão uma vez para o navegador e os filtros rodam lá (0 desliga)
+CLIENTSIDE_MAX_ROWS = int(os.environ.get('DASHBOARD_CLIENTSIDE_MAX_ROWS', '200000'))
+
+# Compressão das respostas dos callbacks e do layout: codificações em ordem de preferência
+# (vazio desliga) e tamanho mínimo, em bytes, para valer a pena comprimir
+COMPRESSION = available_encodings(
+    [encoding.strip() for encoding in os.environ.get('DASHBOARD_COMPRESSION', 'br,gzip').split(',') if encoding.strip()]
+)
+COMPRESS_MIN_BYTES = int(os.environ.get('DASHBOARD_COMPRESS_MIN_BYTES', '1024'))
+
+# Número máximo de opções enviadas em cada lista de especialização e cidade
+OPTIONS_LIMIT = int(os.environ.get('DASHBOARD_OPTIONS_LIMIT', '50'))
+
+# A partir deste número de linhas, os filtros são resolvidos num processo em segundo plano pelo
+# DiskcacheManager do Dash (opcional, padrão 0: desligado; exige `dash[diskcache]`), com intervalo em ms
+# entre as consultas do navegador pelo resultado
+BACKGROUND_MIN_ROWS = int(os.environ.get('DASHBOARD_BACKGROUND_MIN_ROWS', '0'))
+BACKGROUND_POLL_MS = int(os.environ.get('DASHBOARD_BACKGROUND_POLL_MS', '200'))
+
+# Segundos sem digitar antes de a busca ser enviada (0 envia a cada tecla)
+SEARCH_DEBOUNCE = float(os.environ.get('DASHBOARD_SEARCH_DEBOUNCE', '0.3'))
+
+# Linhas convertidas e enviadas de cada vez na exportação (/export)
+EXPORT_CHUNK_ROWS = int(os.environ.get('DASHBOARD_EXPORT_CHUNK_ROWS', '50000'))
+
+# Ranking de custo-benefício: pesos das avaliações e do preço na pontuação e linhas exibidas
+RANKING_WEIGHTS = RankingWeights(float(os.environ.get('DASHBOARD_RANKING_REVIEWS_WEIGHT', '1')),
+                                 float(os.environ.get('DASHBOARD_RANKING_PRICE_WEIGHT', '1')))
+RANKING_SIZE = int(os.environ.get('DASHBOARD_RANKING_SIZE', '10'))
+
+metrics = MetricsRegistry(METRICS_DIR)
+atexit.register(metrics.flush, force=True)
+metrics.define('dashboard_stage_seconds', 'Tempo próprio de cada etapa do cálculo das saídas.', SECONDS_BUCKETS)
+metrics.define('dashboard_callback_seconds', 'Tempo de execução de cada callback.', SECONDS_BUCKETS)
+metrics.define('dashboard_serialize_seconds',
+               'Tempo do pedido fora do callback (serialização JSON da resposta e despacho do Dash).', SECONDS_BUCKETS)
+metrics.define('dashboard_request_seconds', 'Tempo total dos pedidos de callback.', SECONDS_BUCKETS)
+metrics.define('dashboard_response_bytes', 'Tamanho das respostas dos callbacks.', BYTES_BUCKETS)
+metrics.define('dashboard_filtered_rows', 'Linhas que passam nos filtros a cada resolução.', ROWS_BUCKETS)
+
+profiler = SlowRequestProfiler(PROFILE_DIR, PROFILE_SAMPLE_RATE, PROFILE_SLOW_MS / 1000) if PROFILE_DIR else None
+
+# Cliente do servidor de shards da máquina (iniciado no primeiro uso, se ainda não estiver no ar)
+shard_pool = ShardPool(SHARD_SOCKET, SHARD_PROCESSES, SHARD_CACHE_BYTES, deployment_authkey(CACHE_DIR))
+atexit.register(shard_pool.shutdown)
+
 # Carregar dados
 def load_data():
-    df = pd.read_csv('df_cleaned.csv')
-    df['newest_review_date'] = pd.to_datetime(df['newest_review_date'], format='%Y', errors='coerce')
-    df['price'] = pd.to_numeric(df['price'], errors='coerce')  # Ensure price is numeric
-    df['specialization'] = df['specialization'].astype(str).fillna('')
-    df['city1'] = df['city1'].astype(str).fillna('')
-    return df
+    # Com shards, só o manifesto é lido: as linhas ficam nos processos do pool
+    if read_shard_manifest(SHARDS_DIR) is not None:
+        return ShardedDataset(SHARDS_DIR, PRICE_STEP, RANKING_WEIGHTS, shard_pool)
+    # Prefere os dados colunares (sem cópia, compartilhados entre workers) se estiverem
+    # em dia com o CSV; caso contrário, lê e converte o CSV. Os índices dos filtros, da
+    # busca, da tabela e do ranking e o cubo de agregados são construídos uma única vez por versão
+    return load_dataset(DATA_FILE, COLUMNS_DIR, PRICE_STEP, RANKING_WEIGHTS)
+
+# Versão atual dos dados. É trocada por inteiro quando os arquivos mudam; cada pedido
+# pega a referência uma vez e trabalha sobre ela, vendo sempre uma versão consistente
+dataset = load_data()
+reload_lock = threading.Lock()
+
+def current_dataset():
+    return dataset
+
+# Modo particionado: cada consulta vai aos shards, somando os parciais dos que forem consultados
+SHARDED_MODE = isinstance(dataset, ShardedDataset)
+
+# Modo de filtragem no navegador: decidido na inicialização, pelo tamanho dos dados
+CLIENTSIDE_MODE = not SHARDED_MODE and 0 < dataset.n_rows <= CLIENTSIDE_MAX_ROWS
+
+# Modo em segundo plano, também decidido na inicialização: cada pedido dos filtros vira um job num
+# processo filho e o worker fica livre na hora; o navegador consulta o resultado e cancela o job
+# anterior quando os filtros mudam de novo. Os jobs e seus resultados ficam num diskcache local
+background_manager = (create_manager(os.path.join(CACHE_DIR, 'background'))
+                      if not CLIENTSIDE_MODE and not SHARDED_MODE and 0 < BACKGROUND_MIN_ROWS <= dataset.n_rows
+                      else None)
+BACKGROUND_MODE = background_manager is not None
+
+# Cache de resultados por combinação de filtros; as chaves incluem a versão dos dados
+result_cache = ResultCache(CACHE_DIR, max_entries=CACHE_MAX_ENTRIES)
+result_cache.purge(keep_version=dataset.version)
+
+# Recarregar os dados se os arquivos mudaram (incremental quando o CSV só ganhou linhas)
+def reload_data(force=False):
+    global dataset
+    with reload_lock:
+        try:
+            if SHARDED_MODE:
+                new_dataset = refresh_sharded_dataset(dataset, force=force)
+            else:
+                new_dataset = refresh_dataset(dataset, DATA_FILE, COLUMNS_DIR, force=force)
+        except Exception:
+            server.logger.exception('Falha ao recarregar os dados; mantendo a versão atual')
+            return False
+        if new_dataset is None:
+            return False
+        dataset = new_dataset
+        # Entradas de versões anteriores prendem o DataFrame e os índices delas: saem de todos os caches
+        result_cache.purge(keep_version=new_dataset.version)
+        row_store.purge(keep_version=new_dataset.version)
+        refinement_cache.purge(keep_version=new_dataset.version)
+        client_payload.cache_clear()
+        server.logger.info('Dados atualizados: %d linhas (versão %s)', new_dataset.n_rows, new_dataset.version)
+        return True
+
+def watch_data_files():
+    while True:
+        time.sleep(RELOAD_INTERVAL)
+        reload_data()
+
+# Cada worker inicia seu próprio observador no primeiro pedido (depois do fork do gunicorn)
+watcher_pid = None
+
+@server.before_request
+def start_data_watcher():
+    global watcher_pid
+    if RELOAD_INTERVAL > 0 and watcher_pid != os.getpid():
+        watcher_pid = os.getpid()
+        threading.Thread(target=watch_data_files, name='data-watcher', daemon=True).start()
+
+def is_callback_request():
+    return request.path.endswith('/_dash-update-component')
+
+@server.before_request
+def start_request_metrics():
+    if is_callback_request():
+        g.request_started = time.perf_counter()
+        g.profile = profiler.start() if profiler else None
+
+@server.after_request
+def record_request_metrics(response):
+    started = g.get('request_started')
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    callback_name = g.get('callback_name', 'unknown')
+    if g.get('profile') is not None:
+        profiler.finish(g.profile, elapsed, callback_name)
+    metrics.observe('dashboard_request_seconds', elapsed, callback=callback_name)
+    metrics.observe('dashboard_serialize_seconds', max(elapsed - g.get('callback_seconds', 0.0), 0.0),
+                    callback=callback_name)
+    if not response.is_streamed:
+        metrics.observe('dashboard_response_bytes', response.calculate_content_length() or 0, callback=callback_name,
+                        encoding=response.headers.get('Content-Encoding', 'identity'))
+    metrics.flush()
+    return response
+
+# Registrado depois das métricas para rodar antes delas: o tempo e o tamanho medidos já incluem a compressão
+@server.after_request
+def compress_dash_response(response):
+    if COMPRESSION and (is_callback_request() or request.path.endswith('/_dash-layout')):
+        response = compress_response(response, request.headers.get('Accept-Encoding', ''), COMPRESSION,
+                                     COMPRESS_MIN_BYTES)
+    return response
+
+# Mede o tempo de um callback e guarda seu nome para as métricas do pedido
+def instrumented(callback_function):
+    @functools.wraps(callback_function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return callback_function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.observe('dashboard_callback_seconds', elapsed, callback=callback_function.__name__)
+            if has_request_context():
+                g.callback_name = callback_function.__name__
+                g.callback_seconds = elapsed
+    return wrapper
+
+# Normalizar os filtros para que combinações equivalentes compartilhem a mesma entrada de cache
+def normalize_filters(specialization, city, telemedicine, price_range, search_term):
+    return (
+        specialization,
+        city,
+        telemedicine,
+        (float(price_range[0]), float(price_range[1])),
+        normalize_text(search_term or ''),
+    )
+
+# Resolver os filtros do painel em posições de linha de `data.df`
+def filter_rows(data, specialization, city, telemedicine, price_range, search_term):
+    # Filtros categóricos e de preço via índices pré-calculados
+    with metrics.stage('filter_rows'):
+        rows = data.filter_engine.query(specialization, city, telemedicine, price_range)
+    
+    # Filtro de busca (sem acentos, via índice de n-gramas)
+    if search_term:
+        with metrics.stage('search'):
+            rows = data.search_index.search(search_term, rows)
+    metrics.observe('dashboard_filtered_rows', len(rows))
+    return rows
 
-df = load_data()
+# Resolver os filtros a partir do resultado anterior quando eles só o restringem; None se não for o caso
+def narrow_rows(data, previous, filters):
+    residual = refinement_filters(previous.filters, filters)
+    if residual is None:
+        return None
+    specialization, city, telemedicine, price_range, search_term = residual
+    with metrics.stage('narrow'):
+        rows = data.filter_engine.narrow(previous.rows, specialization, city, telemedicine, price_range)
+    if search_term:
+        with metrics.stage('search'):
+            rows = data.search_index.search(search_term, rows)
+    metrics.observe('dashboard_filtered_rows', len(rows))
+    return rows
 
 # Definir paleta de cores para consistência
 COLOR_PALETTE = {
@@ -79,306 +342,369 @@ styles = {
     }
 }
 
-# Layout do aplicativo
-app.layout = html.Div([
-    # Cabeçalho
-    html.Div([
-        html.H1("Dashboard de Profissionais Médicos", style=styles['title']),
-        html.P("Análise interativa para auxiliar na escolha de profissionais médicos", style=styles['subtitle']),
-    ], style=styles['header']),
-    
-    # Estatísticas Principais (KPIs) - Agora no topo
-    html.Div([
-        html.H3("Estatísticas Principais", style=styles['section_title']),
-        
+# Opções dos filtros a partir da versão dos dados: os valores mais frequentes sob o valor
+# escolhido no outro filtro que casam com o texto digitado, mais o valor selecionado
+def filter_options(data, dimension, search_value, other_value, selected):
+    top = data.option_index.top(dimension, search_value, other_value, OPTIONS_LIMIT)
+    if selected != 'all' and selected not in {value for value, _ in top}:
+        position = data.option_index.positions[dimension].get(selected)
+        count = data.option_index.counts(dimension, other_value)[position] if position is not None else 0
+        top.append((selected, int(count)))
+    return [{'label': 'Todas', 'value': 'all'}] + [
+        {
+            'label': value,
+            'value': value,
+            # Sem acentos, para que a busca do próprio dropdown também aceite "sao paulo"
+            'search': normalize_text(value),
+            'title': f"{count:,} profissionais".replace(',', '.'),
+        }
+        for value, count in top
+    ]
+
+def specialization_options(data, search_value=None, city='all', selected='all'):
+    return filter_options(data, 'specialization', search_value, city, selected)
+
+def city_options(data, search_value=None, specialization='all', selected='all'):
+    return filter_options(data, 'city1', search_value, specialization, selected)
+
+def price_marks(data):
+    return {i: f'R${i}' for i in range(0, data.price_max + 1, 100)}
+
+# Gráficos do painel (os do servidor podem receber só os arrays de dados, como Patch)
+CHART_IDS = ('specialization-chart', 'telemedicine-chart', 'price-distribution-chart', 'reviews-evolution-chart')
+
+# Layout do aplicativo (montado a cada carregamento de página, com a versão atual dos dados)
+def serve_layout():
+    data = current_dataset()
+    return html.Div([
+        # Cabeçalho
+        html.Div([
+            html.H1("Dashboard de Profissionais Médicos", style=styles['title']),
+            html.P("Análise interativa para auxiliar na escolha de profissionais médicos", style=styles['subtitle']),
+        ], style=styles['header']),
+    
+        # Estatísticas Principais (KPIs) - Agora no topo
         html.Div([
-            # KPI - Total de Médicos
+            html.H3("Estatísticas Principais", style=styles['section_title']),
+        
             html.Div([
+                # KPI - Total de Médicos
                 html.Div([
-                    html.H4("Total de Profissionais", style={'margin': '0', 'fontWeight': 'normal', 'fontSize': '16px'}),
-                    html.H2(id="kpi-total-doctors", style={'margin': '5px 0', 'color': COLOR_PALETTE['primary'], 'fontSize': '36px'}),
-                ], style=styles['card']),
-            ], className="three columns"),
+                    html.Div([
+                        html.H4("Total de Profissionais", style={'margin': '0', 'fontWeight': 'normal', 'fontSize': '16px'}),
+                        html.H2(id="kpi-total-doctors", style={'margin': '5px 0', 'color': COLOR_PALETTE['primary'], 'fontSize': '36px'}),
+                    ], style=styles['card']),
+                ], className="three columns"),
             
-            # KPI - Preço Médio
-            html.Div([
+                # KPI - Preço Médio
                 html.Div([
-                    html.H4("Preço Médio", style={'margin': '0', 'fontWeight': 'normal', 'fontSize': '16px'}),
-                    html.H2(id="kpi-avg-price", style={'margin': '5px 0', 'color': COLOR_PALETTE['secondary'], 'fontSize': '36px'}),
-                ], style=styles['card']),
-            ], className="three columns"),
+                    html.Div([
+                        html.H4("Preço Médio", style={'margin': '0', 'fontWeight': 'normal', 'fontSize': '16px'}),
+                        html.H2(id="kpi-avg-price", style={'margin': '5px 0', 'color': COLOR_PALETTE['secondary'], 'fontSize': '36px'}),
+                    ], style=styles['card']),
+                ], className="three columns"),
             
-            # KPI - % com Telemedicina
-            html.Div([
+                # KPI - % com Telemedicina
                 html.Div([
-                    html.H4("% com Telemedicina", style={'margin': '0', 'fontWeight': 'normal', 'fontSize': '16px'}),
-                    html.H2(id="kpi-telemedicine-pct", style={'margin': '5px 0', 'color': COLOR_PALETTE['highlight'], 'fontSize': '36px'}),
-                ], style=styles['card']),
-            ], className="three columns"),
+                    html.Div([
+                        html.H4("% com Telemedicina", style={'margin': '0', 'fontWeight': 'normal', 'fontSize': '16px'}),
+                        html.H2(id="kpi-telemedicine-pct", style={'margin': '5px 0', 'color': COLOR_PALETTE['highlight'], 'fontSize': '36px'}),
+                    ], style=styles['card']),
+                ], className="three columns"),
             
-            # KPI - Avaliações Médias
-            html.Div([
+                # KPI - Avaliações Médias
                 html.Div([
-                    html.H4("Média de Avaliações", style={'margin': '0', 'fontWeight': 'normal', 'fontSize': '16px'}),
-                    html.H2(id="kpi-avg-reviews", style={'margin': '5px 0', 'color': COLOR_PALETTE['accent'], 'fontSize': '36px'}),
-                ], style=styles['card']),
-            ], className="three columns"),
-        ], className="row"),
-    ], style={**styles['container'], 'marginBottom': '20px'}),
+                    html.Div([
+                        html.H4("Média de Avaliações", style={'margin': '0', 'fontWeight': 'normal', 'fontSize': '16px'}),
+                        html.H2(id="kpi-avg-reviews", style={'margin': '5px 0', 'color': COLOR_PALETTE['accent'], 'fontSize': '36px'}),
+                    ], style=styles['card']),
+                ], className="three columns"),
+            ], className="row"),
+        ], style={**styles['container'], 'marginBottom': '20px'}),
     
-    # Painel de controle (filtros) - Agora abaixo dos KPIs
-    html.Div([
-        html.H3("Filtros", style=styles['section_title']),
-        
+        # Painel de controle (filtros) - Agora abaixo dos KPIs
         html.Div([
-            # Primeira linha de filtros
+            html.H3("Filtros", style=styles['section_title']),
+        
             html.Div([
-                # Filtro de Especialização
+                # Primeira linha de filtros
                 html.Div([
-                    html.Label("Especialização"),
-                    dcc.Dropdown(
-                        id='specialization-filter',
-                        options=[{'label': 'Todas', 'value': 'all'}] + 
-                                [{'label': spec, 'value': spec} for spec in sorted(df['specialization'].unique())],
-                        value='all',
-                        clearable=False
-                    ),
-                ], className="three columns"),
+                    # Filtro de Especialização
+                    html.Div([
+                        html.Label("Especialização"),
+                        dcc.Dropdown(
+                            id='specialization-filter',
+                            options=specialization_options(data),
+                            value='all',
+                            clearable=False
+                        ),
+                    ], className="three columns"),
                 
-                # Filtro de Cidade
-                html.Div([
-                    html.Label("Cidade"),
-                    dcc.Dropdown(
-                        id='city-filter',
-                        options=[{'label': 'Todas', 'value': 'all'}] +
-                                [{'label': city, 'value': city} for city in sorted(df['city1'].unique())],
-                        value='all',
-                        clearable=False
-                    ),
-                ], className="three columns"),
+                    # Filtro de Cidade
+                    html.Div([
+                        html.Label("Cidade"),
+                        dcc.Dropdown(
+                            id='city-filter',
+                            options=city_options(data),
+                            value='all',
+                            clearable=False
+                        ),
+                    ], className="three columns"),
                 
-                # Filtro de Telemedicina
-                html.Div([
-                    html.Label("Telemedicina"),
-                    dcc.Dropdown(
-                        id='telemedicine-filter',
-                        options=[
-                            {'label': 'Todos', 'value': 'all'},
-                            {'label': 'Disponível', 'value': 1},
-                            {'label': 'Não disponível', 'value': 0}
-                        ],
-                        value='all',
-                        clearable=False
-                    ),
-                ], className="three columns"),
+                    # Filtro de Telemedicina
+                    html.Div([
+                        html.Label("Telemedicina"),
+                        dcc.Dropdown(
+                            id='telemedicine-filter',
+                            options=[
+                                {'label': 'Todos', 'value': 'all'},
+                                {'label': 'Disponível', 'value': 1},
+                                {'label': 'Não disponível', 'value': 0}
+                            ],
+                            value='all',
+                            clearable=False
+                        ),
+                    ], className="three columns"),
                 
-                # Botão para Limpar Filtros
+                    # Botão para Limpar Filtros
+                    html.Div([
+                        html.Button('Limpar Filtros', id='clear-filters-button', n_clicks=0, 
+                                   style={'backgroundColor': COLOR_PALETTE['primary'], 'color': 'white',
+                                         'border': 'none', 'padding': '10px 20px', 'borderRadius': '5px',
+                                         'cursor': 'pointer', 'marginTop': '25px', 'width': '100%'})
+                    ], className="three columns"),
+                ], className="row"),
+            
+                # Segunda linha de filtros
                 html.Div([
-                    html.Button('Limpar Filtros', id='clear-filters-button', n_clicks=0, 
-                               style={'backgroundColor': COLOR_PALETTE['primary'], 'color': 'white',
-                                     'border': 'none', 'padding': '10px 20px', 'borderRadius': '5px',
-                                     'cursor': 'pointer', 'marginTop': '25px', 'width': '100%'})
-                ], className="three columns"),
-            ], className="row"),
+                    # Filtro de Preço
+                    html.Div([
+                        html.Label("Faixa de Preço"),
+                        dcc.RangeSlider(
+                            id='price-filter',
+                            min=data.price_min,
+                            max=data.price_max,
+                            step=PRICE_STEP,
+                            marks=price_marks(data),
+                            value=[data.price_min, data.price_max]
+                        ),
+                    ], className="twelve columns"),
+                ], className="row", style={'marginTop': '20px'}),
             
-            # Segunda linha de filtros
-            html.Div([
-                # Filtro de Preço
+                # Campo de busca
                 html.Div([
-                    html.Label("Faixa de Preço"),
-                    dcc.RangeSlider(
-                        id='price-filter',
-                        min=int(df['price'].min()),
-                        max=int(df['price'].max()),
-                        step=50,
-                        marks={i: f'R${i}' for i in range(0, int(df['price'].max()) + 1, 100)},
-                        value=[int(df['price'].min()), int(df['price'].max())]
+                    html.Label("Buscar por nome, cidade ou especialização:"),
+                    dcc.Input(
+                        id='search-input',
+                        type='text',
+                        placeholder='Digite para buscar...',
+                        debounce=SEARCH_DEBOUNCE or False,
+                        style={'width': '100%', 'padding': '8px', 'borderRadius': '4px', 'border': '1px solid #ddd'}
                     ),
-                ], className="twelve columns"),
-            ], className="row", style={'marginTop': '20px'}),
+                ], className="twelve columns", style={'marginTop': '20px'}),
             
-            # Campo de busca
-            html.Div([
-                html.Label("Buscar por nome, cidade ou especialização:"),
-                dcc.Input(
-                    id='search-input',
-                    type='text',
-                    placeholder='Digite para buscar...',
-                    style={'width': '100%', 'padding': '8px', 'borderRadius': '4px', 'border': '1px solid #ddd'}
-                ),
-            ], className="twelve columns", style={'marginTop': '20px'}),
+                *progress_indicator(),
             
-        ], style={'padding': '5px'}),
-    ], style={**styles['container'], 'marginBottom': '20px'}),
+            ], style={'padding': '5px'}),
+        ], style={**styles['container'], 'marginBottom': '20px'}),
     
-    # Seção de Gráficos reorganizados em duas colunas (2x2)
-    html.Div([
-        # Coluna 1
+        # Seção de Gráficos reorganizados em duas colunas (2x2)
         html.Div([
-            # Gráfico de barras - distribuição por especialização
+            # Coluna 1
             html.Div([
-                html.H3("Distribuição por Especialização", style=styles['section_title']),
-                dcc.Graph(id='specialization-chart', config={'displayModeBar': False}, style={'height': '300px'}),
-            ], style={**styles['container'], 'marginBottom': '20px', 'height': '350px'}),
+                # Gráfico de barras - distribuição por especialização
+                html.Div([
+                    html.H3("Distribuição por Especialização", style=styles['section_title']),
+                    dcc.Graph(id='specialization-chart', config={'displayModeBar': False}, style={'height': '300px'}),
+                ], style={**styles['container'], 'marginBottom': '20px', 'height': '350px'}),
             
-            # Gráfico de barras - participação em telemedicina
-            html.Div([
-                html.H3("Profissionais com Telemedicina", style=styles['section_title']),
-                dcc.Graph(id='telemedicine-chart', config={'displayModeBar': False}, style={'height': '300px'}),
-            ], style={**styles['container'], 'height': '350px'}),
-        ], className="six columns"),
+                # Gráfico de barras - participação em telemedicina
+                html.Div([
+                    html.H3("Profissionais com Telemedicina", style=styles['section_title']),
+                    dcc.Graph(id='telemedicine-chart', config={'displayModeBar': False}, style={'height': '300px'}),
+                ], style={**styles['container'], 'height': '350px'}),
+            ], className="six columns"),
         
-        # Coluna 2
-        html.Div([
-            # Gráfico de distribuição de preços
+            # Coluna 2
             html.Div([
-                html.H3("Distribuição de Preços por Consulta", style=styles['section_title']),
-                dcc.Graph(id='price-distribution-chart', config={'displayModeBar': False}, style={'height': '300px'}),
-            ], style={**styles['container'], 'marginBottom': '20px', 'height': '350px'}),
+                # Gráfico de distribuição de preços
+                html.Div([
+                    html.H3("Distribuição de Preços por Consulta", style=styles['section_title']),
+                    dcc.Graph(id='price-distribution-chart', config={'displayModeBar': False}, style={'height': '300px'}),
+                ], style={**styles['container'], 'marginBottom': '20px', 'height': '350px'}),
             
-            # Gráfico de evolução das avaliações
-            html.Div([
-                html.H3("Evolução das Avaliações", style=styles['section_title']),
-                dcc.Graph(id='reviews-evolution-chart', config={'displayModeBar': False}, style={'height': '300px'}),
-            ], style={**styles['container'], 'height': '350px'}),
-        ], className="six columns"),
-    ], className="row"),
-    
-    # Tabela de Profissionais
-    html.Div([
-        html.H3("Detalhes dos Profissionais", style=styles['section_title']),
+                # Gráfico de evolução das avaliações
+                html.Div([
+                    html.H3("Evolução das Avaliações", style=styles['section_title']),
+                    dcc.Graph(id='reviews-evolution-chart', config={'displayModeBar': False}, style={'height': '300px'}),
+                ], style={**styles['container'], 'height': '350px'}),
+            ], className="six columns"),
+        ], className="row"),
+    
+        # Ranking de custo-benefício sob os filtros atuais
+        html.Div([
+            html.H3(f"Top {RANKING_SIZE} Custo-Benefício", style=styles['section_title']),
+            html.P("Mais avaliações pelo menor preço entre os profissionais filtrados.",
+                   style={'color': COLOR_PALETTE['neutral'], 'fontSize': '13px', 'marginTop': '0'}),
+            dash_table.DataTable(
+                id='top-ranking-table',
+                columns=[
+                    {"name": "#", "id": "position"},
+                    {"name": "Nome", "id": "name"},
+                    {"name": "Especialização", "id": "specialization"},
+                    {"name": "Cidade", "id": "city1"},
+                    {"name": "Avaliações", "id": "reviews"},
+                    {"name": "Preço (R$)", "id": "price"},
+                    {"name": "Pontuação", "id": "score"},
+                ],
+                style_header={
+                    'backgroundColor': COLOR_PALETTE['light'],
+                    'fontWeight': 'bold',
+                    'textAlign': 'left'
+                },
+                style_cell={
+                    'textAlign': 'left',
+                    'padding': '4px 8px',
+                    'fontFamily': 'Arial',
+                    'fontSize': '13px',
+                },
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': 'rgb(248, 248, 248)'
+                    }
+                ],
+            ),
+        ], style={**styles['container'], 'marginTop': '20px', 'marginBottom': '20px'}),
+    
+        # Tabela de Profissionais
+        html.Div([
+            html.H3("Detalhes dos Profissionais", style=styles['section_title']),
         
-        # Tabela de dados
-        dash_table.DataTable(
-            id='doctors-table',
-            columns=[
-                {"name": "Nome", "id": "name"},
-                {"name": "Cidade", "id": "city1"},
-                {"name": "Especialização", "id": "specialization"},
-                {"name": "Avaliações", "id": "reviews"},
-                {"name": "Preço (R$)", "id": "price"},
-                {"name": "Telemedicina", "id": "telemedicine_text"},
-            ],
-            style_header={
-                'backgroundColor': COLOR_PALETTE['light'],
-                'fontWeight': 'bold',
-                'textAlign': 'left'
-            },
-            style_cell={
-                'textAlign': 'left',
-                'padding': '10px',
-                'fontFamily': 'Arial',
-            },
-            style_data_conditional=[
-                {
-                    'if': {'row_index': 'odd'},
-                    'backgroundColor': 'rgb(248, 248, 248)'
-                }
-            ],
-            page_size=10,
-            filter_action="none",
-            sort_action="native",
-            sort_mode="multi",
-            page_action="native"
-        ),
-    ], style=styles['container']),
-    
-    # Rodapé
-    html.Div([
-        html.P("Dashboard criado para auxiliar na escolha de profissionais médicos. Dados de 2022.", 
-              style={'textAlign': 'center', 'color': COLOR_PALETTE['neutral']}),
-    ], style={'marginTop': '30px', 'marginBottom': '20px'})
-    
-], style={'fontFamily': 'Arial, sans-serif', 'margin': '0', 'backgroundColor': '#f5f5f5', 'maxWidth': '1200px', 'margin': '0 auto', 'padding': '0 15px'})
-
-# Callbacks
-
-# Callback para atualizar todos os componentes baseados nos filtros
-@app.callback(
-    [
-        Output('kpi-total-doctors', 'children'),
-        Output('kpi-avg-price', 'children'),
-        Output('kpi-telemedicine-pct', 'children'),
-        Output('kpi-avg-reviews', 'children'),
-        Output('specialization-chart', 'figure'),
-        Output('telemedicine-chart', 'figure'),
-        Output('price-distribution-chart', 'figure'),
-        Output('reviews-evolution-chart', 'figure'),
-        Output('doctors-table', 'data')
-    ],
-    [
-        Input('specialization-filter', 'value'),
-        Input('city-filter', 'value'),
-        Input('telemedicine-filter', 'value'),
-        Input('price-filter', 'value'),
-        Input('search-input', 'value')
-    ]
-)
-def update_dashboard(specialization, city, telemedicine, price_range, search_term):
-    # Aplicar filtros
-    filtered_df = df.copy()
+            # Exportação de todas as linhas filtradas (os links acompanham os filtros)
+            html.Div(export_links(), style={'marginBottom': '10px', 'textAlign': 'right'}),
+        
+            # Tabela de dados
+            dash_table.DataTable(
+                id='doctors-table',
+                columns=[
+                    {"name": "Nome", "id": "name"},
+                    {"name": "Cidade", "id": "city1"},
+                    {"name": "Especialização", "id": "specialization"},
+                    {"name": "Avaliações", "id": "reviews"},
+                    {"name": "Preço (R$)", "id": "price"},
+                    {"name": "Telemedicina", "id": "telemedicine_text"},
+                ],
+                style_header={
+                    'backgroundColor': COLOR_PALETTE['light'],
+                    'fontWeight': 'bold',
+                    'textAlign': 'left'
+                },
+                style_cell={
+                    'textAlign': 'left',
+                    'padding': '10px',
+                    'fontFamily': 'Arial',
+                },
+                style_data_conditional=[
+                    {
+                        'if': {'row_index': 'odd'},
+                        'backgroundColor': 'rgb(248, 248, 248)'
+                    }
+                ],
+                page_size=10,
+                page_current=0,
+                filter_action="none",
+                sort_action="custom",
+                sort_mode="multi",
+                sort_by=[],
+                page_action="custom"
+            ),
+        ], style=styles['container']),
     
-    # Filtro de especialização
-    if specialization != 'all':
-        filtered_df = filtered_df[filtered_df['specialization'] == specialization]
+        # Estado dos filtros: chave do conjunto de linhas filtradas guardado no servidor
+        dcc.Store(id='filter-state'),
     
-    # Filtro de cidade
-    if city != 'all':
-        filtered_df = filtered_df[filtered_df['city1'] == city]
+        # Se cada gráfico mostra hoje uma figura completa (e não a vazia), gravado junto com a figura
+        *[dcc.Store(id=f'{chart_id}-complete', data=False) for chart_id in CHART_IDS],
     
-    # Filtro de telemedicina
-    if telemedicine != 'all':
-        filtered_df = filtered_df[filtered_df['telemedicine'] == telemedicine]
+        # Identificador da sessão (por aba), para refinar os filtros a partir do resultado anterior
+        dcc.Store(id='session-id', storage_type='session', data=uuid.uuid4().hex),
     
-    # Filtro de preço
-    filtered_df = filtered_df[(filtered_df['price'] >= price_range[0]) & 
-                              (filtered_df['price'] <= price_range[1])]
+        # Versão dos dados exibida e verificação periódica de novas versões
+        dcc.Store(id='data-version', data=data.version),
+        dcc.Interval(id='data-refresh-interval', interval=DATA_POLL_INTERVAL * 1000),
     
-    # Filtro de busca
-    if search_term:
-        search_term = search_term.lower()
-        search_filter = (
-            filtered_df['name'].str.lower().str.contains(search_term) |
-            filtered_df['city1'].str.lower().str.contains(search_term) |
-            filtered_df['specialization'].str.lower().str.contains(search_term)
-        )
-        filtered_df = filtered_df[search_filter]
+        # Modo no navegador: colunas dos dados e modelos das figuras, enviados uma vez
+        *client_stores(data),
     
-    # Se não houver dados após filtros
-    if filtered_df.empty:
-        # Criar gráficos vazios
-        empty_bar = px.bar(
-            x=['Sem dados'],
-            y=[0],
-            labels={'x': '', 'y': 'Contagem'},
-            title="Sem dados disponíveis para os filtros selecionados"
-        )
-        
-        return (
-            "0",  # KPI - Total
-            "R$ 0",  # KPI - Preço Médio
-            "0%",  # KPI - % Telemedicina
-            "0",  # KPI - Média Avaliações
-            empty_bar,  # Gráfico de especialização
-            empty_bar,  # Gráfico de telemedicina
-            empty_bar,  # Gráfico de preços
-            empty_bar,  # Gráfico de evolução de avaliações
-            []  # Tabela vazia
-        )
+        # Rodapé
+        html.Div([
+            html.P("Dashboard criado para auxiliar na escolha de profissionais médicos. Dados de 2022.", 
+                  style={'textAlign': 'center', 'color': COLOR_PALETTE['neutral']}),
+        ], style={'marginTop': '30px', 'marginBottom': '20px'})
     
-    # Calcular KPIs
-    total_doctors = len(filtered_df)
-    avg_price = f"R$ {filtered_df['price'].mean():.2f}"
-    telemedicine_pct = f"{(filtered_df['telemedicine'].sum() / total_doctors * 100):.1f}%"
-    avg_reviews = f"{filtered_df['reviews'].mean():.1f}"
+    ], style={'fontFamily': 'Arial, sans-serif', 'margin': '0', 'backgroundColor': '#f5f5f5', 'maxWidth': '1200px', 'margin': '0 auto', 'padding': '0 15px'})
+
+# Links de exportação, um por formato disponível; o endereço recebe os filtros no navegador
+def export_links():
+    return [
+        html.A(f'Exportar {export_format.upper()}', id=f'export-{export_format}-link',
+               href=app.get_relative_path('/export') + f'?format={export_format}',
+               style={'backgroundColor': COLOR_PALETTE['primary'], 'color': 'white', 'padding': '8px 16px',
+                      'borderRadius': '5px', 'textDecoration': 'none', 'marginLeft': '10px'})
+        for export_format in available_formats()
+    ]
+
+# Andamento do cálculo em segundo plano (visível só enquanto o job roda)
+def progress_indicator():
+    if not BACKGROUND_MODE:
+        return []
+    return [
+        html.Div([
+            html.Progress(id='filter-progress', value=0, max=len(OUTPUT_BUILDERS) + 1, style={'width': '100%'}),
+            html.Span(id='filter-progress-label', style={'fontSize': '12px', 'color': COLOR_PALETTE['neutral']}),
+        ], id='filter-progress-container', className="twelve columns", style={'display': 'none', 'marginTop': '10px'}),
+    ]
+
+def client_stores(data):
+    if not CLIENTSIDE_MODE:
+        return []
+    return [
+        dcc.Store(id='client-data', data=client_payload(data)),
+        dcc.Store(id='figure-templates', data=CLIENT_FIGURE_TEMPLATES),
+    ]
+
+# Payload da versão atual, montado uma vez e reaproveitado em todos os carregamentos de página
+@functools.lru_cache(maxsize=1)
+def client_payload(data):
+    return build_client_payload(data, RANKING_SIZE)
+
+app.layout = serve_layout
+
+# Construção das saídas do painel
+
+# Campos dos traços substituídos por Patch quando a estrutura da figura não muda
+PATCH_TRACE_KEYS = ('x', 'y', 'text', 'marker', 'values', 'labels', 'customdata', 'width',
+                    'q1', 'median', 'q3', 'lowerfence', 'upperfence')
+
+# Modelos das figuras: montados uma vez com Plotly Express/go.Figure sobre dados de exemplo;
+# a cada pedido só os arrays de dados são preenchidos, sem validação nem cópias profundas
+
+def empty_figure():
+    empty_bar = px.bar(
+        x=['Sem dados'],
+        y=[0],
+        labels={'x': '', 'y': 'Contagem'},
+        title="Sem dados disponíveis para os filtros selecionados"
+    )
+    return empty_bar.to_dict()
+
+def specialization_template():
+    sample = pd.DataFrame({'specialization': ['Exemplo'], 'count': [1]})
     
     # Gráfico de Distribuição por Especialização
-    spec_counts = filtered_df['specialization'].value_counts().reset_index()
-    spec_counts.columns = ['specialization', 'count']
-    spec_counts = spec_counts.sort_values('count', ascending=False).head(10)  # Reduzido para 10 para caber melhor
-    
     specialization_fig = px.bar(
-        spec_counts,
+        sample,
         x='count',
         y='specialization',
         orientation='h',
@@ -401,19 +727,24 @@ def update_dashboard(specialization, city, telemedicine, price_range, search_ter
         hovertemplate='<b>%{y}</b><br>Profissionais: %{x}'
     )
     
-    # Gráfico de Participação em Telemedicina
-    telemedicine_counts = filtered_df['telemedicine'].map({1: 'Disponível', 0: 'Não disponível'}).value_counts().reset_index()
-    telemedicine_counts.columns = ['status', 'count']
+    return FigureTemplate(specialization_fig.to_dict())
+
+# Cores das fatias do gráfico de telemedicina
+TELEMEDICINE_COLORS = {
+    'Disponível': COLOR_PALETTE['secondary'],
+    'Não disponível': COLOR_PALETTE['neutral']
+}
+
+def telemedicine_template():
+    sample = pd.DataFrame({'status': ['Disponível'], 'count': [1]})
     
+    # Gráfico de Participação em Telemedicina
     telemedicine_fig = px.pie(
-        telemedicine_counts,
+        sample,
         values='count',
         names='status',
         color='status',
-        color_discrete_map={
-            'Disponível': COLOR_PALETTE['secondary'],
-            'Não disponível': COLOR_PALETTE['neutral']
-        },
+        color_discrete_map=TELEMEDICINE_COLORS,
         hole=0.4
     )
     
@@ -427,53 +758,61 @@ def update_dashboard(specialization, city, telemedicine, price_range, search_ter
         hovertemplate='<b>%{label}</b><br>Profissionais: %{value} (%{percent})'
     )
     
-    # Gráfico de Distribuição de Preços
-    price_fig = px.histogram(
-        filtered_df,
-        x='price',
-        nbins=20,
-        labels={'price': 'Preço da Consulta (R$)', 'count': 'Número de Profissionais'},
-        color_discrete_sequence=[COLOR_PALETTE['primary']]
+    return FigureTemplate(telemedicine_fig.to_dict())
+
+def price_template():
+    price_fig = go.Figure(
+        layout=dict(
+            xaxis={'title': {'text': 'Preço da Consulta (R$)'}},
+            yaxis={'title': {'text': 'count'}},
+            legend={'tracegroupgap': 0},
+            barmode='relative',
+        )
     )
     
+    price_fig.add_trace(go.Bar(
+        x=[0],
+        y=[0],
+        width=1,
+        customdata=[''],
+        name='',
+        showlegend=False,
+        marker_color=COLOR_PALETTE['primary'],
+        hovertemplate='Preço: R$%{customdata}<br>Profissionais: %{y}'
+    ))
+    
     price_fig.update_layout(
         plot_bgcolor='white',
         bargap=0.1,
         margin=dict(l=10, r=10, t=10, b=10),
     )
     
-    price_fig.update_traces(
-        hovertemplate='Preço: R$%{x}<br>Profissionais: %{y}'
-    )
-    
-    # Adicionar boxplot sobreposto ao histograma
-    price_box = go.Box(
-        x=filtered_df['price'],
+    # Boxplot sobreposto ao histograma (estatísticas pré-calculadas)
+    price_fig.add_trace(go.Box(
+        q1=[0],
+        median=[0],
+        q3=[0],
+        lowerfence=[0],
+        upperfence=[0],
+        x=[[]],
+        y=[0],
+        orientation='h',
         name='Distribuição',
         marker_color=COLOR_PALETTE['accent'],
         boxpoints='outliers',
         line=dict(width=2),
-        fillcolor='rgba(0,0,0,0)',
-        y0=0
-    )
-    
-    price_fig.add_trace(price_box)
+        fillcolor='rgba(0,0,0,0)'
+    ))
     
+    return FigureTemplate(price_fig.to_dict())
+
+def reviews_template():
     # Gráfico de Evolução das Avaliações
-    # Agrupando por data e especialização para o gráfico de evolução
-    reviews_evolution = filtered_df.groupby(['newest_review_date']).agg(
-        total_reviews=('reviews', 'sum'),
-        avg_reviews=('reviews', 'mean'),
-        count=('reviews', 'count')
-    ).reset_index()
-    
-    reviews_evolution = reviews_evolution.sort_values('newest_review_date')
-    
     reviews_fig = go.Figure()
     
     reviews_fig.add_trace(go.Scatter(
-        x=reviews_evolution['newest_review_date'],
-        y=reviews_evolution['avg_reviews'],
+        x=[],
+        y=[],
         mode='lines+markers',
         name='Média de Avaliações',
         line=dict(color=COLOR_PALETTE['highlight'], width=3),
@@ -488,25 +827,519 @@ def update_dashboard(specialization, city, telemedicine, price_range, search_ter
         margin=dict(l=10, r=10, t=10, b=10),
     )
     
-    # Preparar dados para a tabela
-    table_df = filtered_df[['name', 'city1', 'specialization', 'reviews', 'price', 'telemedicine']].copy()
-    table_df['telemedicine_text'] = table_df['telemedicine'].map({1: 'Sim', 0: 'Não'})
-    table_data = table_df.to_dict('records')
+    return FigureTemplate(reviews_fig.to_dict())
+
+EMPTY_FIGURE = empty_figure()
+SPECIALIZATION_TEMPLATE = specialization_template()
+TELEMEDICINE_TEMPLATE = telemedicine_template()
+PRICE_TEMPLATE = price_template()
+REVIEWS_TEMPLATE = reviews_template()
+
+# Modelos enviados ao navegador no modo de filtragem no navegador
+CLIENT_FIGURE_TEMPLATES = {
+    'empty': EMPTY_FIGURE,
+    'specialization': SPECIALIZATION_TEMPLATE.to_dict(),
+    'telemedicine': TELEMEDICINE_TEMPLATE.to_dict(),
+    'price': PRICE_TEMPLATE.to_dict(),
+    'reviews': REVIEWS_TEMPLATE.to_dict(),
+    'telemedicine_colors': TELEMEDICINE_COLORS,
+}
+
+def build_empty_figure():
+    return EMPTY_FIGURE
+
+def build_kpis(aggregates):
+    # Se não houver dados após filtros
+    if aggregates.total == 0:
+        return (
+            "0",  # KPI - Total
+            "R$ 0",  # KPI - Preço Médio
+            "0%",  # KPI - % Telemedicina
+            "0"  # KPI - Média Avaliações
+        )
     
+    total_doctors = aggregates.total
     return (
         f"{total_doctors:,}".replace(',', '.'),  # KPI - Total
-        avg_price,  # KPI - Preço Médio
-        telemedicine_pct,  # KPI - % Telemedicina
-        avg_reviews,  # KPI - Média Avaliações
-        specialization_fig,  # Gráfico de especialização
-        telemedicine_fig,  # Gráfico de telemedicina
-        price_fig,  # Gráfico de preços
-        reviews_fig,  # Gráfico de evolução de avaliações
-        table_data  # Tabela de médicos
+        f"R$ {aggregates.avg_price:.2f}",  # KPI - Preço Médio
+        f"{(aggregates.telemedicine_sum / total_doctors * 100):.1f}%",  # KPI - % Telemedicina
+        f"{aggregates.avg_reviews:.1f}"  # KPI - Média Avaliações
     )
 
-# Callback para limpar todos os filtros
-@app.callback(
+def build_specialization_figure(aggregates):
+    if aggregates.total == 0:
+        return build_empty_figure()
+    
+    spec_counts = aggregates.specialization_counts().head(10)  # Reduzido para 10 para caber melhor
+    counts = spec_counts.to_numpy()
+    return SPECIALIZATION_TEMPLATE.fill({
+        'x': counts,
+        'y': spec_counts.index.tolist(),
+        'text': counts,
+        'marker': {'color': counts},
+    })
+
+def build_telemedicine_figure(aggregates):
+    if aggregates.total == 0:
+        return build_empty_figure()
+    
+    telemedicine_counts = aggregates.telemedicine_counts()
+    telemedicine_counts.index = telemedicine_counts.index.map({1: 'Disponível', 0: 'Não disponível'})
+    telemedicine_counts = telemedicine_counts[telemedicine_counts.index.notna()]
+    labels = telemedicine_counts.index.tolist()
+    return TELEMEDICINE_TEMPLATE.fill({
+        'labels': labels,
+        'values': telemedicine_counts.to_numpy(),
+        'customdata': [[label] for label in labels],
+        'marker': {'colors': [TELEMEDICINE_COLORS[label] for label in labels]},
+    })
+
+def build_price_figure(price_counts):
+    # Recebe os preços não nulos distintos, em ordem crescente, e quantas linhas têm cada um
+    prices, counts = price_counts
+    if len(prices) == 0:
+        return build_empty_figure()
+    
+    # Gráfico de Distribuição de Preços: faixas e quartis calculados no servidor,
+    # para que o tamanho da figura não dependa do número de linhas filtradas
+    edges, bin_counts = histogram_bins(prices, counts, nbins=20)
+    box = box_stats(prices, counts)
+    
+    integral = bool(np.all(np.mod(prices, 1) == 0))
+    bin_labels = [
+        f"{np.ceil(low) + 0:.0f} - {np.ceil(high) - 1:.0f}" if integral else f"{low:g} - {high:g}"
+        for low, high in zip(edges[:-1], edges[1:])
+    ]
+    
+    return PRICE_TEMPLATE.fill(
+        {
+            'x': (edges[:-1] + edges[1:]) / 2,
+            'y': bin_counts,
+            'width': (edges[1] - edges[0]) * 0.9,  # Mesma largura que bargap=0.1 daria a um histograma
+            'customdata': bin_labels,
+        },
+        {
+            'q1': [box['q1']],
+            'median': [box['median']],
+            'q3': [box['q3']],
+            'lowerfence': [box['lowerfence']],
+            'upperfence': [box['upperfence']],
+            'x': [box['outliers']],
+        },
+    )
+
+def build_reviews_figure(aggregates):
+    if aggregates.total == 0:
+        return build_empty_figure()
+    
+    reviews_evolution = aggregates.reviews_by_year()
+    return REVIEWS_TEMPLATE.fill({
+        'x': reviews_evolution['newest_review_date'].to_numpy(),
+        'y': reviews_evolution['avg_reviews'].to_numpy(),
+    })
+
+def build_table_page(entry, sort_by, page_current, page_size):
+    table_df, page_current, page_count = entry.table_page(sort_by, page_current, page_size)
+    
+    # Preparar dados da página para a tabela
+    table_df = table_df.assign(telemedicine_text=table_df['telemedicine'].map({1: 'Sim', 0: 'Não'}))
+    return table_df.to_dict('records'), page_count, page_current
+
+def build_top_ranking(entry):
+    top_df = entry.top(RANKING_SIZE)
+    top_df = top_df.assign(score=[f"{score:.2f}" for score in top_df['score']])
+    top_df.insert(0, 'position', range(1, len(top_df) + 1))
+    return top_df.to_dict('records')
+
+# Conjuntos de linhas filtradas guardados no servidor, por chave
+row_store = RowStore(max_entries=ROW_STORE_MAX_ENTRIES)
+
+# Último resultado de cada sessão (por worker)
+refinement_cache = RefinementCache(max_sessions=REFINEMENT_MAX_SESSIONS, max_bytes=REFINEMENT_MAX_BYTES)
+
+def resolve_rows(data, filters, session_id=None):
+    previous = refinement_cache.get(session_id, data.version) if session_id else None
+    rows = narrow_rows(data, previous, filters) if previous is not None else None
+    if rows is None:
+        rows = filter_rows(data, *filters)
+    return rows
+
+def store_rows(data, filters, rows, session_id=None):
+    entry = row_store.put(FilteredRows(data, filters, rows))
+    if session_id:
+        refinement_cache.put(session_id, entry)
+    return entry
+
+def lookup_rows(data, filters, session_id=None):
+    if SHARDED_MODE:
+        return row_store.put(query_shards(data, filters))
+    return store_rows(data, filters, resolve_rows(data, filters, session_id), session_id)
+
+# No modo particionado o resultado vem dos parciais dos shards, sem posições de linha
+def query_shards(data, filters):
+    with metrics.stage('shards'):
+        entry = data.query(filters)
+    metrics.observe('dashboard_filtered_rows', entry.total)
+    return entry
+
+def rows_from_state(state):
+    # A chave pode ter sido criada em outro worker (ou numa versão dos dados já
+    # substituída): nesse caso recalcula pelos filtros na versão atual
+    entry = row_store.get(state['key'])
+    if entry is None:
+        data = current_dataset()
+        filters = state_filters(state)
+        if BACKGROUND_MODE and state['version'] == data.version:
+            entry = shared_rows(data, filters, state['key'], state.get('session'))
+        else:
+            entry = lookup_rows(data, filters)
+    return entry
+
+# No modo em segundo plano as linhas são calculadas no processo do job, que termina junto com
+# seus caches: elas passam pelo cache compartilhado até o worker que atende os demais callbacks
+def shared_rows(data, filters, key, session_id=None):
+    size = data.n_rows
+    packed = result_cache.get_or_compute(data.version, ('packed_rows', key),
+                                         lambda: pack_rows(resolve_rows(data, filters, session_id), size))
+    return store_rows(data, filters, unpack_rows(packed, size), session_id)
+
+def state_filters(state):
+    specialization, city, telemedicine, price_range, search_term = state['filters']
+    return (specialization, city, telemedicine, tuple(price_range), search_term)
+
+def aggregates_for(entry):
+    # Sem busca textual, os agregados saem das células do cubo; com busca, das linhas filtradas
+    if entry.aggregates is None:
+        data = entry.dataset
+        specialization, city, telemedicine, price_range, search_term = entry.filters
+        with metrics.stage('aggregates'):
+            if search_term:
+                entry.aggregates = data.data_cube.aggregate_rows(entry.rows)
+            else:
+                entry.aggregates = data.data_cube.query(data.filter_engine, specialization, city, telemedicine, price_range)
+    return entry.aggregates
+
+def patch_figure_data(figure):
+    # Envia só os arrays de dados; layout e template ficam como estão no navegador
+    patch = Patch()
+    for i, trace in enumerate(figure['data']):
+        for key in PATCH_TRACE_KEYS:
+            if key in trace:
+                patch['data'][i][key] = trace[key]
+    # Forma serializada do Patch (é ela que o navegador reconhece): um dict comum passa
+    # direto pelo orjson, enquanto o objeto Patch forçaria a conversão lenta da resposta inteira
+    return patch.to_plotly_json()
+
+def timed_build(name, state, build):
+    entry = rows_from_state(state)
+    with metrics.stage(name):
+        return build(entry)
+
+def cached_output(name, state, build):
+    # Estado calculado numa versão anterior dos dados: responde pela versão atual, sem cache
+    data = current_dataset()
+    if state['version'] != data.version:
+        return timed_build(name, state, build)
+    with metrics.stage('result_cache'):
+        return result_cache.get_or_compute(data.version, (name,) + state_filters(state),
+                                           lambda: timed_build(name, state, build))
+
+def figure_output(name, state, build, complete):
+    # Devolve a figura e se ela é completa. Figuras vazias e completas têm estruturas diferentes:
+    # só dá para aplicar Patch se a página mostra uma completa (`complete`, gravado com a figura
+    # pela mesma resposta; o estado anterior dos filtros não diz o que chegou ao navegador)
+    figure = cached_output(name, state, build)
+    if state['total'] == 0 or not complete:
+        return figure, state['total'] > 0
+    with metrics.stage('patch'):
+        return patch_figure_data(figure), True
+
+# Todas as saídas do painel para uma combinação de filtros (fora dos callbacks, p.ex. em benchmarks)
+def update_dashboard(specialization, city, telemedicine, price_range, search_term):
+    filters = normalize_filters(specialization, city, telemedicine, price_range, search_term)
+    entry = lookup_rows(current_dataset(), filters)
+    aggregates = aggregates_for(entry)
+    return build_kpis(aggregates) + (
+        build_specialization_figure(aggregates),
+        build_telemedicine_figure(aggregates),
+        build_price_figure(entry.price_counts()),
+        build_reviews_figure(aggregates),
+    )
+
+# Callbacks
+
+# Callbacks do painel calculados no servidor. No modo no navegador eles são substituídos pelos
+# de assets/clientside.js: as funções continuam disponíveis (p.ex. para benchmarks), sem registro
+def server_side_callback(*args, **kwargs):
+    if CLIENTSIDE_MODE:
+        return lambda callback_function: callback_function
+    return app.callback(*args, **kwargs)
+
+# Saídas calculadas a partir do conjunto de linhas, pelo nome usado no cache de resultados
+OUTPUT_BUILDERS = {
+    'kpis': lambda entry: build_kpis(aggregates_for(entry)),
+    'specialization-chart': lambda entry: build_specialization_figure(aggregates_for(entry)),
+    'telemedicine-chart': lambda entry: build_telemedicine_figure(aggregates_for(entry)),
+    'price-distribution-chart': lambda entry: build_price_figure(entry.price_counts()),
+    'reviews-evolution-chart': lambda entry: build_reviews_figure(aggregates_for(entry)),
+    'top-ranking': build_top_ranking,
+}
+
+# Rótulos das etapas mostrados no andamento do cálculo em segundo plano
+OUTPUT_LABELS = {
+    'kpis': 'Calculando os indicadores...',
+    'specialization-chart': 'Montando o gráfico de especialidades...',
+    'telemedicine-chart': 'Montando o gráfico de telemedicina...',
+    'price-distribution-chart': 'Montando a distribuição de preços...',
+    'reviews-evolution-chart': 'Montando a evolução das avaliações...',
+    'top-ranking': 'Montando o ranking de custo-benefício...',
+}
+
+def next_filter_state(filters, entry, previous_state):
+    if previous_state and previous_state['key'] == entry.key:
+        return no_update
+    return {
+        'filters': filters,
+        'version': entry.dataset.version,
+        'key': entry.key,
+        'total': entry.total,
+    }
+
+# Callback que resolve os filtros em um conjunto de linhas guardado no servidor; os demais
+# callbacks dependem só da chave e não disparam se o conjunto de linhas não mudou
+FILTER_STATE_DEPENDENCIES = (
+    Output('filter-state', 'data'),
+    [
+        Input('specialization-filter', 'value'),
+        Input('city-filter', 'value'),
+        Input('telemedicine-filter', 'value'),
+        Input('price-filter', 'value'),
+        Input('search-input', 'value'),
+        Input('data-version', 'data')
+    ],
+    [
+        State('filter-state', 'data'),
+        State('session-id', 'data')
+    ]
+)
+
+@instrumented
+def update_filter_state(specialization, city, telemedicine, price_range, search_term, version, previous_state,
+                        session_id):
+    filters = normalize_filters(specialization, city, telemedicine, price_range, search_term)
+    entry = lookup_rows(current_dataset(), filters, session_id)
+    return next_filter_state(filters, entry, previous_state)
+
+# Mesmo callback no modo em segundo plano, rodando no processo do job. Além de resolver os
+# filtros, já calcula as saídas no cache compartilhado (os callbacks delas só as leem) e grava
+# as linhas para a tabela, informando o andamento a cada etapa
+@instrumented
+def update_filter_state_in_background(set_progress, specialization, city, telemedicine, price_range, search_term,
+                                      version, previous_state, session_id):
+    steps = len(OUTPUT_BUILDERS) + 1
+    set_progress((0, steps, 'Aplicando os filtros...'))
+    data = current_dataset()
+    filters = normalize_filters(specialization, city, telemedicine, price_range, search_term)
+    entry = lookup_rows(data, filters, session_id)
+    state = next_filter_state(filters, entry, previous_state)
+    if state is no_update:
+        return state
+    state['session'] = session_id
+    result_cache.get_or_compute(data.version, ('packed_rows', entry.key), lambda: pack_rows(entry.rows, data.n_rows))
+    for step, (name, build) in enumerate(OUTPUT_BUILDERS.items(), start=1):
+        set_progress((step, steps, OUTPUT_LABELS[name]))
+        cached_output(name, state, build)
+    return state
+
+if BACKGROUND_MODE:
+    app.callback(
+        *FILTER_STATE_DEPENDENCIES,
+        background=True,
+        manager=background_manager,
+        interval=BACKGROUND_POLL_MS,
+        progress=[
+            Output('filter-progress', 'value'),
+            Output('filter-progress', 'max'),
+            Output('filter-progress-label', 'children')
+        ],
+        running=[
+            (Output('filter-progress-container', 'style'), {'display': 'block', 'marginTop': '10px'},
+             {'display': 'none'})
+        ]
+    )(update_filter_state_in_background)
+else:
+    server_side_callback(*FILTER_STATE_DEPENDENCIES)(update_filter_state)
+
+# Callback para os KPIs
+@server_side_callback(
+    [
+        Output('kpi-total-doctors', 'children'),
+        Output('kpi-avg-price', 'children'),
+        Output('kpi-telemedicine-pct', 'children'),
+        Output('kpi-avg-reviews', 'children')
+    ],
+    Input('filter-state', 'data'),
+    [
+        State('kpi-total-doctors', 'children'),
+        State('kpi-avg-price', 'children'),
+        State('kpi-telemedicine-pct', 'children'),
+        State('kpi-avg-reviews', 'children')
+    ]
+)
+@instrumented
+def update_kpis(state, *current):
+    kpis = cached_output('kpis', state, OUTPUT_BUILDERS['kpis'])
+    return tuple(no_update if new == old else new for new, old in zip(kpis, current))
+
+# Callbacks para os gráficos (um por gráfico)
+@server_side_callback(
+    [Output('specialization-chart', 'figure'), Output('specialization-chart-complete', 'data')],
+    Input('filter-state', 'data'),
+    State('specialization-chart-complete', 'data')
+)
+@instrumented
+def update_specialization_chart(state, complete):
+    return figure_output('specialization-chart', state, OUTPUT_BUILDERS['specialization-chart'], complete)
+
+@server_side_callback(
+    [Output('telemedicine-chart', 'figure'), Output('telemedicine-chart-complete', 'data')],
+    Input('filter-state', 'data'),
+    State('telemedicine-chart-complete', 'data')
+)
+@instrumented
+def update_telemedicine_chart(state, complete):
+    return figure_output('telemedicine-chart', state, OUTPUT_BUILDERS['telemedicine-chart'], complete)
+
+@server_side_callback(
+    [Output('price-distribution-chart', 'figure'), Output('price-distribution-chart-complete', 'data')],
+    Input('filter-state', 'data'),
+    State('price-distribution-chart-complete', 'data')
+)
+@instrumented
+def update_price_chart(state, complete):
+    return figure_output('price-distribution-chart', state, OUTPUT_BUILDERS['price-distribution-chart'], complete)
+
+@server_side_callback(
+    [Output('reviews-evolution-chart', 'figure'), Output('reviews-evolution-chart-complete', 'data')],
+    Input('filter-state', 'data'),
+    State('reviews-evolution-chart-complete', 'data')
+)
+@instrumented
+def update_reviews_chart(state, complete):
+    return figure_output('reviews-evolution-chart', state, OUTPUT_BUILDERS['reviews-evolution-chart'], complete)
+
+# Callback para o ranking de custo-benefício
+@server_side_callback(Output('top-ranking-table', 'data'), Input('filter-state', 'data'))
+@instrumented
+def update_top_ranking(state):
+    return cached_output('top-ranking', state, OUTPUT_BUILDERS['top-ranking'])
+
+# Callback para a tabela: ordena e pagina no servidor, enviando só a página visível
+@server_side_callback(
+    [
+        Output('doctors-table', 'data'),
+        Output('doctors-table', 'page_count'),
+        Output('doctors-table', 'page_current')
+    ],
+    [
+        Input('filter-state', 'data'),
+        Input('doctors-table', 'page_current'),
+        Input('doctors-table', 'page_size'),
+        Input('doctors-table', 'sort_by')
+    ]
+)
+@instrumented
+def update_table(state, page_current, page_size, sort_by):
+    # Mudança no conjunto de linhas volta para a primeira página
+    if ctx.triggered_id == 'filter-state':
+        page_current = 0
+    
+    entry = rows_from_state(state)
+    with metrics.stage('table_page'):
+        return build_table_page(entry, sort_by, page_current, page_size)
+
+# Callbacks do modo no navegador (mesmas saídas, calculadas a partir de 'client-data')
+if CLIENTSIDE_MODE:
+    app.clientside_callback(
+        ClientsideFunction('dashboard', 'update_filter_state'),
+        Output('filter-state', 'data'),
+        [
+            Input('specialization-filter', 'value'),
+            Input('city-filter', 'value'),
+            Input('telemedicine-filter', 'value'),
+            Input('price-filter', 'value'),
+            Input('search-input', 'value'),
+            Input('client-data', 'data')
+        ],
+        State('filter-state', 'data')
+    )
+    
+    app.clientside_callback(
+        ClientsideFunction('dashboard', 'update_kpis'),
+        [
+            Output('kpi-total-doctors', 'children'),
+            Output('kpi-avg-price', 'children'),
+            Output('kpi-telemedicine-pct', 'children'),
+            Output('kpi-avg-reviews', 'children')
+        ],
+        Input('filter-state', 'data'),
+        [
+            State('client-data', 'data'),
+            State('kpi-total-doctors', 'children'),
+            State('kpi-avg-price', 'children'),
+            State('kpi-telemedicine-pct', 'children'),
+            State('kpi-avg-reviews', 'children')
+        ]
+    )
+    
+    for chart_id, function_name in [
+        ('specialization-chart', 'update_specialization_chart'),
+        ('telemedicine-chart', 'update_telemedicine_chart'),
+        ('price-distribution-chart', 'update_price_chart'),
+        ('reviews-evolution-chart', 'update_reviews_chart'),
+    ]:
+        app.clientside_callback(
+            ClientsideFunction('dashboard', function_name),
+            Output(chart_id, 'figure'),
+            Input('filter-state', 'data'),
+            [State('client-data', 'data'), State('figure-templates', 'data')]
+        )
+    
+    app.clientside_callback(
+        ClientsideFunction('dashboard', 'update_top_ranking'),
+        Output('top-ranking-table', 'data'),
+        Input('filter-state', 'data'),
+        State('client-data', 'data')
+    )
+    
+    app.clientside_callback(
+        ClientsideFunction('dashboard', 'update_table'),
+        [
+            Output('doctors-table', 'data'),
+            Output('doctors-table', 'page_count'),
+            Output('doctors-table', 'page_current')
+        ],
+        [
+            Input('filter-state', 'data'),
+            Input('doctors-table', 'page_current'),
+            Input('doctors-table', 'page_size'),
+            Input('doctors-table', 'sort_by')
+        ],
+        State('client-data', 'data')
+    )
+    
+    # Nova versão dos dados: envia as colunas de novo (o estado dos filtros é recalculado a partir delas)
+    @app.callback(Output('client-data', 'data'), Input('data-version', 'data'), prevent_initial_call=True)
+    @instrumented
+    def refresh_client_data(version):
+        data = current_dataset()
+        if data.version != version:
+            raise PreventUpdate
+        return client_payload(data)
+
+# Callback para limpar todos os filtros (no navegador, com os limites de preço atuais do slider)
+app.clientside_callback(
+    ClientsideFunction('dashboard', 'clear_filters'),
     [
         Output('specialization-filter', 'value'),
         Output('city-filter', 'value'),
@@ -515,18 +1348,141 @@ def update_dashboard(specialization, city, telemedicine, price_range, search_ter
         Output('search-input', 'value')
     ],
     Input('clear-filters-button', 'n_clicks'),
+    [
+        State('price-filter', 'min'),
+        State('price-filter', 'max')
+    ],
     prevent_initial_call=True
 )
-def clear_filters(n_clicks):
-    if n_clicks > 0:
-        return (
-            'all',  # Especialização
-            'all',  # Cidade
-            'all',  # Telemedicina
-            [int(df['price'].min()), int(df['price'].max())],  # Preço
-            ''  # Busca
-        )
-    raise PreventUpdate
+
+# Endereços dos links de exportação com os filtros atuais (no navegador, em todos os modos)
+for export_format in available_formats():
+    app.clientside_callback(
+        ClientsideFunction('dashboard', 'export_href'),
+        Output(f'export-{export_format}-link', 'href'),
+        [
+            Input('specialization-filter', 'value'),
+            Input('city-filter', 'value'),
+            Input('telemedicine-filter', 'value'),
+            Input('price-filter', 'value'),
+            Input('search-input', 'value')
+        ],
+        State(f'export-{export_format}-link', 'href')
+    )
+
+# Opções das listas de especialização e cidade: buscadas no servidor a cada tecla e
+# restritas pelo valor escolhido na outra lista (e recalculadas numa nova versão dos dados)
+@app.callback(
+    Output('specialization-filter', 'options'),
+    [
+        Input('specialization-filter', 'search_value'),
+        Input('city-filter', 'value'),
+        Input('data-version', 'data')
+    ],
+    State('specialization-filter', 'value'),
+    prevent_initial_call=True
+)
+@instrumented
+def update_specialization_options(search_value, city, version, selected):
+    return specialization_options(current_dataset(), search_value, city, selected)
+
+@app.callback(
+    Output('city-filter', 'options'),
+    [
+        Input('city-filter', 'search_value'),
+        Input('specialization-filter', 'value'),
+        Input('data-version', 'data')
+    ],
+    State('city-filter', 'value'),
+    prevent_initial_call=True
+)
+@instrumented
+def update_city_options(search_value, specialization, version, selected):
+    return city_options(current_dataset(), search_value, specialization, selected)
+
+# Callback que leva uma nova versão dos dados às páginas abertas: atualiza os limites
+# de preço e, pela versão, as opções dos filtros e o estado dos filtros
+@app.callback(
+    [
+        Output('data-version', 'data'),
+        Output('price-filter', 'min'),
+        Output('price-filter', 'max'),
+        Output('price-filter', 'marks'),
+        Output('price-filter', 'value', allow_duplicate=True)
+    ],
+    Input('data-refresh-interval', 'n_intervals'),
+    [
+        State('data-version', 'data'),
+        State('price-filter', 'min'),
+        State('price-filter', 'max'),
+        State('price-filter', 'value')
+    ],
+    prevent_initial_call=True
+)
+@instrumented
+def refresh_data_version(n_intervals, version, price_min, price_max, price_range):
+    data = current_dataset()
+    if data.version == version:
+        raise PreventUpdate
+    
+    # Uma faixa que ia até os limites antigos passa a ir até os novos
+    low, high = price_range
+    price_range = [
+        data.price_min if low <= price_min else max(low, data.price_min),
+        data.price_max if high >= price_max else min(high, data.price_max),
+    ]
+    return (
+        data.version,
+        data.price_min,
+        data.price_max,
+        price_marks(data),
+        price_range,
+    )
+
+# Contadores do cache de resultados (somados entre todos os workers)
+@server.route('/cache/stats')
+def cache_stats():
+    return result_cache.stats()
+
+# Histogramas de tempos e tamanhos de todos os workers, no formato de texto do Prometheus
+@server.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# Exportação das linhas filtradas, com os mesmos filtros do painel. O arquivo é gerado e enviado
+# em blocos de EXPORT_CHUNK_ROWS linhas, sem montar o resultado inteiro em memória
+@server.route('/export')
+def export_rows():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in available_formats():
+        abort(400, f'Formato indisponível: {export_format}')
+    data = current_dataset()
+    args = request.args
+    try:
+        telemedicine = args.get('telemedicine', 'all')
+        telemedicine = telemedicine if telemedicine == 'all' else int(telemedicine)
+        price_range = (float(args.get('price_min', data.price_min)), float(args.get('price_max', data.price_max)))
+    except ValueError:
+        abort(400, 'Filtros inválidos')
+    filters = normalize_filters(args.get('specialization', 'all'), args.get('city', 'all'), telemedicine,
+                                price_range, args.get('search', ''))
+    entry = lookup_rows(data, filters)
+    content_type, extension = EXPORT_FORMATS[export_format]
+    return Response(
+        export_chunks(entry.frames(TABLE_COLUMNS, EXPORT_CHUNK_ROWS), export_format),
+        content_type=content_type,
+        headers={'Content-Disposition': f'attachment; filename=profissionais.{extension}'},
+    )
+
+# Recarga imediata dos dados neste worker (os demais percebem a mudança dos arquivos pelo observador)
+@server.route('/admin/reload', methods=['POST'])
+def admin_reload():
+    if not ADMIN_TOKEN:
+        abort(404)
+    if not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), ADMIN_TOKEN):
+        abort(403)
+    threading.Thread(target=reload_data, kwargs={'force': True}, name='data-reload', daemon=True).start()
+    return {'status': 'reloading', 'version': current_dataset().version}, 202
 
 # Execução do app
 if __name__ == '__main__':
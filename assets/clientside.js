@@ -0,0 +1,703 @@
+/*
+ * Modo de filtragem no navegador (conjuntos de dados pequenos e médios).
+ *
+ * O servidor envia uma única vez as colunas necessárias (client_data.py) e os
+ * modelos das figuras; os callbacks abaixo reproduzem no navegador o que os
+ * callbacks do servidor fazem em app.py: filtros e busca, KPIs, dados dos
+ * gráficos (incluindo as faixas do histograma e os quartis do boxplot, como
+ * em price_stats.py), o ranking de custo-benefício (pela ordem já calculada no
+ * servidor) e a página ordenada da tabela.
+ */
+(function () {
+    'use strict';
+
+    var TYPED_ARRAYS = {
+        int8: Int8Array, int16: Int16Array, int32: Int32Array,
+        float32: Float32Array, float64: Float64Array
+    };
+
+    var TELEMEDICINE_LABELS = {1: 'Disponível', 0: 'Não disponível'};
+    var MAX_OUTLIERS = 200;
+    var PRICE_NBINS = 20;
+
+    // Conjuntos de linhas filtradas mais recentes, por filtros e versão dos dados
+    var ROWS_CACHE_SIZE = 16;
+    var rowsCache = new Map();
+    var decoded = {version: null, data: null};
+
+    // Acentos removidos na busca: a lista de normalize_text vem com os dados (antes deles, as marcas do Unicode)
+    var combiningMarks = /\p{M}/gu;
+
+    function noUpdate() {
+        return window.dash_clientside.no_update;
+    }
+
+    function decodeArray(encoded) {
+        var binary = atob(encoded.data);
+        var bytes = new Uint8Array(binary.length);
+        for (var i = 0; i < binary.length; i++) {
+            bytes[i] = binary.charCodeAt(i);
+        }
+        return new TYPED_ARRAYS[encoded.dtype](bytes.buffer);
+    }
+
+    // Minúsculas e sem acentos, como normalize_text em search_index.py
+    function normalizeText(text) {
+        return foldCase(String(text).normalize('NFKD').replace(combiningMarks, ''));
+    }
+
+    // Como str.casefold do Python, que vai além de toLowerCase: ß e ẞ viram "ss", ς vira σ, ſ vira s...
+    // Cada caractere passa pelas maiúsculas e volta às minúsculas; as exceções são o ı (que o casefold
+    // mantém) e o cheroqui (que o casefold leva às maiúsculas)
+    function foldCase(text) {
+        return text.replace(/[^\u0000-\u007f]|[A-Z]/gu, function (ch) {
+            if (ch === '\u0131') {
+                return ch;
+            }
+            if (/[\u13a0-\u13fd\uab70-\uabbf]/.test(ch)) {
+                return ch.toUpperCase();
+            }
+            return ch.toUpperCase().toLowerCase().replace(/\u00df/g, 'ss');
+        });
+    }
+
+    function decodePayload(payload) {
+        if (decoded.version === payload.version && decoded.data) {
+            return decoded.data;
+        }
+        combiningMarks = new RegExp(payload.combining, 'gu');
+        var columns = {};
+        Object.keys(payload.columns).forEach(function (name) {
+            var column = payload.columns[name];
+            if (column.values) {
+                var lookup = new Map();
+                column.values.forEach(function (value, code) { lookup.set(value, code); });
+                columns[name] = {
+                    values: column.values,
+                    codes: decodeArray(column.codes),
+                    lookup: lookup,
+                    normalized: null
+                };
+            } else {
+                columns[name] = decodeArray(column);
+            }
+        });
+        var data = {
+            version: payload.version,
+            rows: payload.rows,
+            columns: columns,
+            specializationOrder: payload.specialization_order.map(function (value) {
+                return columns.specialization.lookup.has(value) ? columns.specialization.lookup.get(value) : -1;
+            }),
+            telemedicineOrder: payload.telemedicine_order,
+            ranking: {
+                order: decodeArray(payload.ranking.order),
+                reviewsWeight: payload.ranking.reviews_weight,
+                priceWeight: payload.ranking.price_weight,
+                priceUnit: payload.ranking.price_unit,
+                size: payload.ranking.size
+            }
+        };
+        rowsCache.clear();
+        decoded = {version: payload.version, data: data};
+        return data;
+    }
+
+    // Mesma normalização de normalize_filters em app.py
+    function normalizeFilters(specialization, city, telemedicine, priceRange, searchTerm) {
+        return [
+            specialization,
+            city,
+            telemedicine,
+            [Number(priceRange[0]), Number(priceRange[1])],
+            normalizeText(searchTerm || '')
+        ];
+    }
+
+    function matchingCodes(column, term) {
+        if (!column.normalized) {
+            column.normalized = column.values.map(normalizeText);
+        }
+        var matched = new Uint8Array(column.values.length);
+        column.normalized.forEach(function (value, code) {
+            matched[code] = value.indexOf(term) >= 0 ? 1 : 0;
+        });
+        return matched;
+    }
+
+    function computeRows(data, filters) {
+        var columns = data.columns;
+        var specialization = filters[0], city = filters[1], telemedicine = filters[2];
+        var low = filters[3][0], high = filters[3][1], term = filters[4];
+
+        var specCode = specialization === 'all' ? null : columns.specialization.lookup.get(specialization);
+        var cityCode = city === 'all' ? null : columns.city1.lookup.get(city);
+        if (specCode === undefined || cityCode === undefined) {
+            return new Int32Array(0);
+        }
+        var specCodes = columns.specialization.codes;
+        var cityCodes = columns.city1.codes;
+        var tele = columns.telemedicine;
+        var price = columns.price;
+
+        var searched = null;
+        if (term) {
+            searched = ['name', 'city1', 'specialization'].map(function (name) {
+                return {codes: columns[name].codes, matched: matchingCodes(columns[name], term)};
+            });
+        }
+
+        var rows = new Int32Array(data.rows);
+        var count = 0;
+        for (var i = 0; i < data.rows; i++) {
+            if (specCode !== null && specCodes[i] !== specCode) continue;
+            if (cityCode !== null && cityCodes[i] !== cityCode) continue;
+            if (telemedicine !== 'all' && tele[i] !== telemedicine) continue;
+            // Comparações com NaN são falsas: linhas sem preço ficam de fora, como no índice de preços
+            if (!(price[i] >= low && price[i] <= high)) continue;
+            if (searched) {
+                var found = false;
+                for (var s = 0; s < searched.length && !found; s++) {
+                    var code = searched[s].codes[i];
+                    found = code >= 0 && searched[s].matched[code] === 1;
+                }
+                if (!found) continue;
+            }
+            rows[count++] = i;
+        }
+        return rows.slice(0, count);
+    }
+
+    function lookupRows(data, filters) {
+        var key = data.version + '|' + JSON.stringify(filters);
+        var rows = rowsCache.get(key);
+        if (rows === undefined) {
+            rows = computeRows(data, filters);
+            if (rowsCache.size >= ROWS_CACHE_SIZE) {
+                rowsCache.delete(rowsCache.keys().next().value);
+            }
+        } else {
+            rowsCache.delete(key);
+        }
+        rowsCache.set(key, rows);
+        return rows;
+    }
+
+    // Chave curta do conjunto de linhas (FNV-1a), como rows_key em row_store.py. Só identifica o estado:
+    // se o conjunto mudou ou não é decidido por sameRows, porque chaves de 32 bits podem colidir
+    function rowsKey(version, rows) {
+        var hash = 0x811c9dc5;
+        for (var i = 0; i < rows.length; i++) {
+            hash ^= rows[i];
+            hash = Math.imul(hash, 0x01000193);
+        }
+        return version + ':' + rows.length + ':' + (hash >>> 0).toString(16);
+    }
+
+    function sameRows(a, b) {
+        if (a.length !== b.length) {
+            return false;
+        }
+        for (var i = 0; i < a.length; i++) {
+            if (a[i] !== b[i]) {
+                return false;
+            }
+        }
+        return true;
+    }
+
+    // Formatação numérica com arredondamento "metade para o par", como o format do Python
+    function toFixed(value, digits) {
+        if (Number.isNaN(value)) {
+            return 'nan';
+        }
+        var scaled = value * Math.pow(10, digits);
+        if (Math.abs(scaled % 1) === 0.5) {
+            var even = Math.floor(scaled) % 2 === 0 ? Math.floor(scaled) : Math.ceil(scaled);
+            return (even / Math.pow(10, digits)).toFixed(digits);
+        }
+        return value.toFixed(digits);
+    }
+
+    function formatG(value) {
+        return String(Number(value.toPrecision(6)));
+    }
+
+    function aggregate(data, rows) {
+        var columns = data.columns;
+        var price = columns.price, reviews = columns.reviews, tele = columns.telemedicine, year = columns.year;
+        var specCodes = columns.specialization.codes;
+        var result = {
+            total: rows.length, priceSum: 0, priceCount: 0, reviewsSum: 0, reviewsCount: 0, teleSum: 0,
+            specCounts: new Float64Array(columns.specialization.values.length),
+            teleCounts: new Map(), years: new Map()
+        };
+        for (var r = 0; r < rows.length; r++) {
+            var i = rows[r];
+            var hasReviews = !Number.isNaN(reviews[i]);
+            if (!Number.isNaN(price[i])) {
+                result.priceSum += price[i];
+                result.priceCount++;
+            }
+            if (hasReviews) {
+                result.reviewsSum += reviews[i];
+                result.reviewsCount++;
+            }
+            if (!Number.isNaN(tele[i])) {
+                result.teleSum += tele[i];
+                result.teleCounts.set(tele[i], (result.teleCounts.get(tele[i]) || 0) + 1);
+            }
+            if (specCodes[i] >= 0) {
+                result.specCounts[specCodes[i]]++;
+            }
+            if (!Number.isNaN(year[i])) {
+                var bucket = result.years.get(year[i]);
+                if (!bucket) {
+                    bucket = {sum: 0, count: 0};
+                    result.years.set(year[i], bucket);
+                }
+                if (hasReviews) {
+                    bucket.sum += reviews[i];
+                    bucket.count++;
+                }
+            }
+        }
+        return result;
+    }
+
+    function buildKpis(aggregates) {
+        if (aggregates.total === 0) {
+            return ['0', 'R$ 0', '0%', '0'];
+        }
+        var avgPrice = aggregates.priceCount ? aggregates.priceSum / aggregates.priceCount : NaN;
+        var avgReviews = aggregates.reviewsCount ? aggregates.reviewsSum / aggregates.reviewsCount : NaN;
+        return [
+            String(aggregates.total).replace(/\B(?=(\d{3})+(?!\d))/g, '.'),
+            'R$ ' + toFixed(avgPrice, 2),
+            toFixed(aggregates.teleSum / aggregates.total * 100, 1) + '%',
+            toFixed(avgReviews, 1)
+        ];
+    }
+
+    // Ordenação estável decrescente por contagem, desempatando pela ordem das categorias no cubo
+    function sortedCounts(entries) {
+        return entries
+            .filter(function (entry) { return entry.count > 0; })
+            .map(function (entry, position) { entry.position = position; return entry; })
+            .sort(function (a, b) { return b.count - a.count || a.position - b.position; });
+    }
+
+    function fill(template, traces) {
+        return {
+            data: template.data.map(function (base, i) {
+                var trace = Object.assign({}, base);
+                Object.keys(traces[i] || {}).forEach(function (key) {
+                    var value = traces[i][key];
+                    if (value && typeof value === 'object' && !Array.isArray(value)) {
+                        value = Object.assign({}, base[key] || {}, value);
+                    }
+                    trace[key] = value;
+                });
+                return trace;
+            }),
+            layout: template.layout
+        };
+    }
+
+    function buildSpecializationFigure(data, aggregates, templates) {
+        if (aggregates.total === 0) {
+            return templates.empty;
+        }
+        var values = data.columns.specialization.values;
+        var top = sortedCounts(data.specializationOrder.map(function (code) {
+            return {code: code, count: code >= 0 ? aggregates.specCounts[code] : 0};
+        })).slice(0, 10);
+        var counts = top.map(function (entry) { return entry.count; });
+        return fill(templates.specialization, [{
+            x: counts,
+            y: top.map(function (entry) { return values[entry.code]; }),
+            text: counts,
+            marker: {color: counts}
+        }]);
+    }
+
+    function buildTelemedicineFigure(data, aggregates, templates) {
+        if (aggregates.total === 0) {
+            return templates.empty;
+        }
+        var slices = sortedCounts(data.telemedicineOrder.map(function (value) {
+            return {value: value, count: aggregates.teleCounts.get(value) || 0};
+        })).filter(function (entry) { return entry.value in TELEMEDICINE_LABELS; });
+        var labels = slices.map(function (entry) { return TELEMEDICINE_LABELS[entry.value]; });
+        return fill(templates.telemedicine, [{
+            labels: labels,
+            values: slices.map(function (entry) { return entry.count; }),
+            customdata: labels.map(function (label) { return [label]; }),
+            marker: {colors: labels.map(function (label) { return templates.telemedicine_colors[label]; })}
+        }]);
+    }
+
+    // Primeira posição de `sorted` com valor >= value (side='left') ou > value (side='right')
+    function searchSorted(sorted, value, right) {
+        var lo = 0, hi = sorted.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >>> 1;
+            if (right ? sorted[mid] <= value : sorted[mid] < value) {
+                lo = mid + 1;
+            } else {
+                hi = mid;
+            }
+        }
+        return lo;
+    }
+
+    function allIntegral(values) {
+        for (var i = 0; i < values.length; i++) {
+            if (values[i] % 1 !== 0) return false;
+        }
+        return true;
+    }
+
+    // Mesmo critério do plotly.js (autoShiftNumericBins), como _shift_start em price_stats.py
+    function shiftStart(start, size, values, dataMin, dataMax) {
+        function nearEdge(v) {
+            return (1 + (v - start) * 100 / size) % 100 < 2;
+        }
+        if (allIntegral(values)) {
+            if (size < 1) {
+                return dataMin - 0.5 * size;
+            }
+            start -= 0.5;
+            if (start + size < dataMin) {
+                start += size;
+            }
+            return start;
+        }
+        var midCount = 0, edgeCount = 0;
+        for (var i = 0; i < values.length; i++) {
+            if (nearEdge(values[i] + size / 2)) midCount++;
+            if (nearEdge(values[i])) edgeCount++;
+        }
+        if (midCount < values.length * 0.1 &&
+                (edgeCount > values.length * 0.3 || nearEdge(dataMin) || nearEdge(dataMax))) {
+            var shift = size / 2;
+            start += start + shift < dataMin ? shift : -shift;
+        }
+        return start;
+    }
+
+    function histogramBins(sorted, nbins) {
+        var dataMin = sorted[0], dataMax = sorted[sorted.length - 1];
+        var span = dataMax - dataMin;
+        var size, start;
+        if (span === 0) {
+            size = 1;
+            start = dataMin - 0.5;
+        } else {
+            var rough = span / nbins;
+            var base = Math.pow(10, Math.floor(Math.log10(rough)));
+            var step = [2, 5].find(function (s) { return s > rough / base; });
+            size = base * (step === undefined ? 10 : step);
+            start = Math.ceil((dataMin - span * 1e-4) / size) * size - size;
+            start = shiftStart(start, size, sorted, dataMin, dataMax);
+        }
+        var count = 1 + Math.floor((dataMax - start) / size);
+        var edges = [], counts = [];
+        for (var i = 0; i <= count; i++) {
+            edges.push(start + size * i);
+        }
+        for (var j = 0; j < count; j++) {
+            counts.push(searchSorted(sorted, edges[j + 1], false) - searchSorted(sorted, edges[j], false));
+        }
+        return {edges: edges, counts: counts};
+    }
+
+    // Percentil pelo método 'hazen' do NumPy (igual ao 'linear' do boxplot do plotly.js)
+    function hazen(sorted, q) {
+        var n = sorted.length;
+        var virtual = n * q + 0.5 - 1;
+        var previous, next;
+        if (virtual >= n - 1) {
+            previous = next = n - 1;
+        } else if (virtual < 0) {
+            previous = next = 0;
+        } else {
+            previous = Math.floor(virtual);
+            next = previous + 1;
+        }
+        var gamma = virtual - Math.floor(virtual);
+        var a = sorted[previous], b = sorted[next], diff = b - a;
+        return gamma >= 0.5 ? b - diff * (1 - gamma) : a + diff * gamma;
+    }
+
+    function roundHalfEven(value) {
+        var floor = Math.floor(value);
+        var fraction = value - floor;
+        if (fraction !== 0.5) return Math.round(value);
+        return floor % 2 === 0 ? floor : floor + 1;
+    }
+
+    function boxStats(sorted) {
+        var n = sorted.length;
+        var q1 = hazen(sorted, 0.25), median = hazen(sorted, 0.5), q3 = hazen(sorted, 0.75);
+        var iqr = q3 - q1;
+        var lowIndex = Math.min(searchSorted(sorted, q1 - 1.5 * iqr, false), n - 1);
+        var highIndex = Math.max(searchSorted(sorted, q3 + 1.5 * iqr, true) - 1, 0);
+        var lowerfence = Math.min(q1, sorted[lowIndex]);
+        var upperfence = Math.max(q3, sorted[highIndex]);
+
+        var outliers = [];
+        var below = searchSorted(sorted, lowerfence, false);
+        var above = searchSorted(sorted, upperfence, true);
+        for (var i = 0; i < n; i++) {
+            if (i === below) i = above;
+            if (i >= n) break;
+            if (!outliers.length || outliers[outliers.length - 1] !== sorted[i]) outliers.push(sorted[i]);
+        }
+        if (outliers.length > MAX_OUTLIERS) {
+            // Mantém os extremos e amostra o restante de forma uniforme (np.linspace + round)
+            var stepSize = (outliers.length - 1) / (MAX_OUTLIERS - 1);
+            var sampled = [];
+            for (var k = 0; k < MAX_OUTLIERS; k++) {
+                var position = k === MAX_OUTLIERS - 1 ? outliers.length - 1 : k * stepSize;
+                sampled.push(outliers[roundHalfEven(position)]);
+            }
+            outliers = sampled;
+        }
+        return {q1: q1, median: median, q3: q3, lowerfence: lowerfence, upperfence: upperfence, outliers: outliers};
+    }
+
+    function buildPriceFigure(data, rows, templates) {
+        if (rows.length === 0) {
+            return templates.empty;
+        }
+        var price = data.columns.price;
+        var values = [];
+        for (var r = 0; r < rows.length; r++) {
+            if (!Number.isNaN(price[rows[r]])) values.push(price[rows[r]]);
+        }
+        var prices = Float64Array.from(values).sort();
+        var bins = histogramBins(prices, PRICE_NBINS);
+        var box = boxStats(prices);
+        var edges = bins.edges;
+        var integral = allIntegral(prices);
+        var centers = [], labels = [];
+        for (var i = 0; i < edges.length - 1; i++) {
+            centers.push((edges[i] + edges[i + 1]) / 2);
+            labels.push(integral
+                ? (Math.ceil(edges[i]) + 0).toFixed(0) + ' - ' + (Math.ceil(edges[i + 1]) - 1).toFixed(0)
+                : formatG(edges[i]) + ' - ' + formatG(edges[i + 1]));
+        }
+        return fill(templates.price, [
+            {x: centers, y: bins.counts, width: (edges[1] - edges[0]) * 0.9, customdata: labels},
+            {
+                q1: [box.q1], median: [box.median], q3: [box.q3],
+                lowerfence: [box.lowerfence], upperfence: [box.upperfence], x: [box.outliers]
+            }
+        ]);
+    }
+
+    function buildReviewsFigure(aggregates, templates) {
+        if (aggregates.total === 0) {
+            return templates.empty;
+        }
+        var years = Array.from(aggregates.years.keys()).sort(function (a, b) { return a - b; });
+        return fill(templates.reviews, [{
+            x: years.map(function (year) { return year + '-01-01T00:00:00'; }),
+            y: years.map(function (year) {
+                var bucket = aggregates.years.get(year);
+                return bucket.count ? bucket.sum / bucket.count : null;
+            })
+        }]);
+    }
+
+    var TABLE_COLUMNS = ['name', 'city1', 'specialization', 'reviews', 'price', 'telemedicine'];
+    var SORT_ALIASES = {telemedicine_text: 'telemedicine'};
+
+    // Valor de ordenação de uma coluna (código do dicionário ou número); null para nulos
+    function sortValue(column, i) {
+        if (column.codes) {
+            return column.codes[i] >= 0 ? column.codes[i] : null;
+        }
+        return Number.isNaN(column[i]) ? null : column[i];
+    }
+
+    function cellValue(column, i) {
+        if (column.codes) {
+            return column.codes[i] >= 0 ? column.values[column.codes[i]] : null;
+        }
+        return Number.isNaN(column[i]) ? null : column[i];
+    }
+
+    function sortRows(data, rows, sortBy) {
+        var keys = (sortBy || []).map(function (spec) {
+            var name = SORT_ALIASES[spec.column_id] || spec.column_id;
+            return TABLE_COLUMNS.indexOf(name) >= 0
+                ? {column: data.columns[name], descending: spec.direction === 'desc'}
+                : null;
+        }).filter(Boolean);
+        if (!keys.length) {
+            return rows;
+        }
+        // Estável: empates mantêm a ordem das linhas; nulos sempre no final
+        return Array.from(rows).sort(function (a, b) {
+            for (var k = 0; k < keys.length; k++) {
+                var x = sortValue(keys[k].column, a), y = sortValue(keys[k].column, b);
+                if (x === y) continue;
+                if (x === null) return 1;
+                if (y === null) return -1;
+                return (x < y ? -1 : 1) * (keys[k].descending ? -1 : 1);
+            }
+            return a - b;
+        });
+    }
+
+    function buildTablePage(data, rows, sortBy, pageCurrent, pageSize) {
+        var pageCount = Math.max(1, Math.ceil(rows.length / pageSize));
+        pageCurrent = Math.min(Math.max(pageCurrent || 0, 0), pageCount - 1);
+        var ordered = sortRows(data, rows, sortBy);
+        var start = pageCurrent * pageSize;
+        var records = [];
+        for (var r = start; r < Math.min(start + pageSize, ordered.length); r++) {
+            var i = ordered[r];
+            var record = {};
+            TABLE_COLUMNS.forEach(function (name) { record[name] = cellValue(data.columns[name], i); });
+            record.telemedicine_text = record.telemedicine === 1 ? 'Sim' : record.telemedicine === 0 ? 'Não' : null;
+            records.push(record);
+        }
+        return [records, pageCount, pageCurrent];
+    }
+
+    var RANKING_COLUMNS = ['name', 'specialization', 'city1', 'reviews', 'price'];
+
+    // Primeiras linhas da ordem do ranking que estão entre as filtradas, como em ranking.py
+    function buildTopRanking(data, rows) {
+        var ranking = data.ranking;
+        var selected = new Uint8Array(data.rows);
+        for (var r = 0; r < rows.length; r++) {
+            selected[rows[r]] = 1;
+        }
+        var records = [];
+        for (var p = 0; p < ranking.order.length && records.length < ranking.size; p++) {
+            var i = ranking.order[p];
+            if (!selected[i]) continue;
+            var record = {position: records.length + 1};
+            RANKING_COLUMNS.forEach(function (name) { record[name] = cellValue(data.columns[name], i); });
+            var score = Math.pow(1 + record.reviews, ranking.reviewsWeight)
+                / Math.pow(record.price / ranking.priceUnit, ranking.priceWeight);
+            record.score = toFixed(score, 2);
+            records.push(record);
+        }
+        return records;
+    }
+
+    // Linhas e agregados do estado dos filtros (recalculados se saíram do cache)
+    function stateRows(state, payload) {
+        var data = decodePayload(payload);
+        return {data: data, rows: lookupRows(data, state.filters)};
+    }
+
+    function triggeredBy(id) {
+        var context = window.dash_clientside.callback_context;
+        return (context.triggered || []).some(function (t) { return t.prop_id.split('.')[0] === id; });
+    }
+
+    var dashboard = {
+        update_filter_state: function (specialization, city, telemedicine, priceRange, searchTerm, payload, previous) {
+            if (!payload) {
+                return noUpdate();
+            }
+            var data = decodePayload(payload);
+            var filters = normalizeFilters(specialization, city, telemedicine, priceRange, searchTerm);
+            var rows = lookupRows(data, filters);
+            // Mesmas linhas do estado anterior (comparadas uma a uma; o anterior em geral ainda está no cache)
+            if (previous && previous.version === data.version && previous.total === rows.length &&
+                    sameRows(lookupRows(data, previous.filters), rows)) {
+                return noUpdate();
+            }
+            return {
+                filters: filters,
+                version: data.version,
+                key: rowsKey(data.version, rows),
+                total: rows.length
+            };
+        },
+
+        update_kpis: function (state, payload) {
+            var current = Array.prototype.slice.call(arguments, 2);
+            var resolved = stateRows(state, payload);
+            var kpis = buildKpis(aggregate(resolved.data, resolved.rows));
+            return kpis.map(function (value, i) { return value === current[i] ? noUpdate() : value; });
+        },
+
+        update_specialization_chart: function (state, payload, templates) {
+            var resolved = stateRows(state, payload);
+            return buildSpecializationFigure(resolved.data, aggregate(resolved.data, resolved.rows), templates);
+        },
+
+        update_telemedicine_chart: function (state, payload, templates) {
+            var resolved = stateRows(state, payload);
+            return buildTelemedicineFigure(resolved.data, aggregate(resolved.data, resolved.rows), templates);
+        },
+
+        update_price_chart: function (state, payload, templates) {
+            var resolved = stateRows(state, payload);
+            return buildPriceFigure(resolved.data, resolved.rows, templates);
+        },
+
+        update_reviews_chart: function (state, payload, templates) {
+            var resolved = stateRows(state, payload);
+            return buildReviewsFigure(aggregate(resolved.data, resolved.rows), templates);
+        },
+
+        update_top_ranking: function (state, payload) {
+            var resolved = stateRows(state, payload);
+            return buildTopRanking(resolved.data, resolved.rows);
+        },
+
+        update_table: function (state, pageCurrent, pageSize, sortBy, payload) {
+            // Mudança no conjunto de linhas volta para a primeira página
+            if (triggeredBy('filter-state')) {
+                pageCurrent = 0;
+            }
+            var resolved = stateRows(state, payload);
+            return buildTablePage(resolved.data, resolved.rows, sortBy, pageCurrent, pageSize);
+        },
+
+        // Endereço de /export com os filtros atuais (o formato vem do próprio link)
+        export_href: function (specialization, city, telemedicine, priceRange, search, href) {
+            var parts = href.split('?');
+            var current = new URLSearchParams(parts[1] || '');
+            var params = new URLSearchParams({
+                format: current.get('format') || 'csv',
+                specialization: specialization,
+                city: city,
+                telemedicine: telemedicine,
+                price_min: priceRange[0],
+                price_max: priceRange[1],
+                search: search || ''
+            });
+            return parts[0] + '?' + params.toString();
+        },
+
+        clear_filters: function (nClicks, priceMin, priceMax) {
+            if (!nClicks) {
+                throw window.dash_clientside.PreventUpdate;
+            }
+            return ['all', 'all', 'all', [priceMin, priceMax], ''];
+        }
+    };
+
+    if (typeof window !== 'undefined') {
+        window.dash_clientside = Object.assign({}, window.dash_clientside, {dashboard: dashboard});
+    }
+    if (typeof module !== 'undefined') {
+        module.exports = {
+            dashboard: dashboard, decodePayload: decodePayload, normalizeFilters: normalizeFilters,
+            lookupRows: lookupRows, aggregate: aggregate, buildKpis: buildKpis,
+            buildSpecializationFigure: buildSpecializationFigure, buildTelemedicineFigure: buildTelemedicineFigure,
+            buildPriceFigure: buildPriceFigure, buildReviewsFigure: buildReviewsFigure, buildTablePage: buildTablePage,
+            buildTopRanking: buildTopRanking
+        };
+    }
+})();
@@ -0,0 +1,21 @@
+"""Gerenciador dos callbacks em segundo plano: cada job roda num processo filho do worker
+e o resultado fica num diskcache local, lido por qualquer worker da máquina.
+
+Exige `dash[diskcache]` (diskcache, multiprocess e psutil); sem ele, `create_manager`
+devolve None e o app calcula tudo nos próprios workers.
+"""
+from dash import DiskcacheManager
+
+try:
+    import diskcache
+    import multiprocess  # noqa: F401 (usado pelo DiskcacheManager para criar os processos)
+    import psutil  # noqa: F401 (usado pelo DiskcacheManager para encerrar os jobs)
+except ImportError:
+    diskcache = None
+
+
+def create_manager(directory):
+    """Gerenciador com os jobs em `directory`, ou None se `dash[diskcache]` não estiver instalado."""
+    if diskcache is None:
+        return None
+    return DiskcacheManager(diskcache.Cache(directory))
@@ -0,0 +1,285 @@
+"""Teste de carga do painel com sessões simultâneas, pelo HTTP do Gunicorn.
+
+Sobe o app com workers síncronos sobre um CSV sintético (uma vez por modo) e
+simula sessões que digitam na busca como o navegador: cada tecla dispara o
+callback dos filtros e, quando o estado da última tecla chega, os KPIs, os
+gráficos e a tabela são pedidos em paralelo. Para cada sessão mede o tempo da
+última tecla até a tela completa; no fim, as sessões concluídas por segundo.
+
+Modos:
+- `foreground`: callback dos filtros comum; o pedido de cada tecla ocupa um
+  worker até terminar, mesmo que o resultado já não interesse;
+- `background`: callback em segundo plano; o pedido só cria o job, o pedido
+  seguinte cancela o anterior (como o navegador faz) e o resultado é
+  consultado a cada intervalo.
+
+`--debounce-ms` imita a espera do campo de busca: só é enviada a tecla seguida
+de uma pausa de pelo menos esse tempo (a última sempre é enviada).
+
+Uso:
+    python benchmarks/load_test.py --size 1M --workers 2 --sessions 8
+    python benchmarks/load_test.py --size 1M --modes foreground,background --debounce-ms 300 --output carga.json
+"""
+import argparse
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from run_benchmarks import REPO_DIR, ensure_dataset, parse_size, percentiles
+
+MODES = ('foreground', 'background')
+
+# Palavras digitadas pelas sessões, letra por letra
+SEARCH_WORDS = ('silva', 'cardiologia', 'sao paulo', 'pediatria', 'ana souza', 'curitiba', 'dermato', 'oliveira')
+
+FILTER_STATE = 'filter-state.data'
+STATE_OUTPUTS = (
+    '..kpi-total-doctors.children...kpi-avg-price.children...kpi-telemedicine-pct.children...kpi-avg-reviews.children..',
+    '..specialization-chart.figure...specialization-chart-complete.data..',
+    '..telemedicine-chart.figure...telemedicine-chart-complete.data..',
+    '..price-distribution-chart.figure...price-distribution-chart-complete.data..',
+    '..reviews-evolution-chart.figure...reviews-evolution-chart-complete.data..',
+    'top-ranking-table.data',
+    '..doctors-table.data...doctors-table.page_count...doctors-table.page_current..',
+)
+
+
+class Client:
+    """Pedidos de callback no formato do dash-renderer, a partir de `/_dash-dependencies` e do layout."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.dependencies = {spec['output']: spec for spec in self.get('/_dash-dependencies')}
+        self.values = {}
+        self._collect(self.get('/_dash-layout'))
+
+    def _collect(self, node):
+        if isinstance(node, dict):
+            props = node.get('props', {})
+            if 'id' in props:
+                for name, value in props.items():
+                    self.values[(props['id'], name)] = value
+            for value in props.values():
+                self._collect(value)
+        elif isinstance(node, list):
+            for value in node:
+                self._collect(value)
+
+    def get(self, path):
+        with urllib.request.urlopen(self.base_url + path, timeout=600) as response:
+            return json.load(response)
+
+    def body(self, output, values, changed):
+        spec = self.dependencies[output]
+
+        def props(items):
+            return [dict(item, value=values.get((item['id'], item['property']))) for item in items]
+
+        outputs = [
+            {'id': part.split('.')[0], 'property': part.split('.')[1].split('@')[0]}
+            for part in output.strip('.').split('...')
+        ]
+        return {
+            'output': output,
+            'outputs': outputs if output.startswith('..') else outputs[0],
+            'inputs': props(spec['inputs']),
+            'state': props(spec['state']),
+            'changedPropIds': [f'{prop_id[0]}.{prop_id[1]}' for prop_id in changed],
+        }
+
+    def dispatch(self, body, query=''):
+        request = urllib.request.Request(
+            f'{self.base_url}/_dash-update-component{query}', data=json.dumps(body).encode('utf-8'),
+            headers={'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(request, timeout=600) as response:
+            # 204: o callback não alterou nada
+            return json.load(response) if response.status != 204 else None
+
+
+def poll_job(client, body, job, state):
+    """Consulta um job em segundo plano; devolve (job, estado), com job None quando ele terminou."""
+    result = client.dispatch(body, f'?cacheKey={job["cacheKey"]}&job={job["job"]}')
+    if result is None:
+        return None, state
+    if 'response' in result:
+        return None, (result['response']['filter-state']['data'],)
+    return job, state
+
+
+def run_session(client, mode, rng, rounds, typing_ms, debounce_ms, poll_ms):
+    """Uma sessão: digita `rounds` palavras; devolve os tempos (ms) da última tecla até a tela completa."""
+    values = dict(client.values)
+    latencies = []
+    with ThreadPoolExecutor(max_workers=len(STATE_OUTPUTS) + 8) as pool:
+        for _ in range(rounds):
+            word = rng.choice(SEARCH_WORDS)
+            terms = [word[:end] for end in range(1, len(word) + 1)]
+            # Com debounce, as teclas seguidas de pausa curta não chegam ao servidor
+            if debounce_ms > typing_ms:
+                terms = terms[-1:]
+            state = (values.get(('filter-state', 'data')),)
+            pending = []
+            job = None
+            started = time.perf_counter()
+            for i, term in enumerate(terms):
+                # Teclas em horários fixos: um pedido demorado não atrasa a digitação
+                next_key = started + (i + 1) * typing_ms / 1000
+                last_key = time.perf_counter()
+                values[('search-input', 'value')] = term
+                body = client.body(FILTER_STATE, values, [('search-input', 'value')])
+                if mode == 'foreground':
+                    pending.append(pool.submit(client.dispatch, body))
+                    time.sleep(max(next_key - time.perf_counter(), 0))
+                    continue
+                # O pedido novo leva o job anterior, que o servidor cancela
+                query = f'?oldJob={job["job"]}' if job else ''
+                job = client.dispatch(body, query)
+                while job and time.perf_counter() < next_key:
+                    time.sleep(min(poll_ms / 1000, max(next_key - time.perf_counter(), 0)))
+                    job, state = poll_job(client, body, job, state)
+
+            if mode == 'foreground':
+                # Só vale o resultado da última tecla; os anteriores seguem ocupando workers
+                result = pending[-1].result()
+                if result is not None:
+                    state = (result['response']['filter-state']['data'],)
+            else:
+                while job:
+                    time.sleep(poll_ms / 1000)
+                    job, state = poll_job(client, body, job, state)
+            values[('filter-state', 'data')] = state[0]
+
+            changed = [('filter-state', 'data')]
+            futures = [pool.submit(client.dispatch, client.body(output, values, changed)) for output in STATE_OUTPUTS]
+            for future in futures:
+                # Como no navegador: as saídas (p.ex. se o gráfico mostra uma figura completa) viram estado
+                result = future.result()
+                for component_id, props in (result or {}).get('response', {}).items():
+                    values.update({(component_id, name): value for name, value in props.items()})
+            latencies.append((time.perf_counter() - last_key) * 1000)
+            for future in pending:
+                future.result()
+    return latencies
+
+
+def start_server(args, csv_path, mode, port, cache_dir):
+    env = dict(
+        os.environ,
+        DASHBOARD_DATA_FILE=csv_path,
+        DASHBOARD_COLUMNS_DIR=args.columns_dir or os.path.join(cache_dir, 'no-columns'),
+        DASHBOARD_CACHE_DIR=cache_dir,
+        DASHBOARD_METRICS_DIR=os.path.join(cache_dir, 'metrics'),
+        DASHBOARD_RELOAD_INTERVAL='0',
+        DASHBOARD_CLIENTSIDE_MAX_ROWS='0',
+        DASHBOARD_BACKGROUND_MIN_ROWS='1' if mode == 'background' else '0',
+        DASHBOARD_BACKGROUND_POLL_MS=str(args.poll_ms),
+    )
+    command = [sys.executable, '-m', 'gunicorn', '--preload', '--timeout', '600', '-w', str(args.workers),
+               '-b', f'127.0.0.1:{port}', 'app:server']
+    process = subprocess.Popen(command, cwd=args.repo, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    base_url = f'http://127.0.0.1:{port}'
+    for _ in range(args.startup_timeout):
+        if process.poll() is not None:
+            raise RuntimeError(f'o gunicorn terminou na inicialização (código {process.returncode})')
+        try:
+            urllib.request.urlopen(base_url + '/_dash-dependencies', timeout=5).close()
+            return process, base_url
+        except OSError:
+            time.sleep(1)
+    stop_server(process)
+    raise RuntimeError('o gunicorn não respondeu a tempo')
+
+
+def stop_server(process):
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def run_mode(args, csv_path, mode):
+    cache_dir = tempfile.mkdtemp(prefix='dashboard-load-')
+    process, base_url = start_server(args, csv_path, mode, args.port, cache_dir)
+    try:
+        client = Client(base_url)
+        latencies = []
+        lock = threading.Lock()
+
+        def session(seed):
+            result = run_session(client, mode, random.Random(seed), args.rounds, args.typing_ms, args.debounce_ms,
+                                 args.poll_ms)
+            with lock:
+                latencies.extend(result)
+
+        start = time.perf_counter()
+        threads = [threading.Thread(target=session, args=(args.seed + i,)) for i in range(args.sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+    finally:
+        stop_server(process)
+    return {
+        'sessions': args.sessions,
+        'rounds': args.rounds,
+        'elapsed_s': elapsed,
+        'rounds_per_second': args.sessions * args.rounds / elapsed,
+        'latency_ms': percentiles(np.array(latencies)),
+    }
+
+
+def print_report(results):
+    print(f'{"modo":>11} {"rodadas/s":>10} {"p50 (ms)":>9} {"p95 (ms)":>9} {"máx (ms)":>9}')
+    for mode, result in results.items():
+        latency = result['latency_ms']
+        print(f'{mode:>11} {result["rounds_per_second"]:>10.2f} {latency["p50"]:>9.0f} {latency["p95"]:>9.0f} '
+              f'{latency["max"]:>9.0f}')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='1M', help='número de linhas dos dados sintéticos (ex.: 500k, 1M)')
+    parser.add_argument('--modes', default=','.join(MODES), help='modos medidos (foreground, background)')
+    parser.add_argument('--workers', type=int, default=2, help='workers síncronos do gunicorn')
+    parser.add_argument('--sessions', type=int, default=8, help='sessões simultâneas')
+    parser.add_argument('--rounds', type=int, default=3, help='palavras digitadas por sessão')
+    parser.add_argument('--typing-ms', type=float, default=80, help='intervalo entre teclas')
+    parser.add_argument('--debounce-ms', type=float, default=0, help='espera do campo de busca (0 envia cada tecla)')
+    parser.add_argument('--poll-ms', type=int, default=200, help='intervalo das consultas dos jobs em segundo plano')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--columns-dir', help='diretório colunar dos dados (acelera a inicialização)')
+    parser.add_argument('--repo', default=REPO_DIR, help='diretório do código do app')
+    parser.add_argument('--startup-timeout', type=int, default=300, help='segundos de espera pela inicialização')
+    parser.add_argument('--seed', type=int, default=0, help='semente dos dados e das sessões')
+    parser.add_argument('--output', help='grava o relatório neste arquivo JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    csv_path = ensure_dataset(parse_size(args.size), args.seed)
+    results = {mode: run_mode(args, csv_path, mode) for mode in args.modes.split(',')}
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'size': args.size, 'workers': args.workers, 'debounce_ms': args.debounce_ms,
+                       'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
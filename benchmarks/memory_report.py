@@ -0,0 +1,146 @@
+"""Relatório de memória dos dados do painel.
+
+Para cada tamanho, gera (uma vez) o CSV sintético dos benchmarks e mede, cada
+um num processo separado:
+
+- `legacy`: o DataFrame lido como antes (todas as colunas, textos como objetos
+  Python, data como datetime64 e números em 64 bits);
+- `compact`: o DataFrame no formato atual (`columnar.read_csv_clean`);
+- `worker`: um worker completo (`import app`, com todos os índices).
+
+Informa o RSS do processo (atual e pico) e os bytes do DataFrame por coluna.
+Com `--repo`, o worker é medido com o código de outro diretório (por exemplo
+um `git worktree` da versão anterior), para comparar antes e depois.
+
+Uso:
+    python benchmarks/memory_report.py --sizes 100k,1M
+    python benchmarks/memory_report.py --sizes 1M --repo /tmp/versao-anterior --output memoria.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from run_benchmarks import REPO_DIR, ensure_dataset, parse_size, peak_rss_bytes
+
+MODES = ('legacy', 'compact', 'worker')
+
+
+def current_rss_bytes():
+    # /proc só existe no Linux; nos demais sistemas fica só o pico
+    try:
+        with open('/proc/self/statm', encoding='ascii') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return None
+
+
+def read_legacy(path):
+    import pandas as pd
+
+    # Leitura usada pelo painel antes do formato compacto
+    df = pd.read_csv(path)
+    df['newest_review_date'] = pd.to_datetime(df['newest_review_date'], format='%Y', errors='coerce')
+    df['price'] = pd.to_numeric(df['price'], errors='coerce')
+    df['specialization'] = df['specialization'].astype(str).fillna('')
+    df['city1'] = df['city1'].astype(str).fillna('')
+    return df
+
+
+def run_worker(args):
+    """Mede um modo neste processo e grava o resultado em `args.worker_output`."""
+    baseline = current_rss_bytes()
+    if args.mode == 'worker':
+        cache_dir = tempfile.mkdtemp(prefix='dashboard-memory-cache-')
+        os.environ.update({
+            'DASHBOARD_DATA_FILE': args.csv,
+            'DASHBOARD_COLUMNS_DIR': os.path.join(cache_dir, 'no-columns'),
+            'DASHBOARD_CACHE_DIR': cache_dir,
+            'DASHBOARD_METRICS_DIR': os.path.join(cache_dir, 'metrics'),
+            'DASHBOARD_RELOAD_INTERVAL': '0',
+        })
+        sys.path.insert(0, args.repo)
+        import app
+        df = app.current_dataset().df
+    elif args.mode == 'legacy':
+        df = read_legacy(args.csv)
+    else:
+        sys.path.insert(0, REPO_DIR)
+        from columnar import read_csv_clean
+        df = read_csv_clean(args.csv)
+
+    rss = current_rss_bytes()
+    usage = df.memory_usage(deep=True, index=False)
+    result = {
+        'rows': len(df),
+        'rss_bytes': rss,
+        'rss_growth_bytes': rss - baseline if rss is not None and baseline is not None else None,
+        'peak_rss_bytes': peak_rss_bytes(),
+        'frame_bytes': int(usage.sum()),
+        'column_bytes': {name: int(size) for name, size in usage.items()},
+        'dtypes': {name: str(dtype) for name, dtype in df.dtypes.items()},
+    }
+    with open(args.worker_output, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+def measure(args, csv_path, mode):
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = f.name
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--mode', mode,
+               '--csv', csv_path, '--worker-output', output, '--repo', args.repo]
+    subprocess.run(command, check=True)
+    try:
+        with open(output, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(output)
+
+
+def print_report(results):
+    mib = 1024 * 1024
+    print(f'{"linhas":>10} {"modo":>8} {"RSS (MiB)":>10} {"pico (MiB)":>11} {"DataFrame (MiB)":>16}')
+    for size, by_mode in results.items():
+        for mode, result in by_mode.items():
+            rss = f'{result["rss_bytes"] / mib:.1f}' if result['rss_bytes'] is not None else '-'
+            print(f'{size:>10} {mode:>8} {rss:>10} {result["peak_rss_bytes"] / mib:>11.1f} '
+                  f'{result["frame_bytes"] / mib:>16.1f}')
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100k,1M', help='tamanhos separados por vírgula (ex.: 10k,100k,1M)')
+    parser.add_argument('--modes', default=','.join(MODES), help='modos medidos (legacy, compact, worker)')
+    parser.add_argument('--repo', default=REPO_DIR, help='diretório do código usado no modo worker')
+    parser.add_argument('--seed', type=int, default=0, help='semente dos dados sintéticos')
+    parser.add_argument('--output', help='grava o relatório neste arquivo JSON')
+    # Uso interno: execução de um modo no processo filho
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    parser.add_argument('--worker-output', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    args.repo = os.path.abspath(args.repo)
+    if args.worker:
+        run_worker(args)
+        return 0
+
+    results = {}
+    for size in args.sizes.split(','):
+        csv_path = ensure_dataset(parse_size(size), args.seed)
+        results[size.strip()] = {mode: measure(args, csv_path, mode) for mode in args.modes.split(',')}
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'repo': args.repo, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
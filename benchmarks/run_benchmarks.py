@@ -0,0 +1,309 @@
+"""Benchmarks do painel sobre dados sintéticos.
+
+Para cada tamanho, gera (uma vez) um CSV sintético, sobe o app num processo
+separado apontando para ele e repete as sessões gravadas em `sequences.json`,
+chamando diretamente as funções usadas pelos callbacks. Cada etapa (filtros,
+agregados, KPIs, cada gráfico e a página da tabela) é cronometrada sem os
+caches de resultados, e o resultado traz p50/p95/p99 por etapa, pico de
+memória do processo e tamanho das respostas serializadas, em JSON comparável
+entre versões.
+
+Uso:
+    python benchmarks/run_benchmarks.py --sizes 10k,100k,1M --output resultados.json
+    python benchmarks/run_benchmarks.py --sizes 10M --tracemalloc
+    python benchmarks/run_benchmarks.py --sizes 100k --baseline resultados.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+DATA_DIR = os.path.join(BENCH_DIR, 'data')
+DEFAULT_SEQUENCES = os.path.join(BENCH_DIR, 'sequences.json')
+
+# Tamanhos usados quando --sizes não é informado (10M exige vários GB de memória)
+DEFAULT_SIZES = '10k,100k,1M'
+
+# Etapas medidas a cada passo das sessões, na ordem em que o painel as executa
+STAGES = (
+    'filter_rows', 'aggregates', 'kpis', 'specialization_figure', 'telemedicine_figure',
+    'price_figure', 'reviews_figure', 'table_page', 'serialize', 'compress',
+)
+
+DEFAULT_FILTERS = {
+    'specialization': 'all', 'city': 'all', 'telemedicine': 'all', 'price_range': None, 'search': '',
+}
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    factor = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip('km')) * factor)
+
+
+def percentiles(samples):
+    values = np.asarray(samples, dtype=float)
+    if not len(values):
+        return {'count': 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        'count': len(values), 'p50': float(p50), 'p95': float(p95), 'p99': float(p99),
+        'mean': float(values.mean()), 'max': float(values.max()),
+    }
+
+
+def peak_rss_bytes():
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def ensure_dataset(n_rows, seed):
+    from synthetic_data import write_dataset
+
+    path = os.path.join(DATA_DIR, f'doctors_{n_rows}_{seed}.csv')
+    if not os.path.exists(path):
+        print(f'Gerando {n_rows} linhas em {path}...', file=sys.stderr)
+        write_dataset(path, n_rows, seed=seed)
+    return path
+
+
+class StageTimer:
+    """Acumula as durações (em ms) e, opcionalmente, o pico de memória Python de cada etapa."""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.samples = {}
+        self.memory_peaks = {}
+
+    def run(self, stage, function, *args):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.samples.setdefault(stage, []).append(elapsed)
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] - base
+            self.memory_peaks[stage] = max(self.memory_peaks.get(stage, 0), peak)
+        return result
+
+
+def replay(app, sessions, repeat, timer):
+    """Repete as sessões gravadas, medindo cada etapa; devolve os tamanhos das respostas."""
+    import plotly.io.json as pio_json
+    from compression import compress
+    from row_store import FilteredRows
+
+    data = app.current_dataset()
+    payloads = {}
+    compressed_payloads = {}
+    totals = []
+    for _ in range(repeat):
+        for session in sessions:
+            current = dict(DEFAULT_FILTERS)
+            for step in session['steps']:
+                if step.get('reset'):
+                    current = dict(DEFAULT_FILTERS)
+                current.update({key: value for key, value in step.items() if key != 'reset'})
+                price_range = current['price_range'] or [data.price_min, data.price_max]
+
+                start = time.perf_counter()
+                filters = app.normalize_filters(current['specialization'], current['city'],
+                                                current['telemedicine'], price_range, current['search'])
+                rows = timer.run('filter_rows', app.filter_rows, data, *filters)
+                # Entrada nova a cada passo: os agregados são sempre recalculados
+                entry = FilteredRows(data, filters, rows)
+                aggregates = timer.run('aggregates', app.aggregates_for, entry)
+                outputs = {
+                    'kpis': timer.run('kpis', app.build_kpis, aggregates),
+                    'specialization_figure': timer.run('specialization_figure', app.build_specialization_figure, aggregates),
+                    'telemedicine_figure': timer.run('telemedicine_figure', app.build_telemedicine_figure, aggregates),
+                    'price_figure': timer.run('price_figure', lambda: app.build_price_figure(entry.price_counts())),
+                    'reviews_figure': timer.run('reviews_figure', app.build_reviews_figure, aggregates),
+                    'table_page': timer.run('table_page', app.build_table_page, entry, [], 0, 10),
+                }
+                serialized = timer.run('serialize', lambda: {
+                    name: pio_json.to_json_plotly(value).encode('utf-8') for name, value in outputs.items()
+                })
+                compressed = timer.run('compress', lambda: {
+                    name: compress(body, 'gzip') for name, body in serialized.items()
+                })
+                totals.append((time.perf_counter() - start) * 1000)
+                for name, body in serialized.items():
+                    payloads.setdefault(name, []).append(len(body))
+                    compressed_payloads.setdefault(name, []).append(len(compressed[name]))
+    return totals, payloads, compressed_payloads
+
+
+def run_worker(args):
+    """Executa um tamanho de dados neste processo e grava o resultado em `args.worker_output`."""
+    cache_dir = tempfile.mkdtemp(prefix='dashboard-bench-cache-')
+    os.environ.update({
+        'DASHBOARD_DATA_FILE': args.csv,
+        'DASHBOARD_COLUMNS_DIR': args.columns_dir or os.path.join(cache_dir, 'no-columns'),
+        'DASHBOARD_CACHE_DIR': cache_dir,
+        'DASHBOARD_RELOAD_INTERVAL': '0',
+    })
+    sys.path.insert(0, REPO_DIR)
+    timer = StageTimer(args.tracemalloc)
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    import app
+    import_ms = (time.perf_counter() - start) * 1000
+    rss_after_import = peak_rss_bytes()
+
+    # Carga dos dados repetida à parte, depois do import (que já carregou uma vez)
+    for _ in range(args.load_repeat):
+        timer.run('load_data', app.load_data)
+
+    with open(args.sequences, encoding='utf-8') as f:
+        sessions = json.load(f)['sessions']
+    totals, payloads, compressed_payloads = replay(app, sessions, args.repeat, timer)
+
+    result = {
+        'rows': len(app.current_dataset().df),
+        'import_app_ms': import_ms,
+        'load_data_ms': percentiles(timer.samples.get('load_data', [])),
+        'stages_ms': {stage: percentiles(timer.samples.get(stage, [])) for stage in STAGES},
+        'step_total_ms': percentiles(totals),
+        'payload_bytes': {name: percentiles(sizes) for name, sizes in payloads.items()},
+        'payload_total_bytes': percentiles(np.sum(list(payloads.values()), axis=0)),
+        'payload_gzip_total_bytes': percentiles(np.sum(list(compressed_payloads.values()), axis=0)),
+        'peak_rss_bytes': {'after_import': rss_after_import, 'end': peak_rss_bytes()},
+    }
+    if args.tracemalloc:
+        result['peak_traced_bytes'] = dict(timer.memory_peaks)
+    with open(args.worker_output, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+def run_size(args, n_rows):
+    csv_path = ensure_dataset(n_rows, args.seed)
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as f:
+        output = f.name
+    command = [
+        sys.executable, os.path.abspath(__file__), '--worker',
+        '--csv', csv_path, '--worker-output', output,
+        '--sequences', args.sequences, '--repeat', str(args.repeat), '--load-repeat', str(args.load_repeat),
+    ]
+    if args.columns_dir:
+        command += ['--columns-dir', args.columns_dir]
+    if args.tracemalloc:
+        command.append('--tracemalloc')
+    # Um processo por tamanho: o pico de memória de um não contamina o outro
+    subprocess.run(command, check=True)
+    try:
+        with open(output, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(output)
+
+
+def environment():
+    import dash
+    import pandas as pd
+    import plotly
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'dash': dash.__version__,
+        'plotly': plotly.__version__,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Etapas cujo p95 piorou mais que `threshold` (fração) em relação à referência."""
+    regressions = []
+    previous = {str(result['rows']): result for result in baseline['results']}
+    for result in current['results']:
+        old = previous.get(str(result['rows']))
+        if old is None:
+            continue
+        metrics = [(f'stages_ms.{stage}', old['stages_ms'].get(stage), stats)
+                   for stage, stats in result['stages_ms'].items()]
+        metrics += [('step_total_ms', old['step_total_ms'], result['step_total_ms']),
+                    ('payload_total_bytes', old['payload_total_bytes'], result['payload_total_bytes'])]
+        for name, before, after in metrics:
+            if not before or not before.get('p95') or not after.get('p95'):
+                continue
+            ratio = after['p95'] / before['p95']
+            if ratio > 1 + threshold:
+                regressions.append({'rows': result['rows'], 'metric': name,
+                                    'baseline_p95': before['p95'], 'p95': after['p95'], 'ratio': ratio})
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help='tamanhos separados por vírgula (ex.: 10k,100k,1M,10M)')
+    parser.add_argument('--sequences', default=DEFAULT_SEQUENCES, help='arquivo com as sessões gravadas')
+    parser.add_argument('--repeat', type=int, default=5, help='repetições das sessões por tamanho')
+    parser.add_argument('--load-repeat', type=int, default=1, help='repetições da carga dos dados')
+    parser.add_argument('--seed', type=int, default=0, help='semente do gerador de dados')
+    parser.add_argument('--columns-dir', help='diretório colunar a usar no lugar do CSV')
+    parser.add_argument('--tracemalloc', action='store_true',
+                        help='mede o pico de memória Python por etapa (deixa os tempos mais lentos)')
+    parser.add_argument('--output', help='arquivo JSON de saída (padrão: saída padrão)')
+    parser.add_argument('--baseline', help='resultado anterior para comparar')
+    parser.add_argument('--threshold', type=float, default=0.2, help='piora de p95 tolerada na comparação')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--csv', help=argparse.SUPPRESS)
+    parser.add_argument('--worker-output', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    if args.worker:
+        run_worker(args)
+        return 0
+
+    report = {
+        'environment': environment(),
+        'settings': {'repeat': args.repeat, 'load_repeat': args.load_repeat, 'seed': args.seed,
+                     'sequences': os.path.basename(args.sequences), 'tracemalloc': args.tracemalloc},
+        'results': [run_size(args, parse_size(size)) for size in args.sizes.split(',')],
+    }
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            report['regressions'] = compare(json.load(f), report, args.threshold)
+        exit_code = 1 if report['regressions'] else 0
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,117 @@
+"""Gerador de conjuntos de dados sintéticos com o mesmo esquema de `df_cleaned.csv`.
+
+As cardinalidades seguem as dos dados reais: poucas dezenas de especializações
+e algumas centenas de cidades, ambas com distribuição concentrada (poucas
+cidades grandes reúnem a maior parte dos profissionais). Preço e número de
+avaliações são assimétricos (lognormal e Zipf), com uma fração de valores
+ausentes. O arquivo é escrito em blocos, então 10 milhões de linhas não
+precisam caber inteiras em memória.
+
+Uso:
+    python benchmarks/synthetic_data.py 100000 benchmarks/data/doctors_100k.csv
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Linhas geradas e gravadas por vez
+CHUNK_ROWS = 500_000
+
+SPECIALIZATIONS = [
+    'Clínico Geral', 'Psicologia', 'Pediatria', 'Ginecologia', 'Dermatologia', 'Cardiologia',
+    'Ortopedia', 'Psiquiatria', 'Oftalmologia', 'Nutrição', 'Endocrinologia', 'Neurologia',
+    'Urologia', 'Otorrinolaringologia', 'Gastroenterologia', 'Fisioterapia', 'Odontologia',
+    'Reumatologia', 'Pneumologia', 'Nefrologia', 'Angiologia', 'Cirurgia Geral',
+    'Cirurgia Plástica', 'Mastologia', 'Geriatria', 'Infectologia', 'Hematologia',
+    'Oncologia', 'Alergologia', 'Fonoaudiologia', 'Homeopatia', 'Acupuntura',
+    'Medicina do Esporte', 'Medicina do Trabalho', 'Coloproctologia', 'Nutrologia',
+]
+
+LARGE_CITIES = [
+    'São Paulo', 'Rio de Janeiro', 'Belo Horizonte', 'Brasília', 'Curitiba', 'Porto Alegre',
+    'Salvador', 'Recife', 'Fortaleza', 'Goiânia', 'Campinas', 'Florianópolis', 'Manaus',
+    'Belém', 'Vitória', 'São Luís', 'Natal', 'João Pessoa', 'Maceió', 'Ribeirão Preto',
+]
+
+# Total de cidades distintas: as grandes mais cidades menores numeradas
+N_CITIES = 600
+
+FIRST_NAMES = [
+    'Ana', 'Bruno', 'Camila', 'Daniel', 'Eduarda', 'Fábio', 'Gabriela', 'Henrique', 'Isabela',
+    'João', 'Júlia', 'Lucas', 'Mariana', 'Nicolas', 'Otávio', 'Patrícia', 'Rafael', 'Sofia',
+    'Thiago', 'Vitória', 'André', 'Beatriz', 'Carlos', 'Débora', 'Fernanda', 'Gustavo',
+    'Letícia', 'Marcelo', 'Renata', 'Sérgio',
+]
+
+LAST_NAMES = [
+    'Silva', 'Santos', 'Oliveira', 'Souza', 'Rodrigues', 'Ferreira', 'Alves', 'Pereira', 'Lima',
+    'Gomes', 'Costa', 'Ribeiro', 'Martins', 'Carvalho', 'Almeida', 'Lopes', 'Soares',
+    'Fernandes', 'Vieira', 'Barbosa', 'Rocha', 'Dias', 'Nascimento', 'Andrade', 'Moreira',
+    'Nunes', 'Marques', 'Machado', 'Mendes', 'Freitas', 'Cardoso', 'Ramos', 'Gonçalves',
+    'Araújo', 'Teixeira', 'Correia', 'Pinto', 'Moura', 'Cavalcanti', 'Monteiro',
+]
+
+COLUMNS = ['name', 'specialization', 'city1', 'reviews', 'price', 'telemedicine', 'newest_review_date', 'address']
+
+
+def _zipf_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _cities():
+    return LARGE_CITIES + [f'Cidade {i:03d}' for i in range(N_CITIES - len(LARGE_CITIES))]
+
+
+def generate_chunk(rng, n_rows, first_id=0):
+    """Um bloco de `n_rows` profissionais sintéticos."""
+    cities = np.array(_cities(), dtype=object)
+    specializations = np.array(SPECIALIZATIONS, dtype=object)
+    first = np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), n_rows)]
+    last = np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), n_rows)]
+    ids = np.arange(first_id, first_id + n_rows).astype(str).astype(object)
+
+    df = pd.DataFrame({
+        'name': 'Dr(a). ' + first + ' ' + last + ' ' + ids,
+        'specialization': specializations[rng.choice(len(SPECIALIZATIONS), n_rows, p=_zipf_weights(len(SPECIALIZATIONS), 0.9))],
+        'city1': cities[rng.choice(N_CITIES, n_rows, p=_zipf_weights(N_CITIES, 1.1))],
+        # Poucos profissionais concentram a maior parte das avaliações
+        'reviews': np.minimum(rng.zipf(1.7, n_rows) - 1, 5000),
+        # Preços em múltiplos de 10, com cauda longa à direita
+        'price': np.round(rng.lognormal(5.3, 0.45, n_rows), -1),
+        'telemedicine': (rng.random(n_rows) < 0.45).astype(np.int64),
+        'newest_review_date': rng.choice(np.arange(2012, 2023), n_rows, p=_zipf_weights(11, 0.8)[::-1]).astype(float),
+        'address': 'Rua ' + last + ', ' + rng.integers(1, 3000, n_rows).astype(str).astype(object),
+    }, columns=COLUMNS)
+
+    # Valores ausentes, como nos dados reais
+    df.loc[rng.random(n_rows) < 0.03, 'price'] = np.nan
+    df.loc[rng.random(n_rows) < 0.02, 'newest_review_date'] = np.nan
+    df.loc[rng.random(n_rows) < 0.005, 'city1'] = np.nan
+    return df
+
+
+def write_dataset(path, n_rows, seed=0):
+    """Grava `n_rows` linhas sintéticas em `path` (CSV), bloco a bloco."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    rng = np.random.default_rng(seed)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+        for start in range(0, n_rows, CHUNK_ROWS):
+            chunk = generate_chunk(rng, min(CHUNK_ROWS, n_rows - start), first_id=start)
+            chunk.to_csv(f, header=start == 0, index=False)
+    os.replace(tmp_path, path)
+    return path
+
+
+def main(argv):
+    n_rows = int(argv[1]) if len(argv) > 1 else 100_000
+    path = argv[2] if len(argv) > 2 else os.path.join('benchmarks', 'data', f'doctors_{n_rows}.csv')
+    write_dataset(path, n_rows)
+    print(f'{n_rows} linhas gravadas em {path}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
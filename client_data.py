@@ -0,0 +1,83 @@
+"""Dados do painel em formato colunar compacto para o modo de filtragem no navegador.
+
+Os valores vão num único `dcc.Store` carregado com a página:
+
+- colunas de texto codificadas por dicionário: os valores distintos em ordem
+  crescente e, por linha, o código do valor (que é também o posto usado para
+  ordenar a tabela); nulos recebem -1;
+- colunas numéricas como arrays tipados em base64 (little-endian), no menor
+  tipo que representa os valores exatamente; nulos só existem nos tipos de
+  ponto flutuante (NaN).
+
+A ordem em que o cubo de agregados guarda especializações e valores de
+telemedicina também é enviada, para que os desempates nos gráficos sejam os
+mesmos do servidor, assim como a ordem geral do ranking de custo-benefício
+(posições das linhas da maior pontuação para a menor), para que o navegador
+só precise percorrê-la. Vai junto a lista dos caracteres que a normalização
+da busca remove, para que o navegador normalize os textos como o servidor.
+"""
+import base64
+
+import numpy as np
+
+from ranking import PRICE_UNIT
+from search_index import combining_pattern
+
+# Colunas de texto (codificadas por dicionário) e numéricas enviadas ao navegador
+TEXT_COLUMNS = ('name', 'city1', 'specialization')
+NUMERIC_COLUMNS = ('reviews', 'price', 'telemedicine')
+
+# Tipos inteiros tentados, do menor para o maior
+_INTEGER_DTYPES = (np.int8, np.int16, np.int32)
+
+
+def encode_array(values):
+    """Array tipado em base64, no menor tipo que preserva os valores."""
+    values = np.asarray(values, dtype=float)
+    finite = values[np.isfinite(values)]
+    if len(finite) == len(values) and np.all(np.mod(finite, 1) == 0):
+        for dtype in _INTEGER_DTYPES:
+            info = np.iinfo(dtype)
+            if not len(finite) or (finite.min() >= info.min and finite.max() <= info.max):
+                return _encoded(values.astype(dtype))
+    as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32.astype(float), values, equal_nan=True):
+        return _encoded(as_float32)
+    return _encoded(values)
+
+
+def _encoded(array):
+    array = array.astype(array.dtype.newbyteorder('<'), copy=False)
+    return {'dtype': array.dtype.name, 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def encode_text(series):
+    """Dicionário de valores (ordenados) e códigos por linha, com -1 para nulos."""
+    codes, uniques = series.factorize(sort=True)
+    return {'values': [str(value) for value in uniques], 'codes': encode_array(codes)}
+
+
+def build_client_payload(data, ranking_size):
+    """Colunas de `data` (um `Dataset`) no formato lido pelo assets/clientside.js."""
+    df = data.df
+    columns = {column: encode_text(df[column]) for column in TEXT_COLUMNS}
+    columns.update({column: encode_array(df[column].to_numpy(dtype=float)) for column in NUMERIC_COLUMNS})
+    columns['year'] = encode_array(df['review_year'].to_numpy(dtype=float, na_value=np.nan))
+    return {
+        'version': data.version,
+        'rows': len(df),
+        'columns': columns,
+        # Acentos removidos na busca, os mesmos de normalize_text (o navegador não sabe quais são)
+        'combining': combining_pattern(),
+        # Ordem das categorias no cubo (define os desempates das contagens)
+        'specialization_order': [str(value) for value in data.data_cube.labels['specialization']],
+        'telemedicine_order': [float(value) for value in data.data_cube.labels['telemedicine']],
+        # Ranking: ordem já calculada no servidor; a pontuação exibida é refeita com os mesmos pesos
+        'ranking': {
+            'order': encode_array(data.ranking_index.order),
+            'reviews_weight': data.ranking_weights.reviews,
+            'price_weight': data.ranking_weights.price,
+            'price_unit': PRICE_UNIT,
+            'size': ranking_size,
+        },
+    }
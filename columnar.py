@@ -0,0 +1,175 @@
+"""Formato colunar mapeável em memória para os dados do painel.
+
+A conversão lê o CSV uma única vez, aplica as mesmas limpezas de tipos do
+painel e grava cada coluna como um arquivo `.npy`. Colunas de texto são
+codificadas por dicionário: os códigos vão para o `.npy` e os valores distintos
+para o `manifest.json`. Inteiros com nulos gravam também a máscara dos nulos. Na carga, os arquivos são abertos com `mmap_mode='r'`,
+então os workers do gunicorn compartilham as mesmas páginas do cache do sistema
+operacional em vez de cada um manter sua cópia.
+
+Uso:
+    python columnar.py [df_cleaned.csv] [df_cleaned.cols]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from result_cache import file_fingerprint
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 2
+
+# Colunas do CSV usadas pelo painel (as demais nem são lidas)
+USED_COLUMNS = ('name', 'specialization', 'city1', 'reviews', 'price', 'telemedicine', 'newest_review_date')
+
+# Colunas de texto com poucos valores distintos, guardadas como categóricas
+CATEGORICAL_COLUMNS = ('specialization', 'city1')
+
+
+def read_csv_clean(path, **kwargs):
+    """Lê o CSV de profissionais (só as colunas usadas) no formato compacto do painel."""
+    return clean_frame(pd.read_csv(path, usecols=lambda name: name in USED_COLUMNS, **kwargs))
+
+
+def clean_frame(df):
+    """Conversões de tipo aplicadas a um trecho recém-lido do CSV.
+
+    Textos repetidos viram categóricos (nulos continuam nulos), números ficam
+    no menor tipo que os representa sem perda e a data da avaliação mais
+    recente vira só o ano, como inteiro de 16 bits com nulos.
+    """
+    year = pd.to_numeric(df.pop('newest_review_date'), errors='coerce')
+    df['review_year'] = year.where(year == np.floor(year)).astype('Int16')
+    df['price'] = downcast(pd.to_numeric(df['price'], errors='coerce'))  # Ensure price is numeric
+    df['reviews'] = downcast(pd.to_numeric(df['reviews'], errors='coerce'))
+    df['telemedicine'] = downcast(pd.to_numeric(df['telemedicine'], errors='coerce'))
+    for column in CATEGORICAL_COLUMNS:
+        df[column] = df[column].astype('category')
+    return df
+
+
+def downcast(series):
+    """Menor tipo numérico que representa os valores sem perda (inteiro sem sinal, inteiro, float32)."""
+    values = series.to_numpy(dtype=float)
+    finite = values[~np.isnan(values)]
+    if len(finite) == len(values) and np.array_equal(finite, np.floor(finite)):
+        for dtype in (np.uint8, np.uint16, np.uint32, np.int8, np.int16, np.int32):
+            info = np.iinfo(dtype)
+            if not len(finite) or (finite.min() >= info.min and finite.max() <= info.max):
+                return pd.Series(values.astype(dtype), index=series.index, name=series.name)
+    as_float32 = values.astype(np.float32)
+    if np.array_equal(as_float32, values, equal_nan=True):
+        return pd.Series(as_float32, index=series.index, name=series.name)
+    return pd.Series(values, index=series.index, name=series.name)
+
+
+def concat_frames(frames):
+    """Concatena trechos já limpos mantendo as colunas categóricas (com a união das categorias)."""
+    df = pd.concat(frames, ignore_index=True)
+    for column in CATEGORICAL_COLUMNS:
+        if df[column].dtype != 'category':
+            df[column] = union_categoricals([frame[column] for frame in frames], sort_categories=True)
+    return df
+
+
+def write_columns(df, out_dir, source=None):
+    """Grava `df` em `out_dir` (substituindo atomicamente uma versão anterior)."""
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    staging = tempfile.mkdtemp(prefix='.columns-', dir=parent)
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        filename = f'{i:03d}.npy'
+        entry = {'name': name, 'file': filename}
+        if pd.api.types.is_datetime64_any_dtype(series):
+            entry['kind'] = 'datetime'
+            values = series.to_numpy(dtype='datetime64[ns]').view(np.int64)
+        elif isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_integer_dtype(series):
+            # Inteiro com nulos: valores e máscara em arquivos separados
+            entry['kind'] = 'masked'
+            entry['mask'] = f'{i:03d}.mask.npy'
+            np.save(os.path.join(staging, entry['mask']), series.isna().to_numpy(), allow_pickle=False)
+            values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            entry['kind'] = 'numeric'
+            values = series.to_numpy()
+        else:
+            entry['kind'] = 'dictionary'
+            codes, uniques = pd.factorize(series, sort=True)
+            entry['values'] = [str(value) for value in uniques]
+            values = codes.astype(_code_dtype(len(uniques)))
+        np.save(os.path.join(staging, filename), np.ascontiguousarray(values), allow_pickle=False)
+        columns.append(entry)
+
+    manifest = {'format': FORMAT_VERSION, 'rows': len(df), 'source': source, 'columns': columns}
+    with open(os.path.join(staging, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+
+    replace_directory(staging, out_dir)
+
+
+def replace_directory(staging, out_dir):
+    """Troca `out_dir` por `staging` de uma vez; quem ainda mapeia os arquivos antigos continua lendo-os."""
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    previous = None
+    if os.path.exists(out_dir):
+        previous = tempfile.mkdtemp(prefix='.columns-old-', dir=parent)
+        os.replace(out_dir, os.path.join(previous, 'data'))
+    os.replace(staging, out_dir)
+    if previous:
+        shutil.rmtree(previous, ignore_errors=True)
+
+
+def read_manifest(directory):
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    return manifest if manifest.get('format') == FORMAT_VERSION else None
+
+
+def read_columns(directory):
+    """Abre os dados colunares sem cópia: colunas numéricas apontam para o mmap."""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f'{directory} não contém dados colunares válidos')
+
+    data = {}
+    for entry in manifest['columns']:
+        values = np.load(os.path.join(directory, entry['file']), mmap_mode='r', allow_pickle=False)
+        if entry['kind'] == 'datetime':
+            data[entry['name']] = pd.Series(values.view('datetime64[ns]'), copy=False)
+        elif entry['kind'] == 'masked':
+            mask = np.load(os.path.join(directory, entry['mask']), mmap_mode='r', allow_pickle=False)
+            data[entry['name']] = pd.Series(pd.arrays.IntegerArray(values, mask), copy=False)
+        elif entry['kind'] == 'dictionary':
+            data[entry['name']] = pd.Categorical.from_codes(values, entry['values'])
+        else:
+            data[entry['name']] = pd.Series(values, copy=False)
+    return pd.DataFrame(data, copy=False)
+
+
+def _code_dtype(n_values):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def main(argv):
+    csv_path = argv[1] if len(argv) > 1 else 'df_cleaned.csv'
+    out_dir = argv[2] if len(argv) > 2 else os.path.splitext(csv_path)[0] + '.cols'
+    df = read_csv_clean(csv_path)
+    write_columns(df, out_dir, source=file_fingerprint(csv_path))
+    print(f'{len(df)} linhas gravadas em {out_dir}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,63 @@
+"""Compressão das respostas HTTP (brotli ou gzip, conforme o navegador aceita).
+
+O brotli é opcional: sem o pacote `brotli` instalado, só o gzip é usado.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Níveis escolhidos pelo tempo de CPU: respostas pequenas e geradas a cada pedido
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def available_encodings(preferred):
+    """Codificações de `preferred` (em ordem de preferência) suportadas neste ambiente."""
+    return tuple(encoding for encoding in preferred if encoding == 'gzip' or (encoding == 'br' and brotli))
+
+
+def accepted_encodings(header):
+    """Codificações aceitas pelo cabeçalho Accept-Encoding (ignora as com q=0)."""
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(name.strip().lower())
+    return accepted
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encoding, encodings, min_bytes):
+    """Comprime `response` com a primeira codificação de `encodings` aceita pelo navegador.
+
+    Respostas de erro, em streaming, já codificadas ou menores que `min_bytes`
+    são devolvidas como estão.
+    """
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    accepted = accepted_encodings(accept_encoding)
+    encoding = next((encoding for encoding in encodings if encoding in accepted), None)
+    if encoding is None:
+        return response
+    data = response.get_data()
+    if len(data) < min_bytes:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
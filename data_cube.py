@@ -0,0 +1,270 @@
+import copy
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+# Dimensões do cubo (além da faixa de preço)
+CUBE_DIMENSIONS = ('specialization', 'city1', 'telemedicine', 'year')
+
+# Medidas guardadas em cada célula
+CUBE_MEASURES = ('count', 'price_sum', 'price_count', 'reviews_sum', 'reviews_count')
+
+# Contagens e somas por dimensão de `Aggregates`, indexadas pelos rótulos da dimensão
+LABELED_FIELDS = {
+    'specialization': ('spec_counts',),
+    'telemedicine': ('tele_counts',),
+    'year': ('year_counts', 'year_reviews_sum', 'year_reviews_count'),
+}
+
+
+class Aggregates:
+    """Agregados de um conjunto de linhas: totais e contagens por dimensão."""
+
+    def __init__(self, cube, spec, city, tele, year, measures):
+        self.cube = cube
+        self.total = int(measures['count'].sum())
+        self.price_sum = float(measures['price_sum'].sum())
+        self.price_count = int(measures['price_count'].sum())
+        self.reviews_sum = float(measures['reviews_sum'].sum())
+        self.reviews_count = int(measures['reviews_count'].sum())
+        self.spec_counts = _bincount(spec, measures['count'], len(cube.labels['specialization']))
+        self.tele_counts = _bincount(tele, measures['count'], len(cube.labels['telemedicine']))
+        n_years = len(cube.labels['year'])
+        self.year_counts = _bincount(year, measures['count'], n_years)
+        self.year_reviews_sum = _bincount(year, measures['reviews_sum'], n_years)
+        self.year_reviews_count = _bincount(year, measures['reviews_count'], n_years)
+
+    def __iadd__(self, other):
+        for name in ('total', 'price_sum', 'price_count', 'reviews_sum', 'reviews_count',
+                     'spec_counts', 'tele_counts', 'year_counts', 'year_reviews_sum', 'year_reviews_count'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+
+    def detached(self):
+        """Cópia que leva só os rótulos das dimensões, não o cubo (para enviar a outro processo)."""
+        part = copy.copy(self)
+        part.cube = SimpleNamespace(labels={name: self.cube.labels[name] for name in LABELED_FIELDS})
+        return part
+
+    @classmethod
+    def merge(cls, parts):
+        """Soma agregados de cubos diferentes (p.ex. um por shard), alinhando as dimensões pelos rótulos.
+
+        Os rótulos do resultado são a união ordenada dos rótulos das partes, a
+        mesma ordem que um cubo único sobre todas as linhas teria.
+        """
+        merged = cls.__new__(cls)
+        labels = {name: np.unique(np.concatenate([part.cube.labels[name] for part in parts])) for name in LABELED_FIELDS}
+        merged.cube = SimpleNamespace(labels=labels)
+        for name in ('total', 'price_sum', 'price_count', 'reviews_sum', 'reviews_count'):
+            setattr(merged, name, sum(getattr(part, name) for part in parts))
+        for dimension, fields in LABELED_FIELDS.items():
+            for name in fields:
+                values = np.zeros(len(labels[dimension]))
+                for part in parts:
+                    values[np.searchsorted(labels[dimension], part.cube.labels[dimension])] += getattr(part, name)
+                setattr(merged, name, values)
+        return merged
+
+    @property
+    def avg_price(self):
+        return self.price_sum / self.price_count if self.price_count else float('nan')
+
+    @property
+    def avg_reviews(self):
+        return self.reviews_sum / self.reviews_count if self.reviews_count else float('nan')
+
+    @property
+    def telemedicine_sum(self):
+        return float(np.dot(self.cube.labels['telemedicine'], self.tele_counts))
+
+    def specialization_counts(self):
+        """Contagem por especialização (somente as presentes), em ordem decrescente."""
+        counts = pd.Series(self.spec_counts.astype(np.int64), index=self.cube.labels['specialization'])
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def telemedicine_counts(self):
+        counts = pd.Series(self.tele_counts.astype(np.int64), index=self.cube.labels['telemedicine'])
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def reviews_by_year(self):
+        """Média de avaliações por ano da avaliação mais recente (anos com profissionais)."""
+        present = self.year_counts > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            avg = self.year_reviews_sum[present] / self.year_reviews_count[present]
+        years = self.cube.labels['year'][present]
+        return pd.DataFrame({
+            'newest_review_date': pd.to_datetime(years.astype(np.int64).astype(str), format='%Y'),
+            'avg_reviews': avg,
+        }).sort_values('newest_review_date', ignore_index=True)
+
+
+class DataCube:
+    """Cubo pré-agregado especialização × cidade × telemedicina × faixa de preço × ano.
+
+    Cada célula guarda contagem, soma e contagem não nula de preço e de
+    avaliações. Uma consulta sem busca textual soma as células que caem
+    inteiramente dentro dos filtros; só as linhas das faixas de preço
+    parcialmente cobertas (nas bordas do intervalo) são varridas uma a uma.
+    """
+
+    def __init__(self, df, price_origin, price_step):
+        self.price_origin = price_origin
+        self.price_step = price_step
+
+        # Códigos por linha; nulos recebem o código extra `len(labels)`, descartado nas somas
+        self.labels = {}
+        self.codes = {}
+        self.lookup = {}
+        for name, series in _dimension_series(df):
+            codes, uniques = pd.factorize(series, sort=True)
+            labels = np.asarray(uniques)
+            self.labels[name] = labels
+            self.codes[name] = np.where(codes < 0, len(labels), codes).astype(np.int32)
+            self.lookup[name] = {value: code for code, value in enumerate(labels)}
+
+        self.price, self.row_measures, self.bucket = self._row_values(df)
+        self.cells = self._group_cells(self.codes, self.bucket, self.row_measures)
+
+    def _row_values(self, df):
+        price = df['price'].to_numpy(dtype=float)
+        reviews = df['reviews'].to_numpy(dtype=float)
+        measures = {
+            'count': np.ones(len(df)),
+            'price_sum': np.nan_to_num(price),
+            'price_count': (~np.isnan(price)).astype(float),
+            'reviews_sum': np.nan_to_num(reviews),
+            'reviews_count': (~np.isnan(reviews)).astype(float),
+        }
+        # Linhas sem preço ficam na faixa -1 e nunca entram numa consulta por preço
+        bucket = np.where(
+            np.isnan(price), -1,
+            np.floor((np.nan_to_num(price) - self.price_origin) / self.price_step),
+        ).astype(np.int64)
+        return price, measures, bucket
+
+    @staticmethod
+    def _group_cells(codes, bucket, measures):
+        cells = pd.DataFrame({name: codes[name] for name in CUBE_DIMENSIONS})
+        cells['bucket'] = bucket
+        for name, values in measures.items():
+            cells[name] = values
+        cells = cells.groupby(list(CUBE_DIMENSIONS) + ['bucket'], sort=False).sum().reset_index()
+        return {name: cells[name].to_numpy() for name in cells.columns}
+
+    def extended(self, delta):
+        """Novo cubo com as linhas de `delta` somadas às células (o atual não é alterado).
+
+        Valores inéditos ganham códigos novos no fim de cada dimensão. Preços
+        abaixo da origem das faixas exigem reconstruir o cubo: nesse caso
+        devolve None.
+        """
+        if (delta['price'] < self.price_origin).any():
+            return None
+
+        cube = copy.copy(self)
+        cube.labels, cube.codes, cube.lookup = {}, {}, {}
+        cells = dict(self.cells)
+        new_codes = {}
+        for name, series in _dimension_series(delta):
+            labels = self.labels[name]
+            lookup = dict(self.lookup[name])
+            unseen = [value for value in pd.unique(series.dropna()) if value not in lookup]
+            for offset, value in enumerate(unseen):
+                lookup[value] = len(labels) + offset
+            old_null_code, null_code = len(labels), len(labels) + len(unseen)
+            old_codes = self.codes[name]
+            if unseen:
+                labels = np.concatenate([labels, np.asarray(unseen, dtype=labels.dtype)])
+                # O código dos nulos acompanha o crescimento da dimensão
+                old_codes = np.where(old_codes == old_null_code, null_code, old_codes).astype(np.int32)
+                cells[name] = np.where(cells[name] == old_null_code, null_code, cells[name])
+            # Via object: em séries categóricas o `map` devolveria outra categórica
+            new_codes[name] = series.astype(object).map(lookup).fillna(null_code).to_numpy(dtype=np.int32)
+            cube.labels[name] = labels
+            cube.lookup[name] = lookup
+            cube.codes[name] = np.concatenate([old_codes, new_codes[name]])
+
+        price, measures, bucket = self._row_values(delta)
+        cube.price = np.concatenate([self.price, price])
+        cube.bucket = np.concatenate([self.bucket, bucket])
+        cube.row_measures = {name: np.concatenate([self.row_measures[name], values]) for name, values in measures.items()}
+
+        # Junta as células novas às existentes e reagrupa (o número de células é pequeno)
+        new_cells = self._group_cells(new_codes, bucket, measures)
+        merged = {name: np.concatenate([cells[name], new_cells[name]]) for name in cells}
+        cube.cells = self._group_cells(
+            {name: merged[name] for name in CUBE_DIMENSIONS},
+            merged['bucket'],
+            {name: merged[name] for name in CUBE_MEASURES},
+        )
+        return cube
+
+    def aggregate_rows(self, rows):
+        """Agregados exatos de um conjunto de linhas (posições)."""
+        return Aggregates(
+            self,
+            *(self.codes[name][rows] for name in CUBE_DIMENSIONS),
+            {name: values[rows] for name, values in self.row_measures.items()},
+        )
+
+    def query(self, filter_engine, specialization='all', city='all', telemedicine='all', price_range=None):
+        """Agregados dos filtros categóricos e de preço, somando células do cubo."""
+        mask = np.ones(len(self.cells['count']), dtype=bool)
+        row_filters = {}
+        for name, value in (('specialization', specialization), ('city1', city), ('telemedicine', telemedicine)):
+            if value == 'all':
+                continue
+            code = self.lookup[name].get(value, -1)
+            mask &= self.cells[name] == code
+            row_filters[name] = code
+
+        edge_rows = np.empty(0, dtype=np.int64)
+        if price_range is not None:
+            low, high = price_range
+            # Faixas inteiramente dentro de [low, high]
+            first = max(int(np.ceil((low - self.price_origin) / self.price_step)), 0)
+            last = int(np.floor((high - self.price_origin) / self.price_step)) - 1
+            mask &= (self.cells['bucket'] >= first) & (self.cells['bucket'] <= last)
+
+            # Bordas: preços em [low, início da primeira faixa) e [fim da última faixa, high]
+            if first <= last:
+                inner_low = self.price_origin + first * self.price_step
+                inner_high = self.price_origin + (last + 1) * self.price_step
+                edges = [(low, inner_low, 'left'), (inner_high, high, 'right')]
+            else:
+                edges = [(low, high, 'right')]
+            prices = filter_engine.price_sorted
+            parts = []
+            for start_value, stop_value, side in edges:
+                start = np.searchsorted(prices, start_value, side='left')
+                stop = np.searchsorted(prices, stop_value, side=side)
+                parts.append(filter_engine.price_rows[start:stop])
+            edge_rows = np.concatenate(parts)
+            for name, code in row_filters.items():
+                edge_rows = edge_rows[self.codes[name][edge_rows] == code]
+
+        result = Aggregates(
+            self,
+            *(self.cells[name][mask] for name in CUBE_DIMENSIONS),
+            {name: self.cells[name][mask] for name in CUBE_MEASURES},
+        )
+        if len(edge_rows):
+            result += self.aggregate_rows(edge_rows)
+        return result
+
+
+def _dimension_series(df):
+    return (
+        ('specialization', df['specialization']),
+        ('city1', df['city1']),
+        ('telemedicine', df['telemedicine']),
+        # Ano como float (nulos viram NaN), como nas demais dimensões numéricas
+        ('year', df['review_year'].astype(float)),
+    )
+
+
+def _bincount(codes, weights, size):
+    # Descarta o código extra dos nulos
+    return np.bincount(codes, weights=weights, minlength=size + 1)[:size]
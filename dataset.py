@@ -0,0 +1,167 @@
+"""Versões imutáveis dos dados do painel e sua atualização.
+
+Um `Dataset` reúne o DataFrame e todos os índices derivados dele. Ele nunca é
+alterado depois de criado: uma atualização produz um novo `Dataset`, que o app
+troca por inteiro. Pedidos em andamento continuam com a versão que já tinham.
+
+Quando o CSV só ganhou linhas no fim (o conteúdo anterior é um prefixo do
+novo), apenas o trecho novo é lido e os índices são estendidos; qualquer outra
+mudança provoca uma recarga completa.
+"""
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+from columnar import MANIFEST, concat_frames, read_columns, read_csv_clean, read_manifest
+from data_cube import DataCube
+from filter_engine import FilterEngine
+from option_index import OptionIndex
+from ranking import RankingIndex
+from result_cache import file_fingerprint
+from search_index import SearchIndex
+from table_index import TableIndex
+
+# Tamanho dos blocos lidos ao calcular o resumo do CSV
+_READ_CHUNK = 1 << 20
+
+
+class Dataset:
+    """Uma versão dos dados com os índices de filtros, busca, tabela, opções dos filtros, ranking e o cubo de agregados."""
+
+    def __init__(self, df, version, price_step, ranking_weights, source=None, indexes=None):
+        self.df = df
+        self.version = version
+        self.price_step = price_step
+        self.ranking_weights = ranking_weights
+        self.source = source or {}
+        if indexes is None:
+            indexes = (
+                FilterEngine(df),
+                SearchIndex(df),
+                TableIndex(df),
+                DataCube(df, price_origin=int(df['price'].min()), price_step=price_step),
+                OptionIndex(df),
+                RankingIndex(df, ranking_weights),
+            )
+        (self.filter_engine, self.search_index, self.table_index, self.data_cube, self.option_index,
+         self.ranking_index) = indexes
+        self.price_min = int(df['price'].min())
+        self.price_max = int(df['price'].max())
+
+    @property
+    def n_rows(self):
+        return len(self.df)
+
+    def append(self, delta, version, source):
+        """Nova versão com as linhas de `delta` no fim, estendendo os índices existentes."""
+        offset = len(self.df)
+        df = concat_frames([self.df, delta])
+        data_cube = self.data_cube.extended(delta)
+        if data_cube is None:
+            data_cube = DataCube(df, price_origin=int(df['price'].min()), price_step=self.price_step)
+        indexes = (
+            self.filter_engine.extended(delta, offset),
+            self.search_index.extended(delta),
+            # Os postos de ordenação mudam para todas as linhas: recalculados por inteiro
+            TableIndex(df),
+            data_cube,
+            self.option_index.extended(delta),
+            # As linhas novas entram no meio das listas do ranking: também recalculado
+            RankingIndex(df, self.ranking_weights),
+        )
+        return Dataset(df, version, self.price_step, self.ranking_weights, source, indexes)
+
+
+def load_dataset(data_file, columns_dir, price_step, ranking_weights):
+    """Carrega a versão atual dos dados (colunar se estiver em dia com o CSV, senão o CSV)."""
+    if _columns_are_current(data_file, columns_dir):
+        version = file_fingerprint(os.path.join(columns_dir, MANIFEST))
+        source = {'kind': 'columns', 'path': columns_dir, 'fingerprint': version}
+        return Dataset(read_columns(columns_dir), version, price_step, ranking_weights, source)
+
+    version = file_fingerprint(data_file)
+    hasher, size = _digest(data_file)
+    df = read_csv_clean(data_file)
+    source = {
+        'kind': 'csv', 'path': data_file, 'fingerprint': version,
+        # Cabeçalho completo do CSV, para ler as linhas acrescentadas (que vêm sem cabeçalho)
+        'size': size, 'hasher': hasher, 'columns': list(pd.read_csv(data_file, nrows=0).columns),
+    }
+    return Dataset(df, version, price_step, ranking_weights, source)
+
+
+def refresh_dataset(current, data_file, columns_dir, force=False):
+    """Nova versão dos dados se os arquivos mudaram desde `current` (ou `force`); None caso contrário."""
+    source = current.source
+    if force:
+        return load_dataset(data_file, columns_dir, current.price_step, current.ranking_weights)
+    if _columns_are_current(data_file, columns_dir):
+        fingerprint = file_fingerprint(os.path.join(columns_dir, MANIFEST))
+        if source.get('kind') == 'columns' and fingerprint == source['fingerprint']:
+            return None
+        return load_dataset(data_file, columns_dir, current.price_step, current.ranking_weights)
+
+    fingerprint = file_fingerprint(data_file)
+    if source.get('kind') != 'csv' or source['path'] != data_file:
+        return load_dataset(data_file, columns_dir, current.price_step, current.ranking_weights)
+    if fingerprint == source['fingerprint']:
+        return None
+
+    delta = _read_appended_rows(source, data_file)
+    if delta is None:
+        return load_dataset(data_file, columns_dir, current.price_step, current.ranking_weights)
+    rows, consumed, hasher = delta
+    if not len(rows):
+        return None
+    # Se a última linha ainda estava sendo escrita, fica para a próxima verificação
+    new_source = dict(source, size=consumed, hasher=hasher,
+                      fingerprint=fingerprint if consumed == os.path.getsize(data_file) else None)
+    return current.append(rows, fingerprint, new_source)
+
+
+def _columns_are_current(data_file, columns_dir):
+    manifest = read_manifest(columns_dir)
+    return manifest is not None and (
+        not os.path.exists(data_file) or manifest['source'] == file_fingerprint(data_file)
+    )
+
+
+def _digest(path, limit=None):
+    hasher = hashlib.blake2b(digest_size=16)
+    size = 0
+    with open(path, 'rb') as f:
+        while limit is None or size < limit:
+            chunk = f.read(_READ_CHUNK if limit is None else min(_READ_CHUNK, limit - size))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            size += len(chunk)
+    return hasher, size
+
+
+def _read_appended_rows(source, path):
+    # Confere que o conteúdo já lido continua sendo o começo do arquivo
+    old_size = source['size']
+    if os.path.getsize(path) < old_size:
+        return None
+    prefix, size = _digest(path, limit=old_size)
+    if size != old_size or prefix.digest() != source['hasher'].digest():
+        return None
+
+    with open(path, 'rb') as f:
+        if old_size:
+            f.seek(old_size - 1)
+            if f.read(1) != b'\n':
+                return None
+        tail = f.read()
+    complete = tail.rfind(b'\n') + 1
+    tail = tail[:complete]
+
+    hasher = source['hasher'].copy()
+    hasher.update(tail)
+    if not tail.strip():
+        return pd.DataFrame(), old_size + complete, hasher
+    rows = read_csv_clean(io.BytesIO(tail), header=None, names=source['columns'])
+    return rows, old_size + complete, hasher
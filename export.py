@@ -0,0 +1,99 @@
+"""Exportação das linhas filtradas em CSV ou Parquet, enviada em blocos.
+
+Cada bloco de linhas é convertido e entregue antes de o próximo ser lido, de
+modo que a memória usada não cresce com o tamanho do resultado. O Parquet é
+opcional: exige o pacote `pyarrow` e grava um grupo de linhas por bloco.
+"""
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Tipo de conteúdo e extensão do arquivo de cada formato
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+
+def available_formats():
+    """Formatos de exportação suportados neste ambiente."""
+    return tuple(name for name in EXPORT_FORMATS if name == 'csv' or pq is not None)
+
+
+def export_chunks(frames, export_format):
+    """Bytes do arquivo no formato pedido, um pedaço por DataFrame de `frames`."""
+    if export_format == 'parquet':
+        return _parquet_chunks(frames)
+    return _csv_chunks(frames)
+
+
+def _csv_chunks(frames):
+    header = True
+    for frame in frames:
+        yield _plain(frame).to_csv(index=False, header=header).encode('utf-8')
+        header = False
+
+
+def _parquet_chunks(frames):
+    sink = _ChunkSink()
+    writer = None
+    for frame in frames:
+        if writer is None:
+            writer = pq.ParquetWriter(sink, _arrow_schema(frame))
+        table = pa.Table.from_pandas(_plain(frame), schema=writer.schema, preserve_index=False)
+        writer.write_table(table)
+        yield sink.take()
+    if writer is not None:
+        writer.close()
+        yield sink.take()
+
+
+def _plain(frame):
+    # Categóricas como texto: cada bloco levaria todas as categorias da coluna, que podem mudar entre blocos
+    return frame.astype({name: object for name, dtype in frame.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)})
+
+
+def _arrow_schema(frame):
+    # Pelo tipo das colunas, não pelos valores: o primeiro bloco pode vir vazio
+    return pa.schema([
+        (name, pa.from_numpy_dtype(dtype) if pd.api.types.is_numeric_dtype(dtype) else pa.string())
+        for name, dtype in frame.dtypes.items()
+    ])
+
+
+class _ChunkSink:
+    """Arquivo só de escrita que guarda os bytes até serem retirados com `take`."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self):
+        data = b''.join(self._parts)
+        self._parts = []
+        return data
@@ -0,0 +1,33 @@
+class FigureTemplate:
+    """Figura pronta (layout, estilo e traços) em que só os arrays de dados mudam.
+
+    É criada uma única vez a partir do dicionário de uma figura montada com
+    Plotly Express ou `go.Figure` sobre dados de exemplo. A cada pedido, `fill`
+    devolve um novo dicionário com os campos de dados substituídos, sem passar
+    pela validação e pelas cópias profundas dos objetos do Plotly. O layout é
+    compartilhado entre as figuras geradas e não deve ser alterado.
+    """
+
+    def __init__(self, figure):
+        self.data = figure['data']
+        self.layout = figure['layout']
+
+    def to_dict(self):
+        """Modelo como dicionário de figura (p.ex. para enviar ao navegador)."""
+        return {'data': self.data, 'layout': self.layout}
+
+    def fill(self, *traces):
+        """Figura com os campos de `traces[i]` aplicados ao traço `i` do modelo.
+
+        Valores do tipo dict (p.ex. `marker`) são mesclados ao campo do modelo
+        em vez de substituí-lo.
+        """
+        data = []
+        for base, updates in zip(self.data, traces):
+            trace = dict(base)
+            for key, value in updates.items():
+                if isinstance(value, dict):
+                    value = {**base.get(key, {}), **value}
+                trace[key] = value
+            data.append(trace)
+        return {'data': data, 'layout': self.layout}
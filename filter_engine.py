@@ -0,0 +1,129 @@
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Colunas categóricas indexadas pelo motor de filtros
+CATEGORICAL_COLUMNS = ('specialization', 'city1', 'telemedicine')
+
+
+class FilterEngine:
+    """Índices pré-calculados para resolver combinações de filtros em ids de linha.
+
+    Para cada coluna categórica guarda, por valor, o array ordenado das linhas
+    que possuem aquele valor. O preço fica num índice ordenado, o que permite
+    responder faixas com busca binária. Uma consulta devolve as posições das
+    linhas que passam em todos os filtros, em ordem crescente, sem copiar o
+    DataFrame.
+    """
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.all_rows = np.arange(self.n_rows, dtype=np.int64)
+        self.postings = {column: build_postings(df[column]) for column in CATEGORICAL_COLUMNS}
+
+        # Índice de preço: linhas com preço válido ordenadas pelo valor
+        price = df['price'].to_numpy(dtype=float)
+        self.price = price
+        valid = np.flatnonzero(~np.isnan(price))
+        order = np.argsort(price[valid], kind='stable')
+        self.price_rows = valid[order]
+        self.price_sorted = price[valid][order]
+
+    def extended(self, delta, offset):
+        """Novo motor com as linhas de `delta` acrescentadas a partir da posição `offset`.
+
+        As linhas novas têm posições maiores que todas as existentes, então as
+        listas por valor continuam ordenadas apenas concatenando. O motor atual
+        não é alterado (pode estar em uso por outros pedidos).
+        """
+        engine = copy.copy(self)
+        engine.n_rows = offset + len(delta)
+        engine.all_rows = np.arange(engine.n_rows, dtype=np.int64)
+        engine.postings = {}
+        for column in CATEGORICAL_COLUMNS:
+            postings = dict(self.postings[column])
+            for value, rows in build_postings(delta[column]).items():
+                previous = postings.get(value)
+                rows = rows + offset
+                postings[value] = rows if previous is None else np.concatenate([previous, rows])
+            engine.postings[column] = postings
+
+        # Intercala os novos preços no índice ordenado
+        price = delta['price'].to_numpy(dtype=float)
+        engine.price = np.concatenate([self.price, price])
+        valid = np.flatnonzero(~np.isnan(price))
+        order = np.argsort(price[valid], kind='stable')
+        new_prices = price[valid][order]
+        positions = np.searchsorted(self.price_sorted, new_prices, side='right')
+        engine.price_sorted = np.insert(self.price_sorted, positions, new_prices)
+        engine.price_rows = np.insert(self.price_rows, positions, valid[order] + offset)
+        return engine
+
+    def rows_for_value(self, column, value):
+        return self.postings[column].get(value, np.empty(0, dtype=np.int64))
+
+    def rows_for_price(self, low, high):
+        start = np.searchsorted(self.price_sorted, low, side='left')
+        stop = np.searchsorted(self.price_sorted, high, side='right')
+        if stop - start == self.n_rows:
+            return self.all_rows
+        return np.sort(self.price_rows[start:stop])
+
+    def query(self, specialization='all', city='all', telemedicine='all', price_range=None):
+        candidates = []
+        if specialization != 'all':
+            candidates.append(self.rows_for_value('specialization', specialization))
+        if city != 'all':
+            candidates.append(self.rows_for_value('city1', city))
+        if telemedicine != 'all':
+            candidates.append(self.rows_for_value('telemedicine', telemedicine))
+        if price_range is not None:
+            candidates.append(self.rows_for_price(price_range[0], price_range[1]))
+
+        if not candidates:
+            return self.all_rows
+
+        # Começa pelos conjuntos menores para que as interseções sejam baratas
+        candidates.sort(key=len)
+        rows = candidates[0]
+        for other in candidates[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def narrow(self, rows, specialization='all', city='all', telemedicine='all', price_range=None):
+        """Aplica os filtros a um conjunto de linhas já resolvido (ordenado), sem voltar ao total.
+
+        O custo depende de `len(rows)`, não do número de linhas dos dados: útil
+        quando o novo filtro só restringe um resultado anterior.
+        """
+        for column, value in (('specialization', specialization), ('city1', city), ('telemedicine', telemedicine)):
+            if value != 'all' and len(rows):
+                rows = rows[_contains(self.rows_for_value(column, value), rows)]
+        if price_range is not None and len(rows):
+            price = self.price[rows]
+            rows = rows[(price >= price_range[0]) & (price <= price_range[1])]
+        return rows
+
+
+def _contains(sorted_rows, rows):
+    # Máscara de `rows` presentes em `sorted_rows`, por busca binária
+    if not len(sorted_rows):
+        return np.zeros(len(rows), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_rows, rows), len(sorted_rows) - 1)
+    return sorted_rows[positions] == rows
+
+
+def build_postings(series):
+    """Mapeia cada valor distinto da série para o array ordenado de suas posições."""
+    # Valores nulos recebem código -1 e ficam fora do índice, como na máscara `==`
+    codes, uniques = pd.factorize(series, sort=False)
+    positions = np.flatnonzero(codes >= 0)
+    order = positions[np.argsort(codes[positions], kind='stable')]
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {
+        value: order[bounds[i]:bounds[i + 1]].astype(np.int64)
+        for i, value in enumerate(uniques)
+    }
@@ -0,0 +1,185 @@
+"""Histogramas de tempos e tamanhos do painel, somados entre os workers.
+
+Cada processo acumula as observações em memória (um `bisect` e duas somas por
+observação) e grava periodicamente um arquivo JSON próprio no diretório de
+métricas. A rota `/metrics` junta os arquivos de todos os processos e devolve
+o resultado no formato de texto do Prometheus. Como os valores são
+cumulativos, arquivos de workers já encerrados continuam sendo somados; limpe
+o diretório ao reiniciar o serviço.
+"""
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Limites (superiores, inclusivos) das faixas de cada tipo de histograma
+SECONDS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(2 ** k for k in range(8, 26, 2))
+ROWS_BUCKETS = (0, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class Histogram:
+    """Contagens por faixa, soma e total de observações."""
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Histogramas com rótulos de um processo, gravados em `directory` e somados na leitura."""
+
+    def __init__(self, directory, flush_interval=1.0):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._definitions = {}
+        self._series = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_flush = 0.0
+
+    def define(self, name, help_text, bounds):
+        self._definitions[name] = (help_text, tuple(bounds))
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._series.get(key)
+            if histogram is None:
+                histogram = self._series[key] = Histogram(self._definitions[name][1])
+            histogram.observe(value)
+
+    @contextmanager
+    def stage(self, name, metric='dashboard_stage_seconds'):
+        """Mede o tempo próprio de uma etapa (sem o das etapas aninhadas dentro dela)."""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        # Cada nível acumula o tempo gasto nas etapas filhas, descontado no final
+        stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.observe(metric, elapsed - children, stage=name)
+
+    def flush(self, force=False):
+        """Grava as contagens deste processo (no máximo uma vez por `flush_interval`)."""
+        now = time.monotonic()
+        if not force and now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        with self._lock:
+            series = [
+                [name, dict(labels), list(histogram.bounds), list(histogram.counts), histogram.sum]
+                for (name, labels), histogram in self._series.items()
+            ]
+        path = os.path.join(self.directory, f'metrics-{os.getpid()}.json')
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(series, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            # Métricas nunca devem derrubar o painel
+            pass
+
+    def collect(self):
+        """Histogramas somados entre os arquivos de todos os processos."""
+        merged = {}
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith('metrics-') and filename.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), encoding='utf-8') as f:
+                    series = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, bounds, counts, total in series:
+                definition = self._definitions.get(name)
+                # Arquivos de outra versão do código, com outras faixas, são ignorados
+                if definition is None or tuple(bounds) != definition[1]:
+                    continue
+                key = (name, tuple(sorted(labels.items())))
+                histogram = merged.get(key)
+                if histogram is None:
+                    histogram = merged[key] = Histogram(definition[1])
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+        return merged
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus."""
+        self.flush(force=True)
+        merged = self.collect()
+        lines = []
+        for name, (help_text, bounds) in self._definitions.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for (series_name, labels), histogram in sorted(merged.items()):
+                if series_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(bounds + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(float(bound))
+                    lines.append(f'{name}_bucket{format_labels(labels + (("le", le),))} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(labels)} {histogram.sum!r}')
+                lines.append(f'{name}_count{format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        '{}="{}"'.format(key, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+class SlowRequestProfiler:
+    """Perfila uma amostra dos pedidos e grava o perfil (cProfile) dos que passam do limite."""
+
+    def __init__(self, directory, sample_rate, slow_seconds):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+
+    def start(self):
+        if random.random() >= self.sample_rate:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Outro perfilador já está ativo nesta thread
+            return None
+        return profiler
+
+    def finish(self, profiler, elapsed, label):
+        profiler.disable()
+        if elapsed < self.slow_seconds:
+            return None
+        safe_label = ''.join(c if c.isalnum() or c in '-_' else '_' for c in label)[:60]
+        path = os.path.join(
+            self.directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{safe_label}-{elapsed * 1000:.0f}ms.prof'
+        )
+        profiler.dump_stats(path)
+        return path
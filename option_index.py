@@ -0,0 +1,114 @@
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from search_index import normalize_text
+
+# Dimensões dos filtros em cascata: cada uma é filtrada pelo valor escolhido na outra
+OPTION_DIMENSIONS = ('specialization', 'city1')
+
+
+class _PrefixIndex:
+    """Palavras normalizadas dos valores de uma dimensão, ordenadas para busca por prefixo."""
+
+    def __init__(self, labels):
+        entries = sorted(
+            (word, position)
+            for position, label in enumerate(labels)
+            for word in set(normalize_text(label).split())
+        )
+        self.words = [word for word, _ in entries]
+        self.positions = np.array([position for _, position in entries], dtype=np.int64)
+        self.size = len(labels)
+
+    def matching(self, query):
+        """Máscara dos valores em que cada palavra de `query` é início de alguma palavra do valor."""
+        matched = np.ones(self.size, dtype=bool)
+        for token in normalize_text(query).split():
+            # Todas as palavras que começam com `token` ficam entre token e token + '\uffff'
+            low = bisect_left(self.words, token)
+            high = bisect_left(self.words, token + '\uffff', lo=low)
+            token_matched = np.zeros(self.size, dtype=bool)
+            token_matched[self.positions[low:high]] = True
+            matched &= token_matched
+        return matched
+
+
+class OptionIndex:
+    """Opções dos filtros de especialização e cidade, buscadas por prefixo no servidor.
+
+    Guarda quantos profissionais existem em cada par (especialização, cidade),
+    para que cada lista só ofereça valores que existem sob o valor escolhido no
+    outro filtro, ordenados pela contagem. A busca ignora acentos e casa o
+    início das palavras ("pau" encontra "São Paulo").
+    """
+
+    def __init__(self, df):
+        self.labels = {dimension: sorted(df[dimension].dropna().unique()) for dimension in OPTION_DIMENSIONS}
+        self.pair_counts = self._count_pairs(df)
+        self._build_lookups()
+
+    @classmethod
+    def from_counts(cls, labels, pair_counts):
+        """Índice a partir de rótulos e contagens já calculados (p.ex. gravados junto com os shards)."""
+        index = cls.__new__(cls)
+        index.labels = {dimension: list(labels[dimension]) for dimension in OPTION_DIMENSIONS}
+        index.pair_counts = np.asarray(pair_counts, dtype=np.int64)
+        index._build_lookups()
+        return index
+
+    def extended(self, delta):
+        """Novo índice com as contagens de `delta` somadas (o atual não é alterado)."""
+        index = OptionIndex.__new__(OptionIndex)
+        index.labels = {
+            dimension: sorted(set(self.labels[dimension]).union(delta[dimension].dropna().unique()))
+            for dimension in OPTION_DIMENSIONS
+        }
+        # Realoca as contagens atuais nas posições dos rótulos novos e soma as do trecho novo
+        rows = np.searchsorted(index.labels['specialization'], self.labels['specialization'])
+        columns = np.searchsorted(index.labels['city1'], self.labels['city1'])
+        index.pair_counts = index._count_pairs(delta)
+        index.pair_counts[np.ix_(rows, columns)] += self.pair_counts
+        index._build_lookups()
+        return index
+
+    def _count_pairs(self, df):
+        spec_codes = pd.Categorical(df['specialization'], categories=self.labels['specialization']).codes
+        city_codes = pd.Categorical(df['city1'], categories=self.labels['city1']).codes
+        # Linhas sem especialização ou sem cidade não entram em nenhum par
+        valid = (spec_codes >= 0) & (city_codes >= 0)
+        n_cities = len(self.labels['city1'])
+        flat = spec_codes[valid].astype(np.int64) * n_cities + city_codes[valid]
+        counts = np.bincount(flat, minlength=len(self.labels['specialization']) * n_cities)
+        return counts.reshape(len(self.labels['specialization']), n_cities)
+
+    def _build_lookups(self):
+        self.positions = {
+            dimension: {label: position for position, label in enumerate(labels)}
+            for dimension, labels in self.labels.items()
+        }
+        self.prefixes = {dimension: _PrefixIndex(labels) for dimension, labels in self.labels.items()}
+
+    def counts(self, dimension, other_value):
+        """Contagem de cada valor de `dimension` sob o valor do outro filtro ('all' para todos)."""
+        other = OPTION_DIMENSIONS[1 - OPTION_DIMENSIONS.index(dimension)]
+        axis = 1 if dimension == 'specialization' else 0
+        if other_value == 'all':
+            return self.pair_counts.sum(axis=axis)
+        position = self.positions[other].get(other_value)
+        if position is None:
+            return np.zeros(len(self.labels[dimension]), dtype=np.int64)
+        return self.pair_counts[:, position] if axis == 1 else self.pair_counts[position]
+
+    def top(self, dimension, search_value, other_value, limit):
+        """Até `limit` pares (valor, contagem) que casam com a busca, da maior para a menor contagem."""
+        counts = self.counts(dimension, other_value)
+        candidates = counts > 0
+        if search_value:
+            candidates &= self.prefixes[dimension].matching(search_value)
+        positions = np.flatnonzero(candidates)
+        # Ordenação estável: empates ficam em ordem alfabética
+        positions = positions[np.argsort(-counts[positions], kind='stable')][:limit]
+        labels = self.labels[dimension]
+        return [(labels[position], int(counts[position])) for position in positions]
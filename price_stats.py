@@ -0,0 +1,128 @@
+import math
+
+import numpy as np
+
+# Máximo de pontos atípicos enviados no boxplot
+MAX_OUTLIERS = 200
+
+
+def value_counts(sorted_values):
+    """Valores distintos e quantas vezes cada um aparece, a partir dos valores já ordenados."""
+    sorted_values = np.asarray(sorted_values)
+    if not len(sorted_values):
+        return sorted_values, np.empty(0, dtype=np.int64)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(sorted_values)) + 1])
+    return sorted_values[starts], np.diff(np.append(starts, len(sorted_values)))
+
+
+def merge_counts(values, counts):
+    """Junta pares (valor, contagem) de várias partes: valores distintos em ordem crescente e contagens somadas."""
+    values, positions = np.unique(values, return_inverse=True)
+    merged = np.zeros(len(values), dtype=np.int64)
+    np.add.at(merged, positions, counts)
+    return values, merged
+
+
+def histogram_bins(values, counts, nbins):
+    """Faixas e contagens do histograma, como o autobin do plotly.js com `nbinsx`.
+
+    Recebe os valores distintos em ordem crescente (sem nulos) e quantas vezes
+    cada um aparece. Reproduz a escolha de tamanho "bonito" (2, 5 ou 10 × 10^k,
+    arredondando para cima) e o deslocamento de meia unidade quando todos os
+    valores são inteiros, para que o gráfico fique igual ao que o navegador
+    calcularia a partir dos dados brutos.
+    """
+    data_min, data_max = float(values[0]), float(values[-1])
+    span = data_max - data_min
+    if span == 0:
+        size = 1.0
+        start = data_min - 0.5
+    else:
+        rough = span / nbins
+        base = 10 ** math.floor(math.log10(rough))
+        size = base * next((step for step in (2, 5) if step > rough / base), 10)
+        # Primeiro "tick" acima do mínimo, recuado uma faixa
+        start = math.ceil((data_min - span * 1e-4) / size) * size - size
+        start = _shift_start(start, size, values, counts, data_min, data_max)
+
+    count = 1 + math.floor((data_max - start) / size)
+    edges = start + size * np.arange(count + 1)
+    # Faixas fechadas à esquerda: [edges[i], edges[i + 1])
+    cumulative = np.concatenate([[0], np.cumsum(counts)])
+    return edges, np.diff(cumulative[np.searchsorted(values, edges, side='left')])
+
+
+def _shift_start(start, size, values, counts, data_min, data_max):
+    # Mesmo critério do plotly.js (autoShiftNumericBins) para evitar valores nas bordas
+    def near_edge(v):
+        return np.fmod(1 + (v - start) * 100 / size, 100) < 2
+
+    if np.all(np.mod(values, 1) == 0):
+        if size < 1:
+            return data_min - 0.5 * size
+        start -= 0.5
+        if start + size < data_min:
+            start += size
+        return start
+
+    total = counts.sum()
+    mid_count = counts[near_edge(values + size / 2)].sum()
+    edge_count = counts[near_edge(values)].sum()
+    if mid_count < total * 0.1 and (
+            edge_count > total * 0.3 or near_edge(data_min) or near_edge(data_max)):
+        shift = size / 2
+        start += shift if start + shift < data_min else -shift
+    return start
+
+
+def _hazen(values, ends, q):
+    # Quantil pelo método 'hazen' do NumPy sobre os valores repetidos conforme as contagens
+    # (`ends`: contagens acumuladas), com a mesma interpolação de np.percentile
+    n = int(ends[-1])
+    virtual = n * q + 0.5 - 1
+    if virtual >= n - 1:
+        previous = following = n - 1
+    elif virtual < 0:
+        previous = following = 0
+    else:
+        previous = math.floor(virtual)
+        following = previous + 1
+    gamma = virtual - math.floor(virtual)
+    a, b = values[np.searchsorted(ends, [previous, following], side='right')]
+    diff = b - a
+    return b - diff * (1 - gamma) if gamma >= 0.5 else a + diff * gamma
+
+
+def box_stats(values, counts, max_outliers=MAX_OUTLIERS):
+    """Quartis, cercas e pontos atípicos como o boxplot do plotly.js calcula.
+
+    Recebe os valores distintos em ordem crescente e suas contagens. Quartis
+    pelo método 'linear' do plotly.js (equivalente ao 'hazen' do NumPy);
+    cercas no valor mais extremo dentro de 1,5 × IQR. Os pontos atípicos são
+    enviados sem repetição e limitados a `max_outliers`.
+    """
+    ends = np.cumsum(counts)
+    q1, median, q3 = (_hazen(values, ends, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    n = len(values)
+    low_index = min(np.searchsorted(values, q1 - 1.5 * iqr, side='left'), n - 1)
+    high_index = max(np.searchsorted(values, q3 + 1.5 * iqr, side='right') - 1, 0)
+    lowerfence = min(q1, values[low_index])
+    upperfence = max(q3, values[high_index])
+
+    outliers = np.concatenate([
+        values[:np.searchsorted(values, lowerfence, side='left')],
+        values[np.searchsorted(values, upperfence, side='right'):],
+    ])
+    if len(outliers) > max_outliers:
+        # Mantém os extremos e amostra o restante de forma uniforme
+        outliers = outliers[np.linspace(0, len(outliers) - 1, max_outliers).round().astype(int)]
+
+    return {
+        'q1': float(q1),
+        'median': float(median),
+        'q3': float(q3),
+        'lowerfence': float(lowerfence),
+        'upperfence': float(upperfence),
+        'outliers': outliers,
+    }
@@ -0,0 +1,169 @@
+"""Ranking de custo-benefício: mais avaliações pelo menor preço.
+
+A pontuação de cada linha é `(1 + reviews) ** peso_avaliações / (price / 100) **
+peso_preço` (com os dois pesos em 1, avaliações por R$ 100 de consulta). Linhas
+sem preço positivo ou sem avaliações ficam fora do ranking.
+
+O `RankingIndex` guarda as posições das linhas já ordenadas pela pontuação (a
+maior primeiro, empates pela posição): uma lista geral e uma por especialização
+× cidade. As k melhores de uma combinação de filtros saem da intercalação, por
+heap, das listas que a especialização e a cidade escolhidas alcançam, pulando as
+linhas barradas pelos demais filtros. Isso custa O(k log n) quando os demais
+filtros deixam passar boa parte das linhas; quando são seletivos demais, sai
+mais barato escolher direto entre as linhas filtradas.
+"""
+import heapq
+from collections import namedtuple
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+# Pesos das avaliações e do preço na pontuação
+RankingWeights = namedtuple('RankingWeights', ['reviews', 'price'])
+DEFAULT_WEIGHTS = RankingWeights(1.0, 1.0)
+
+# Colunas das linhas do ranking (além da pontuação)
+RANKING_COLUMNS = ['name', 'specialization', 'city1', 'reviews', 'price']
+
+# Preço de referência da pontuação (só muda a escala)
+PRICE_UNIT = 100
+
+# Custos estimados em unidades de uma linha da seleção direta (vetorizada): abrir cada lista
+# intercalada pelo heap, tirar cada posição do heap e ler cada posição direto de uma única lista
+_LIST_COST = 150
+_MERGE_COST = 40
+_BLOCK_COST = 2
+
+# Tamanho máximo dos blocos lidos de cada lista
+_MAX_BLOCK = 4096
+
+
+def ranking_scores(reviews, price, weights):
+    """Pontuação de cada linha; NaN para as que ficam fora do ranking."""
+    reviews = np.asarray(reviews, dtype=float)
+    price = np.asarray(price, dtype=float)
+    with np.errstate(all='ignore'):
+        scores = np.power(1 + reviews, weights.reviews) / np.power(price / PRICE_UNIT, weights.price)
+        scores[~((price > 0) & (reviews >= 0) & np.isfinite(scores))] = np.nan
+    return scores
+
+
+class RankingIndex:
+    """Posições das linhas pré-ordenadas pela pontuação, no geral e por especialização × cidade."""
+
+    def __init__(self, df, weights=DEFAULT_WEIGHTS):
+        self.weights = weights
+        self.scores = ranking_scores(df['reviews'].to_numpy(dtype=float, na_value=np.nan),
+                                     df['price'].to_numpy(dtype=float, na_value=np.nan), weights)
+        ranked = np.flatnonzero(~np.isnan(self.scores))
+        # Ordenação estável de posições crescentes: empates ficam pela posição
+        self.order = ranked[np.argsort(-self.scores[ranked], kind='stable')]
+
+        # Listas por especialização × cidade: a mesma ordem, agrupada de forma estável pelo par
+        spec_codes, specs = pd.factorize(df['specialization'].iloc[self.order])
+        city_codes, cities = pd.factorize(df['city1'].iloc[self.order])
+        pairs = (spec_codes.astype(np.int64) + 1) * (len(cities) + 1) + (city_codes + 1)
+        grouping = np.argsort(pairs, kind='stable')
+        self.grouped = self.order[grouping]
+        # Chaves da intercalação: a menor sai primeiro
+        self.grouped_keys = -self.scores[self.grouped]
+
+        pairs = pairs[grouping]
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(pairs)) + 1])
+        stops = np.append(starts[1:], len(pairs))
+        spec_labels = [None] + list(specs)
+        city_labels = [None] + list(cities)
+        self.by_specialization = {}
+        self.by_city = {}
+        self.segments = {}
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            spec, city = divmod(int(pairs[start]), len(cities) + 1)
+            segment = (start, stop)
+            self.segments[spec_labels[spec], city_labels[city]] = segment
+            self.by_specialization.setdefault(spec_labels[spec], []).append(segment)
+            self.by_city.setdefault(city_labels[city], []).append(segment)
+
+    def top(self, rows, specialization, city, k):
+        """As até `k` linhas de `rows` com maior pontuação, da maior para a menor.
+
+        `rows` são as posições (ordenadas) que passam em todos os filtros; a
+        especialização e a cidade escolhidas dizem em quais listas procurá-las.
+        """
+        if specialization == 'all' and city == 'all':
+            segments = None
+            candidates = len(self.order)
+        else:
+            segments = self._segments(specialization, city)
+            candidates = sum(stop - start for start, stop in segments)
+        if k <= 0 or not len(rows) or not candidates:
+            return np.empty(0, dtype=np.int64)
+        # Em média, acha-se uma linha de `rows` a cada candidates / len(rows) posições das listas
+        expected = min(k * candidates / len(rows), candidates)
+        if segments is None or len(segments) == 1:
+            cost = _BLOCK_COST * expected
+        else:
+            cost = _LIST_COST * len(segments) + _MERGE_COST * expected
+        if cost >= len(rows):
+            return self._select(rows, k)
+        return self._scan(segments, rows, k)
+
+    def _segments(self, specialization, city):
+        if specialization == 'all':
+            return self.by_city.get(city, [])
+        if city == 'all':
+            return self.by_specialization.get(specialization, [])
+        segment = self.segments.get((specialization, city))
+        return [segment] if segment else []
+
+    def _scan(self, segments, rows, k):
+        found = []
+        count = 0
+        for block in self._blocks(segments, k):
+            positions = np.minimum(np.searchsorted(rows, block), len(rows) - 1)
+            hits = block[rows[positions] == block][:k - count]
+            found.append(hits)
+            count += len(hits)
+            if count >= k:
+                break
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def _blocks(self, segments, k):
+        # Blocos crescentes de posições na ordem do ranking
+        if segments is None or len(segments) == 1:
+            source = self.order if segments is None else self.grouped
+            start, stop = (0, len(source)) if segments is None else segments[0]
+            size = k
+            while start < stop:
+                yield source[start:min(start + size, stop)]
+                start += size
+                size = min(size * 2, _MAX_BLOCK)
+            return
+        merged = heapq.merge(*(self._stream(start, stop, k) for start, stop in segments))
+        size = k
+        while True:
+            block = np.fromiter((row for _, row in islice(merged, size)), dtype=np.int64)
+            if not len(block):
+                return
+            yield block
+            size = min(size * 2, _MAX_BLOCK)
+
+    def _stream(self, start, stop, k):
+        # Pares (-pontuação, posição) de uma lista, convertidos em blocos crescentes
+        size = k
+        while start < stop:
+            end = min(start + size, stop)
+            yield from zip(self.grouped_keys[start:end].tolist(), self.grouped[start:end].tolist())
+            start = end
+            size = min(size * 2, _MAX_BLOCK)
+
+    def _select(self, rows, k):
+        scores = self.scores[rows]
+        ranked = ~np.isnan(scores)
+        rows, scores = rows[ranked], scores[ranked]
+        if len(rows) > k:
+            # Só as linhas que alcançam a k-ésima pontuação (com os empates nela)
+            threshold = np.partition(scores, len(scores) - k)[len(scores) - k]
+            kept = scores >= threshold
+            rows, scores = rows[kept], scores[kept]
+        return rows[np.argsort(-scores, kind='stable')[:k]]
@@ -0,0 +1,86 @@
+import threading
+from collections import OrderedDict
+
+
+def refinement_filters(previous, filters):
+    """Filtros que faltam aplicar às linhas de `previous` para chegar em `filters`.
+
+    Só vale quando o novo resultado é garantidamente um subconjunto do
+    anterior: cada filtro categórico igual ou saindo de 'all', a faixa de preço
+    contida na anterior e o termo de busca contendo o anterior (a busca é por
+    substring, então quem contém o termo maior contém o menor). Filtros que não
+    mudaram voltam como neutros. Devolve None se não for um refinamento.
+    """
+    residual = []
+    for old, new in zip(previous[:3], filters[:3]):
+        if new == old:
+            residual.append('all')
+        elif old == 'all':
+            residual.append(new)
+        else:
+            return None
+
+    (old_low, old_high), (low, high) = previous[3], filters[3]
+    if low < old_low or high > old_high:
+        return None
+    residual.append(None if (low, high) == (old_low, old_high) else (low, high))
+
+    old_term, term = previous[4], filters[4]
+    if old_term not in term:
+        return None
+    residual.append('' if term == old_term else term)
+    return tuple(residual)
+
+
+class RefinementCache:
+    """Último conjunto de linhas filtradas de cada sessão (LRU, por processo).
+
+    Guarda uma entrada (`FilteredRows`) por sessão, para que o próximo passo
+    de um refinamento filtre só o resultado anterior. Conjuntos maiores que
+    `max_session_bytes` não são guardados (refiltrar a partir deles custaria
+    quase o mesmo que partir do total), e as sessões menos recentes são
+    descartadas quando o número de sessões ou o total de bytes passa do limite.
+    """
+
+    def __init__(self, max_sessions=256, max_bytes=128 * 1024 * 1024, max_session_bytes=8 * 1024 * 1024):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.max_session_bytes = max_session_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, session_id, version):
+        """Entrada da sessão, se ainda for da versão `version` dos dados."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None:
+                return None
+            if entry.dataset.version != version:
+                # Entrada de uma versão substituída: não serve mais e prende os dados antigos
+                self._remove(session_id)
+                return None
+            self._entries.move_to_end(session_id)
+            return entry
+
+    def put(self, session_id, entry):
+        with self._lock:
+            if session_id in self._entries:
+                self._remove(session_id)
+            if entry.rows.nbytes > self.max_session_bytes:
+                return
+            self._entries[session_id] = entry
+            self._bytes += entry.rows.nbytes
+            while len(self._entries) > self.max_sessions or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.rows.nbytes
+
+    def purge(self, keep_version):
+        """Descarta as sessões cujas entradas são de versões dos dados diferentes de `keep_version`."""
+        with self._lock:
+            for session_id in [session_id for session_id, entry in self._entries.items()
+                               if entry.dataset.version != keep_version]:
+                self._remove(session_id)
+
+    def _remove(self, session_id):
+        self._bytes -= self._entries.pop(session_id).rows.nbytes
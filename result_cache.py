@@ -0,0 +1,193 @@
+import hashlib
+import io
+import os
+import sqlite3
+import stat
+import threading
+import time
+
+import numpy as np
+import orjson
+import pandas as pd
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+CREATE TABLE IF NOT EXISTS stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Prefixo do valor gravado: arrays numpy (p.ex. linhas filtradas) ou JSON (figuras, KPIs e registros).
+# Nenhum dos dois executa código ao ser lido; entradas em outro formato contam como ausentes
+_ARRAY = b'N'
+_JSON = b'J'
+
+
+def private_directory(path):
+    """Cria `path` só para o usuário atual, ou recusa um diretório existente que outros possam alterar."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(f'{path} precisa ser um diretório do usuário atual, sem escrita para grupo e outros')
+    return path
+
+
+class ResultCache:
+    """Cache de resultados em SQLite, compartilhado pelos workers do gunicorn.
+
+    Todos os processos da mesma máquina abrem o mesmo arquivo, então um
+    resultado calculado por um worker é reaproveitado pelos outros. As entradas
+    são removidas pela ordem do último uso (LRU) quando o limite de entradas ou
+    de bytes é ultrapassado. Cada entrada guarda a versão do conjunto de dados
+    em que foi calculada; quando os dados mudam, as entradas de outras versões
+    deixam de ser encontradas e são apagadas com `purge`.
+
+    O diretório precisa ser privado (ver `private_directory`), e os valores
+    são gravados como arrays numpy ou JSON: valores que não cabem nesses
+    formatos são calculados a cada vez, sem cache.
+    """
+
+    def __init__(self, directory, max_entries=512, max_bytes=64 * 1024 * 1024):
+        private_directory(directory)
+        self.path = os.path.join(directory, 'results.sqlite3')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _connect(self):
+        # Uma conexão por thread e por processo (os workers são criados por fork)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _key(self, version, key):
+        return hashlib.sha1(repr((version, key)).encode('utf-8')).hexdigest()
+
+    def _count(self, conn, name):
+        conn.execute(
+            'INSERT INTO stats (name, value) VALUES (?, 1) '
+            'ON CONFLICT(name) DO UPDATE SET value = value + 1',
+            (name,),
+        )
+
+    def get_or_compute(self, version, key, compute):
+        """Devolve o resultado em cache para `key` na versão `version` ou calcula, guarda e devolve."""
+        digest = self._key(version, key)
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT value FROM entries WHERE key = ?', (digest,)).fetchone()
+            value = _decode(row[0]) if row is not None else None
+            if value is not None:
+                conn.execute('UPDATE entries SET last_used = ? WHERE key = ?', (time.time(), digest))
+                self._count(conn, 'hits')
+                return value
+            self._count(conn, 'misses')
+        except sqlite3.Error:
+            # O cache nunca deve derrubar o painel: sem cache, apenas recalcula
+            return compute()
+
+        value = compute()
+        try:
+            self._store(conn, digest, version, value)
+        except sqlite3.Error:
+            pass
+        return value
+
+    def _store(self, conn, digest, version, value):
+        blob = _encode(value)
+        if blob is None or len(blob) > self.max_bytes:
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, version, value, size, last_used) VALUES (?, ?, ?, ?, ?)',
+                (digest, version, blob, len(blob), time.time()),
+            )
+            count, total = conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+            # Remove as entradas menos usadas até caber nos limites
+            for old_key, size in conn.execute('SELECT key, size FROM entries ORDER BY last_used').fetchall():
+                if count <= self.max_entries and total <= self.max_bytes:
+                    break
+                conn.execute('DELETE FROM entries WHERE key = ?', (old_key,))
+                self._count(conn, 'evictions')
+                count -= 1
+                total -= size
+            conn.execute('COMMIT')
+        except sqlite3.Error:
+            conn.execute('ROLLBACK')
+            raise
+
+    def purge(self, keep_version):
+        """Apaga as entradas calculadas em versões dos dados diferentes de `keep_version`."""
+        try:
+            self._connect().execute('DELETE FROM entries WHERE version != ?', (keep_version,))
+        except sqlite3.Error:
+            pass
+
+    def stats(self):
+        """Contadores de acertos, faltas e remoções somados entre todos os workers."""
+        conn = self._connect()
+        stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        stats.update(dict(conn.execute('SELECT name, value FROM stats').fetchall()))
+        stats['entries'], stats['bytes'] = conn.execute(
+            'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries'
+        ).fetchone()
+        return stats
+
+
+def _encode(value):
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        buffer = io.BytesIO()
+        np.save(buffer, value, allow_pickle=False)
+        return _ARRAY + buffer.getvalue()
+    try:
+        return _JSON + orjson.dumps(value, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    except TypeError:
+        return None
+
+
+def _json_default(value):
+    # Arrays que o orjson não serializa direto (p.ex. não contíguos), escalares numpy e nulos do pandas
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NA or value is pd.NaT:
+        return None
+    raise TypeError(f'Tipo sem formato no cache: {type(value).__name__}')
+
+
+def _decode(blob):
+    blob = bytes(blob)
+    try:
+        if blob.startswith(_ARRAY):
+            return np.load(io.BytesIO(blob[1:]), allow_pickle=False)
+        if blob.startswith(_JSON):
+            return orjson.loads(blob[1:])
+    except ValueError:
+        pass
+    return None
+
+
+def file_fingerprint(path):
+    """Identifica uma versão de arquivo pelo caminho, tamanho e data de modificação.
+
+    Vai para o navegador como versão dos dados: só o hash, sem expor o caminho.
+    """
+    stat = os.stat(path)
+    identity = f'{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}'
+    return hashlib.blake2b(identity.encode('utf-8'), digest_size=8).hexdigest()
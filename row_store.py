@@ -0,0 +1,108 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from price_stats import value_counts
+from ranking import RANKING_COLUMNS
+from table_index import TABLE_COLUMNS
+
+
+def rows_key(version, rows):
+    """Chave curta e estável para um conjunto de linhas (posições) numa versão dos dados."""
+    hasher = hashlib.blake2b(str(version).encode(), digest_size=16)
+    hasher.update(rows.tobytes())
+    return hasher.hexdigest()
+
+
+def pack_rows(rows, size):
+    """Posições (ordenadas) de `size` linhas como máscara de bits: 1 bit por linha, qualquer que seja o total."""
+    mask = np.zeros(size, dtype=bool)
+    mask[rows] = True
+    return np.packbits(mask)
+
+
+def unpack_rows(packed, size):
+    """Posições gravadas por `pack_rows`, no mesmo formato das calculadas pelos filtros."""
+    return np.flatnonzero(np.unpackbits(packed, count=size)).astype(np.int64, copy=False)
+
+
+class FilteredRows:
+    """Linhas que passam numa combinação de filtros e os dados derivados delas.
+
+    Guarda a versão dos dados (`dataset`) em que as linhas foram calculadas, para
+    que todas as saídas de um mesmo estado usem a mesma versão.
+    """
+
+    def __init__(self, dataset, filters, rows):
+        self.dataset = dataset
+        self.filters = filters
+        self.rows = rows
+        self.key = rows_key(dataset.version, rows)
+        # Agregados calculados sob demanda, uma única vez por conjunto de linhas
+        self.aggregates = None
+
+    @property
+    def total(self):
+        return len(self.rows)
+
+    def price_counts(self):
+        """Preços não nulos distintos das linhas, em ordem crescente, e quantas linhas têm cada um."""
+        prices = self.dataset.filter_engine.price[self.rows]
+        return value_counts(np.sort(prices[~np.isnan(prices)]))
+
+    def table_page(self, sort_by, page_current, page_size):
+        """Linhas da página pedida da tabela (colunas de TABLE_COLUMNS), a página e o total de páginas."""
+        data = self.dataset
+        page_rows, page_current, page_count = data.table_index.page(self.rows, sort_by, page_current, page_size)
+        return data.df.iloc[page_rows][TABLE_COLUMNS], page_current, page_count
+
+    def top(self, k):
+        """As `k` linhas de maior pontuação no ranking (colunas de RANKING_COLUMNS e `score`), da maior para a menor."""
+        data = self.dataset
+        specialization, city = self.filters[:2]
+        positions = data.ranking_index.top(self.rows, specialization, city, k)
+        return data.df.iloc[positions][RANKING_COLUMNS].assign(score=data.ranking_index.scores[positions])
+
+    def frames(self, columns, chunk_rows):
+        """As linhas em blocos de até `chunk_rows` (ao menos um, talvez vazio), na ordem dos dados."""
+        df = self.dataset.df
+        for start in range(0, max(len(self.rows), 1), chunk_rows):
+            yield df.iloc[self.rows[start:start + chunk_rows]][columns]
+
+
+class RowStore:
+    """Conjuntos de linhas filtradas guardados no servidor por chave (LRU, por processo).
+
+    Os callbacks recebem apenas a chave pelo navegador. Se ela não estiver neste
+    worker (outro processo atendeu o pedido anterior), quem chama recalcula as
+    linhas a partir dos filtros.
+    """
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, entry):
+        with self._lock:
+            # Mantém uma entrada já existente (e seus agregados) para a mesma chave
+            entry = self._entries.setdefault(entry.key, entry)
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def purge(self, keep_version):
+        """Descarta as entradas calculadas em versões dos dados diferentes de `keep_version`."""
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.dataset.version != keep_version]:
+                del self._entries[key]
@@ -0,0 +1,138 @@
+import copy
+import functools
+import sys
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+# Colunas consultadas pela caixa de busca
+SEARCH_COLUMNS = ('name', 'city1', 'specialization')
+
+# Tamanho dos n-gramas: trigramas para consultas longas, 1 e 2 para consultas curtas
+NGRAM_SIZES = (1, 2, 3)
+
+
+@functools.lru_cache(maxsize=1)
+def combining_pattern():
+    """Classe de regex (sintaxe do JavaScript com a flag `u`) dos caracteres que `normalize_text` remove.
+
+    O JavaScript não tem a classe combinatória do Unicode: o navegador recebe
+    esta lista para tirar os mesmos acentos que o servidor.
+    """
+    ranges = []
+    for code in range(sys.maxunicode + 1):
+        if unicodedata.combining(chr(code)):
+            if ranges and ranges[-1][1] == code - 1:
+                ranges[-1][1] = code
+            else:
+                ranges.append([code, code])
+    return '[' + ''.join(f'\\u{{{low:x}}}-\\u{{{high:x}}}' for low, high in ranges) + ']'
+
+
+def normalize_text(text):
+    """Minúsculas e sem acentos, para que "sao paulo" encontre "São Paulo"."""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+class _ColumnIndex:
+    """Índice invertido de n-gramas sobre os valores distintos de uma coluna."""
+
+    def __init__(self, series):
+        codes, uniques = pd.factorize(series, sort=False)
+        # Nulos mantêm o código -1, que indexa a posição extra (sempre falsa) da máscara
+        self.codes = codes.astype(np.int32)
+        self.value_ids = {value: value_id for value_id, value in enumerate(uniques)}
+        self.values = [normalize_text(value) for value in uniques]
+        self.grams = {gram: np.array(ids, dtype=np.int32) for gram, ids in _gram_postings(self.values).items()}
+
+    def extended(self, series):
+        """Novo índice com os valores de `series` acrescentados ao fim da coluna."""
+        index = copy.copy(self)
+        index.value_ids = dict(self.value_ids)
+        index.values = list(self.values)
+        new_values = []
+        for value in pd.unique(series.dropna()):
+            if value not in index.value_ids:
+                index.value_ids[value] = len(index.values) + len(new_values)
+                new_values.append(normalize_text(value))
+
+        # Só os n-gramas dos valores inéditos mudam
+        index.grams = dict(self.grams)
+        for gram, ids in _gram_postings(new_values, first_id=len(index.values)).items():
+            ids = np.array(ids, dtype=np.int32)
+            previous = index.grams.get(gram)
+            index.grams[gram] = ids if previous is None else np.concatenate([previous, ids])
+        index.values.extend(new_values)
+
+        new_codes = series.astype(object).map(index.value_ids).fillna(-1).to_numpy(dtype=np.int32)
+        index.codes = np.concatenate([self.codes, new_codes])
+        return index
+
+    def matching_values(self, term):
+        """Máscara booleana (com a posição extra dos nulos) dos valores que contêm o termo."""
+        matched = np.zeros(len(self.values) + 1, dtype=bool)
+        size = min(len(term), NGRAM_SIZES[-1])
+        query_grams = {term[i:i + size] for i in range(len(term) - size + 1)}
+        postings = sorted((self.grams.get(gram) for gram in query_grams),
+                          key=lambda ids: -1 if ids is None else len(ids))
+        if not postings or postings[0] is None:
+            return matched
+
+        candidates = postings[0]
+        for ids in postings[1:]:
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+            if not len(candidates):
+                return matched
+
+        # Verificação: os n-gramas só garantem candidatos, não a substring inteira
+        if len(term) > size:
+            candidates = [value_id for value_id in candidates if term in self.values[value_id]]
+        matched[candidates] = True
+        return matched
+
+
+class SearchIndex:
+    """Busca textual sem acentos por nome, cidade ou especialização.
+
+    O índice é construído uma vez sobre os valores distintos de cada coluna
+    (cidades e especializações se repetem muito), então o custo por consulta
+    depende dos n-gramas do termo e não do número de linhas.
+    """
+
+    def __init__(self, df):
+        self.columns = {column: _ColumnIndex(df[column]) for column in SEARCH_COLUMNS}
+
+    def extended(self, delta):
+        """Novo índice com as linhas de `delta` acrescentadas (o atual não é alterado)."""
+        index = copy.copy(self)
+        index.columns = {column: self.columns[column].extended(delta[column]) for column in SEARCH_COLUMNS}
+        return index
+
+    def search(self, term, rows):
+        """Filtra `rows` (posições) mantendo as linhas em que alguma coluna contém o termo."""
+        term = normalize_text(term)
+        if not term:
+            return rows
+
+        keep = np.zeros(len(rows), dtype=bool)
+        for index in self.columns.values():
+            matched = index.matching_values(term)
+            if matched.any():
+                keep |= matched[index.codes[rows]]
+        return rows[keep]
+
+
+def _gram_postings(values, first_id=0):
+    grams = {}
+    for value_id, value in enumerate(values, start=first_id):
+        for gram in set(_ngrams(value)):
+            grams.setdefault(gram, []).append(value_id)
+    return grams
+
+
+def _ngrams(value):
+    for size in NGRAM_SIZES:
+        for i in range(len(value) - size + 1):
+            yield value[i:i + size]
@@ -0,0 +1,724 @@
+"""Dados particionados por cidade, consultados por um pool de processos.
+
+A conversão grava as linhas em shards pelo hash da cidade (linhas sem cidade
+vão para o shard 0), cada um no formato colunar de `columnar.py`, na ordem
+original e com a posição global de cada linha. O manifesto guarda os limites
+de preço e as contagens das opções dos filtros, então o app não precisa abrir
+nenhum shard para montar a página.
+
+As consultas vão para um único servidor de shards por máquina, compartilhado
+pelos workers do app. Cada shard é sempre consultado pelo mesmo processo do
+servidor, que o carrega no primeiro uso (com os índices dos filtros, da busca,
+da tabela, do ranking e o cubo) e o mantém em memória. Uma consulta por uma
+cidade vai só para o shard dela; uma consulta por todas é distribuída a todos
+os shards, que devolvem parciais (agregados por rótulo, contagem de cada
+preço e as primeiras linhas do ranking) somados aqui. Os shards guardam também
+os postos de cada coluna da tabela no conjunto completo, então as páginas da
+tabela são localizadas pelas chaves de ordenação, sem juntar as linhas
+anteriores. O resultado é o mesmo de um DataFrame único: as contagens e as faixas de
+preço são exatas, e as somas de preços e avaliações só mudam de ordem (iguais
+quando os valores são inteiros).
+
+Uso:
+    python shards.py [df_cleaned.csv] [df_cleaned.shards] [número de shards]
+"""
+import fcntl
+import hashlib
+import heapq
+import json
+import multiprocessing
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+import pandas as pd
+
+from columnar import read_columns, read_csv_clean, replace_directory, write_columns
+from data_cube import Aggregates, DataCube
+from filter_engine import FilterEngine
+from option_index import OPTION_DIMENSIONS, OptionIndex
+from price_stats import merge_counts
+from ranking import RANKING_COLUMNS, RankingIndex
+from result_cache import file_fingerprint
+from search_index import SearchIndex
+from table_index import TABLE_COLUMNS, TableIndex, page_bounds
+
+SHARD_MANIFEST = 'shards.json'
+SHARDS_FORMAT = 2
+DEFAULT_SHARDS = 16
+
+# Espera máxima pelo servidor de shards ao iniciá-lo e tempo sem clientes até ele sair
+SERVER_START_SECONDS = 30
+SERVER_IDLE_SECONDS = 60
+
+# Parte da memória da máquina que os processos do servidor usam, juntos, para guardar shards
+# (quando o limite não é dado) e o limite usado quando a memória da máquina não é conhecida
+CACHE_MEMORY_SHARE = 0.5
+FALLBACK_CACHE_BYTES = 1024 ** 3
+
+# Arquivo da chave que autentica os workers e o servidor de shards (no diretório privado do cache)
+AUTHKEY_FILE = 'shards.key'
+
+# Comando que inicia o servidor: endereço, processos e limite do cache como argumentos, chave na entrada
+SERVER_COMMAND = 'import sys, shards; shards.serve(*sys.argv[1:], authkey=sys.stdin.buffer.read())'
+
+# Posição de cada linha no conjunto completo: desempata a ordenação da tabela entre shards
+ROW_COLUMN = 'row_position'
+
+# Postos de cada coluna da tabela no conjunto completo (colunas gravadas com cada shard): as chaves de
+# ordenação de shards diferentes são comparáveis entre si
+RANK_PREFIX = 'table_rank_'
+
+# Ordenações da tabela guardadas por shard (as últimas combinações de filtros e ordem pedidas)
+TABLE_ORDERS = 8
+
+# Chaves de ordenação amostradas por shard a cada rodada da busca de uma página da tabela
+TABLE_SAMPLES = 256
+
+# Local e versão dos shards, enviados com cada consulta aos processos do pool
+ShardLocation = namedtuple('ShardLocation', ['directory', 'version', 'price_origin', 'price_step', 'ranking_weights',
+                                             'table_null_ranks'])
+
+
+def shard_of(city, n_shards):
+    """Shard de uma cidade (estável entre execuções); linhas sem cidade ficam no shard 0."""
+    if not isinstance(city, str):
+        return 0
+    return zlib.crc32(city.encode('utf-8')) % n_shards
+
+
+def write_shards(df, out_dir, n_shards, source=None):
+    """Grava `df` em `out_dir`, dividido em `n_shards` por cidade (substituindo atomicamente uma versão anterior)."""
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    staging = tempfile.mkdtemp(prefix='.shards-', dir=parent)
+    codes, cities = pd.factorize(df['city1'])
+    # Shard de cada cidade distinta; o último item atende o código -1 (sem cidade)
+    city_shards = np.array([shard_of(city, n_shards) for city in cities] + [0], dtype=np.int64)
+    row_shards = city_shards[codes]
+    table_index = TableIndex(df)
+
+    partitions = []
+    for shard_id in range(n_shards):
+        positions = np.flatnonzero(row_shards == shard_id)
+        if not len(positions):
+            continue
+        part = df.iloc[positions].reset_index(drop=True)
+        part[ROW_COLUMN] = positions
+        for column in TABLE_COLUMNS:
+            part[RANK_PREFIX + column] = table_index.ranks[column][positions]
+        write_columns(part, os.path.join(staging, _shard_name(shard_id)))
+        partitions.append({'id': shard_id, 'rows': len(positions)})
+
+    options = OptionIndex(df)
+    pairs = np.argwhere(options.pair_counts)
+    manifest = {
+        'format': SHARDS_FORMAT,
+        'rows': len(df),
+        'source': source,
+        'shards': n_shards,
+        'partitions': partitions,
+        'price_min': int(df['price'].min()),
+        'price_max': int(df['price'].max()),
+        'table_null_ranks': {column: int(table_index.null_ranks[column]) for column in TABLE_COLUMNS},
+        # Contagens especialização × cidade não nulas, como (linha, coluna, contagem)
+        'options': {
+            'labels': {dimension: [str(label) for label in options.labels[dimension]] for dimension in OPTION_DIMENSIONS},
+            'pairs': [[int(i), int(j), int(options.pair_counts[i, j])] for i, j in pairs],
+        },
+    }
+    with open(os.path.join(staging, SHARD_MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    replace_directory(staging, out_dir)
+
+
+def read_shard_manifest(directory):
+    path = os.path.join(directory, SHARD_MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    return manifest if manifest.get('format') == SHARDS_FORMAT else None
+
+
+def _shard_name(shard_id):
+    return f'{shard_id:03d}'
+
+
+class _Shard:
+    """Um shard aberto: as colunas (mmap) e os índices usados nas consultas."""
+
+    def __init__(self, df, price_origin, price_step, ranking_weights, table_null_ranks):
+        self.df = df
+        self.filter_engine = FilterEngine(df)
+        self.search_index = SearchIndex(df)
+        self.table_index = TableIndex.from_ranks(
+            {column: df[RANK_PREFIX + column].to_numpy() for column in TABLE_COLUMNS}, table_null_ranks)
+        self.table_orders = OrderedDict()
+        # Mesma origem das faixas de preço em todos os shards
+        self.data_cube = DataCube(df, price_origin=price_origin, price_step=price_step)
+        self.ranking_index = RankingIndex(df, ranking_weights)
+        self.nbytes = int(df.memory_usage(deep=True).sum()) + _array_bytes(
+            [self.filter_engine, self.search_index, self.table_index, self.data_cube, self.ranking_index]
+        )
+
+    def rows(self, filters):
+        specialization, city, telemedicine, price_range, search_term = filters
+        rows = self.filter_engine.query(specialization, city, telemedicine, price_range)
+        if search_term:
+            rows = self.search_index.search(search_term, rows)
+        return rows
+
+    def aggregates(self, filters, rows):
+        # Como no app: sem busca textual, pelas células do cubo; com busca, pelas linhas
+        specialization, city, telemedicine, price_range, search_term = filters
+        if search_term:
+            return self.data_cube.aggregate_rows(rows)
+        return self.data_cube.query(self.filter_engine, specialization, city, telemedicine, price_range)
+
+    def table_order(self, filters, sort_by):
+        """Posições das linhas que passam nos filtros, na ordem da tabela (as últimas ordenações ficam guardadas)."""
+        key = repr((filters, sort_by))
+        ordered = self.table_orders.get(key)
+        if ordered is None:
+            ordered = self.table_orders[key] = self.table_index.sort_rows(self.rows(filters), sort_by)
+            if len(self.table_orders) > TABLE_ORDERS:
+                self.table_orders.popitem(last=False)
+        self.table_orders.move_to_end(key)
+        return ordered
+
+    def table_keys(self, rows, sort_by):
+        """Chaves de ordenação das linhas: postos no conjunto completo e, por último, a posição global."""
+        return np.column_stack(self.table_index.sort_keys(rows, sort_by)
+                               + [self.df[ROW_COLUMN].to_numpy()[rows]]).astype(np.int64)
+
+    def count_below(self, ordered, sort_by, key):
+        """Quantas linhas de `ordered` (na ordem da tabela) têm chave menor que `key`."""
+        low, high = 0, len(ordered)
+        while low < high:
+            middle = (low + high) // 2
+            if tuple(self.table_keys(ordered[middle:middle + 1], sort_by)[0].tolist()) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+
+def _array_bytes(value, seen=None):
+    # Bytes dos arrays e textos alcançáveis a partir de `value` (é onde os índices guardam seus dados)
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (str, bytes)):
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sum(_array_bytes(key, seen) + _array_bytes(item, seen) for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_array_bytes(item, seen) for item in value)
+    if hasattr(value, '__dict__'):
+        return _array_bytes(vars(value), seen)
+    return 0
+
+
+class ShardCache:
+    """Shards abertos num processo do pool, carregados no primeiro uso (LRU limitado em bytes).
+
+    Sem limite (`max_bytes` 0), o processo guarda todos os shards que atende:
+    somados os processos, uma cópia dos dados. O shard mais recente fica mesmo
+    que sozinho passe do limite. Uma versão nova dos shards substitui a anterior
+    do mesmo shard.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+
+    def get(self, location, shard_id):
+        key = (location.directory, shard_id)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == location.version:
+            self._entries.move_to_end(key)
+            return entry[1]
+        if entry is not None:
+            self._bytes -= self._entries.pop(key)[1].nbytes
+
+        df = read_columns(os.path.join(location.directory, _shard_name(shard_id)))
+        shard = _Shard(df, location.price_origin, location.price_step, location.ranking_weights,
+                       location.table_null_ranks)
+        self._entries[key] = (location.version, shard)
+        self._bytes += shard.nbytes
+        while 0 < self.max_bytes < self._bytes and len(self._entries) > 1:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+        return shard
+
+
+def default_cache_bytes(processes):
+    """Limite de memória de cada um dos `processes` processos do servidor: CACHE_MEMORY_SHARE da máquina, dividida."""
+    try:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        memory = FALLBACK_CACHE_BYTES / CACHE_MEMORY_SHARE
+    return max(1, int(memory * CACHE_MEMORY_SHARE) // max(1, processes))
+
+
+# Shards deste processo do pool (criado pelo inicializador do processo)
+_shard_cache = None
+
+
+def _init_process(cache_bytes):
+    global _shard_cache
+    _shard_cache = ShardCache(cache_bytes)
+
+
+def shard_summary(shard_id, location, filters):
+    """Parciais de um shard para os KPIs e gráficos: total de linhas, agregados e contagem de cada preço."""
+    shard = _shard_cache.get(location, shard_id)
+    rows = shard.rows(filters)
+    prices = shard.filter_engine.price[rows]
+    values, counts = np.unique(prices[~np.isnan(prices)], return_counts=True)
+    return {
+        'total': len(rows),
+        'aggregates': shard.aggregates(filters, rows).detached(),
+        'prices': (values, counts),
+    }
+
+
+def shard_table_window(shard_id, location, filters, sort_by, low, high, samples):
+    """Janela das linhas de um shard com chave de ordenação entre `low` (inclusive) e `high` (None: sem limite).
+
+    Devolve quantas linhas do shard vêm antes da janela, o tamanho dela e, de até
+    `samples` linhas igualmente espaçadas a partir da primeira (todas, se
+    couberem), a posição na janela e a chave de cada uma.
+    """
+    shard = _shard_cache.get(location, shard_id)
+    ordered = shard.table_order(filters, sort_by)
+    start = 0 if low is None else shard.count_below(ordered, sort_by, low)
+    stop = len(ordered) if high is None else shard.count_below(ordered, sort_by, high)
+    positions = np.arange(0, stop - start, max(1, -(-(stop - start) // samples)))
+    return start, stop - start, positions, shard.table_keys(ordered[start + positions], sort_by)
+
+
+def shard_table(shard_id, location, filters, sort_by, low, high):
+    """As linhas de um shard com chave de ordenação entre `low` (inclusive) e `high`, na ordem da tabela."""
+    shard = _shard_cache.get(location, shard_id)
+    ordered = shard.table_order(filters, sort_by)
+    stop = len(ordered) if high is None else shard.count_below(ordered, sort_by, high)
+    ordered = ordered[shard.count_below(ordered, sort_by, low):stop]
+    table = shard.df.iloc[ordered][TABLE_COLUMNS]
+    # Textos lidos como categóricos levariam todos os valores do shard junto com as poucas linhas
+    return table.apply(lambda column: column.cat.remove_unused_categories()
+                       if isinstance(column.dtype, pd.CategoricalDtype) else column)
+
+
+def shard_top(shard_id, location, filters, k):
+    """As `k` linhas de maior pontuação de um shard no ranking, com a pontuação e a posição global de cada uma."""
+    shard = _shard_cache.get(location, shard_id)
+    specialization, city = filters[:2]
+    positions = shard.ranking_index.top(shard.rows(filters), specialization, city, k)
+    top = shard.df.iloc[positions][RANKING_COLUMNS + [ROW_COLUMN]].assign(score=shard.ranking_index.scores[positions])
+    return top.apply(lambda column: column.cat.remove_unused_categories()
+                     if isinstance(column.dtype, pd.CategoricalDtype) else column)
+
+
+def shard_rows(shard_id, location, filters):
+    """Posições (no shard) das linhas que passam nos filtros."""
+    return _shard_cache.get(location, shard_id).rows(filters)
+
+
+class ShardPool:
+    """Cliente do servidor de shards da máquina, compartilhado por todos os workers.
+
+    O servidor (`serve`) roda num processo à parte, com `SHARD_PROCESSES`
+    executores de um processo cada: um shard vai sempre para o mesmo executor
+    (shard i → executor i mod n), que só carrega os seus. Assim há uma única
+    cópia de cada shard na máquina, qualquer que seja o número de workers do
+    gunicorn. O primeiro worker que não consegue se conectar inicia o servidor;
+    uma trava de arquivo garante que só um fique no ar, e ele sai sozinho quando
+    fica `SERVER_IDLE_SECONDS` sem clientes.
+
+    Cada thread de cada processo usa uma conexão própria, aberta no primeiro uso
+    (depois do fork do gunicorn). Os dois lados se autenticam com `authkey`
+    antes de trocar qualquer objeto: um socket de outro usuário no endereço
+    não é aceito.
+    """
+
+    def __init__(self, address, processes, cache_bytes, authkey):
+        self.address = os.path.abspath(address)
+        self.processes = max(1, processes)
+        self.cache_bytes = cache_bytes
+        self.authkey = authkey
+        self._local = threading.local()
+        self._connections = []
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def map(self, function, shard_ids, *args):
+        """`function(shard_id, *args)` para cada shard, no processo dele; resultados na ordem de `shard_ids`."""
+        request = (function, list(shard_ids), args)
+        connection = self._connection()
+        try:
+            ok, value = self._call(connection, request)
+        except (EOFError, BrokenPipeError, ConnectionResetError):
+            # Servidor encerrado entre duas consultas: as consultas só leem, então repete numa conexão nova
+            connection.close()
+            ok, value = self._call(self._connection(), request)
+        if not ok:
+            raise value
+        return value
+
+    def shutdown(self):
+        """Fecha as conexões deste processo com o servidor (reabertas no próximo uso).
+
+        O servidor sai sozinho quando nenhum processo fica conectado.
+        """
+        with self._lock:
+            self._close_connections()
+
+    def _close_connections(self):
+        for connection in self._connections:
+            connection.close()
+        self._connections = []
+
+    def _call(self, connection, request):
+        connection.send(request)
+        return connection.recv()
+
+    def _connection(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Conexões herdadas de outro processo (antes de um fork): fecha só a cópia deste processo
+                self._close_connections()
+                self._pid = os.getpid()
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or connection.closed:
+            connection = self._local.connection = self._connect()
+            with self._lock:
+                self._connections = [known for known in self._connections if not known.closed]
+                self._connections.append(connection)
+        return connection
+
+    def _connect(self):
+        deadline = time.monotonic() + SERVER_START_SECONDS
+        started = False
+        while True:
+            try:
+                return Client(self.address, family='AF_UNIX', authkey=self.authkey)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                if not started:
+                    self._start_server()
+                    started = True
+                time.sleep(0.05)
+
+    def _start_server(self):
+        os.makedirs(os.path.dirname(self.address), exist_ok=True)
+        # Importa o módulo pelo nome (e não como __main__) para que as funções enviadas pelos
+        # workers e as dos executores sejam as mesmas; nova sessão para não receber os sinais do app
+        # A chave vai pela entrada padrão, fora da linha de comando (visível para outros usuários)
+        server = subprocess.Popen(
+            [sys.executable, '-c', SERVER_COMMAND, self.address, str(self.processes), str(self.cache_bytes)],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL, start_new_session=True)
+        server.stdin.write(self.authkey)
+        server.stdin.close()
+
+
+
+def deployment_authkey(directory):
+    """Chave compartilhada pelos workers e pelo servidor de shards, gravada em `directory`.
+
+    Criada aleatória no primeiro uso, legível só pelo usuário; `directory`
+    deve ser privado (o do cache de resultados).
+    """
+    path = os.path.join(directory, AUTHKEY_FILE)
+    if not os.path.exists(path):
+        # Gravada inteira num arquivo temporário e ligada no lugar: nenhum worker lê uma chave pela metade
+        fd, temp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(secrets.token_bytes(32))
+            os.link(temp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temp_path)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def serve(address, processes, cache_bytes, idle_seconds=None, authkey=None):
+    """Servidor de shards da máquina (iniciado pelo `ShardPool`); volta quando fica ocioso.
+
+    Responde em `address` (socket Unix acessível só pelo mesmo usuário) aos
+    clientes que se autenticam com `authkey`. Se outro servidor já atende o
+    endereço, volta na hora.
+    """
+    idle_seconds = SERVER_IDLE_SECONDS if idle_seconds is None else float(idle_seconds)
+    os.umask(0o077)
+    # Encerrado por sinal, sai pelo mesmo caminho da ociosidade (que encerra os executores)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    lock = open(address + '.lock', 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return
+    if os.path.exists(address):
+        os.unlink(address)
+    listener = Listener(address, family='AF_UNIX', authkey=authkey)
+
+    context = multiprocessing.get_context('spawn')
+    executors = [
+        ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=_init_process,
+                            initargs=(int(cache_bytes),))
+        for _ in range(max(1, int(processes)))
+    ]
+    state = {'clients': 0, 'idle_since': time.monotonic()}
+    state_lock = threading.Lock()
+
+    def handle(connection):
+        try:
+            while True:
+                function, shard_ids, args = connection.recv()
+                try:
+                    futures = [executors[shard_id % len(executors)].submit(function, shard_id, *args)
+                               for shard_id in shard_ids]
+                    response = (True, [future.result() for future in futures])
+                except Exception as error:
+                    response = (False, error)
+                connection.send(response)
+        except (EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+            with state_lock:
+                state['clients'] -= 1
+                state['idle_since'] = time.monotonic()
+
+    def accept():
+        while True:
+            try:
+                connection = listener.accept()
+            except AuthenticationError:
+                continue
+            except OSError:
+                return
+            with state_lock:
+                state['clients'] += 1
+            threading.Thread(target=handle, args=(connection,), daemon=True).start()
+
+    threading.Thread(target=accept, daemon=True).start()
+    try:
+        while True:
+            time.sleep(1)
+            with state_lock:
+                if not state['clients'] and time.monotonic() - state['idle_since'] >= idle_seconds:
+                    break
+    finally:
+        listener.close()
+        for executor in executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+        lock.close()
+
+
+class ShardedDataset:
+    """Uma versão dos dados particionados: só o manifesto é lido no app, as linhas ficam no pool."""
+
+    def __init__(self, directory, price_step, ranking_weights, pool):
+        manifest = read_shard_manifest(directory)
+        if manifest is None:
+            raise FileNotFoundError(f'{directory} não contém shards válidos')
+        # Caminho absoluto: o servidor de shards roda em outro diretório de trabalho
+        self.directory = os.path.abspath(directory)
+        self.version = file_fingerprint(os.path.join(directory, SHARD_MANIFEST))
+        self.price_step = price_step
+        self.ranking_weights = ranking_weights
+        self.pool = pool
+        self.n_rows = manifest['rows']
+        self.n_shards = manifest['shards']
+        self.shard_ids = [partition['id'] for partition in manifest['partitions']]
+        self.price_min = manifest['price_min']
+        self.price_max = manifest['price_max']
+        self.option_index = _option_index(manifest['options'])
+        self.location = ShardLocation(self.directory, self.version, self.price_min, price_step, ranking_weights,
+                                      manifest['table_null_ranks'])
+
+    def shards_for(self, city):
+        """Shards que podem ter linhas da cidade ('all' para todos)."""
+        if city == 'all':
+            return self.shard_ids
+        shard_id = shard_of(city, self.n_shards)
+        # Cidade inexistente: qualquer shard responde com o resultado vazio
+        return [shard_id if shard_id in self.shard_ids else self.shard_ids[0]]
+
+    def query(self, filters):
+        """Resultado de uma combinação de filtros (normalizada), somando os parciais dos shards."""
+        partials = self.pool.map(shard_summary, self.shards_for(filters[1]), self.location, filters)
+        return ShardedRows(self, filters, partials)
+
+
+def refresh_sharded_dataset(current, force=False):
+    """Nova versão se o manifesto dos shards mudou desde `current` (ou `force`); None caso contrário."""
+    if not force and file_fingerprint(os.path.join(current.directory, SHARD_MANIFEST)) == current.version:
+        return None
+    return ShardedDataset(current.directory, current.price_step, current.ranking_weights, current.pool)
+
+
+def _option_index(options):
+    labels = options['labels']
+    pair_counts = np.zeros((len(labels['specialization']), len(labels['city1'])), dtype=np.int64)
+    for i, j, count in options['pairs']:
+        pair_counts[i, j] = count
+    return OptionIndex.from_counts(labels, pair_counts)
+
+
+def _narrow_window(windows, offset, page_size, high):
+    """Nova janela de chaves `(low, high)` da página a partir das amostras dos shards.
+
+    `low` é a maior amostra com no máximo `offset` linhas da janela antes dela;
+    `high`, a menor com ao menos `offset + page_size` (ou o limite atual).
+    """
+    keys = np.concatenate([window_keys for _, _, _, window_keys in windows])
+    owners = np.repeat(np.arange(len(windows)), [len(positions) for _, _, positions, _ in windows])
+    order = np.lexsort(keys.T[::-1])
+    # Amostras de cada shard antes de cada amostra, na ordem conjunta
+    owned = owners[order][:, None] == np.arange(len(windows))
+    before = np.cumsum(owned, axis=0) - owned
+    # Linhas da janela antes de cada amostra: entre uma depois da última amostra menor e a próxima
+    upper = np.zeros(len(order), dtype=np.int64)
+    lower = np.zeros(len(order), dtype=np.int64)
+    for i, (_, size, positions, _) in enumerate(windows):
+        upper += np.append(positions, size)[before[:, i]]
+        lower += np.append(0, positions + 1)[before[:, i]]
+    # A primeira amostra tem zero linhas antes: sempre serve de `low`
+    low = tuple(keys[order[np.searchsorted(upper, offset, side='right') - 1]].tolist())
+    high_at = np.searchsorted(lower, offset + page_size, side='left')
+    if high_at < len(order):
+        high = tuple(keys[order[high_at]].tolist())
+    return low, high
+
+
+class ShardedRows:
+    """Resultado de uma combinação de filtros montado a partir dos parciais dos shards.
+
+    Faz as vezes de `row_store.FilteredRows` nos callbacks: total, agregados e
+    preços vêm da consulta; a página da tabela e o ranking são novas consultas.
+    """
+
+    def __init__(self, dataset, filters, partials):
+        self.dataset = dataset
+        self.filters = filters
+        hasher = hashlib.blake2b(str(dataset.version).encode(), digest_size=16)
+        hasher.update(repr(filters).encode())
+        self.key = hasher.hexdigest()
+        self.total = sum(partial['total'] for partial in partials)
+        self.aggregates = Aggregates.merge([partial['aggregates'] for partial in partials])
+        self._price_counts = merge_counts(np.concatenate([partial['prices'][0] for partial in partials]),
+                                          np.concatenate([partial['prices'][1] for partial in partials]))
+
+    def price_counts(self):
+        """Preços não nulos distintos das linhas, em ordem crescente, e quantas linhas têm cada um."""
+        return self._price_counts
+
+    def table_page(self, sort_by, page_current, page_size):
+        """Linhas da página pedida da tabela (colunas de TABLE_COLUMNS), a página e o total de páginas.
+
+        A página é achada pelas chaves de ordenação, sem trazer dos shards as
+        linhas anteriores a ela: a cada rodada, cada shard conta suas linhas
+        antes da janela de chaves e devolve algumas chaves amostradas dela, que
+        estreitam a janela até que caibam inteiras; só então vêm as linhas da
+        página. Cada rodada divide a janela por cerca de TABLE_SAMPLES / 4, seja
+        qual for a profundidade da página.
+        """
+        page_current, page_count = page_bounds(self.total, page_current, page_size)
+        start = page_current * page_size
+        data = self.dataset
+        shard_ids = data.shards_for(self.filters[1])
+        low = high = None
+        samples = TABLE_SAMPLES
+        while True:
+            windows = data.pool.map(shard_table_window, shard_ids, data.location, self.filters, sort_by,
+                                    low, high, samples)
+            # Posição da página dentro da janela
+            offset = start - sum(before for before, _, _, _ in windows)
+            if all(size == len(positions) for _, size, positions, _ in windows):
+                break
+            narrowed = _narrow_window(windows, offset, page_size, high)
+            if narrowed == (low, high):
+                # As amostras não estreitam mais (página grande perto da janela): traz todas as chaves
+                samples = max(size for _, size, _, _ in windows)
+            low, high = narrowed
+
+        keys = np.concatenate([window_keys for _, _, _, window_keys in windows])
+        owners = np.repeat(np.arange(len(windows)), [size for _, size, _, _ in windows])
+        order = np.lexsort(keys.T[::-1])
+        page = order[offset:offset + page_size]
+        if not len(page):
+            return pd.DataFrame(columns=TABLE_COLUMNS), page_current, page_count
+        following = offset + page_size
+        high = tuple(keys[order[following]].tolist()) if following < len(order) else high
+        page_owners = owners[page]
+        fetched = np.unique(page_owners)
+        parts = data.pool.map(shard_table, [shard_ids[i] for i in fetched], data.location, self.filters, sort_by,
+                              tuple(keys[page[0]].tolist()), high)
+        # As linhas vêm agrupadas por shard, cada grupo na ordem da página
+        grouping = np.argsort(page_owners, kind='stable')
+        table = pd.concat(parts, ignore_index=True)
+        return table.iloc[np.argsort(grouping)], page_current, page_count
+
+    def top(self, k):
+        """As `k` linhas de maior pontuação no ranking (colunas de RANKING_COLUMNS e `score`), da maior para a menor."""
+        data = self.dataset
+        parts = data.pool.map(shard_top, data.shards_for(self.filters[1]), data.location, self.filters, k)
+        # Cada shard já vem ordenado: intercala pela pontuação, desempatando pela posição global
+        parts = [part for part in parts if len(part)] or parts[:1]
+        candidates = pd.concat(parts, ignore_index=True)
+        keys = list(zip((-candidates['score']).tolist(), candidates[ROW_COLUMN].tolist(), range(len(candidates))))
+        bounds = np.cumsum([0] + [len(part) for part in parts]).tolist()
+        merged = heapq.merge(*(keys[start:stop] for start, stop in zip(bounds, bounds[1:])))
+        chosen = [i for _, _, i in islice(merged, k)]
+        return candidates.iloc[chosen][RANKING_COLUMNS + ['score']]
+
+    def frames(self, columns, chunk_rows):
+        """As linhas em blocos de até `chunk_rows` (ao menos um, talvez vazio), shard por shard.
+
+        Só as posições vêm do pool; as colunas são lidas aqui mesmo, mapeadas do
+        disco, e só as de um shard por vez.
+        """
+        data = self.dataset
+        for i, shard_id in enumerate(data.shards_for(self.filters[1])):
+            rows, = data.pool.map(shard_rows, [shard_id], data.location, self.filters)
+            df = read_columns(os.path.join(data.directory, _shard_name(shard_id)))
+            # O primeiro shard rende ao menos um bloco, para que o arquivo tenha o cabeçalho
+            for start in range(0, max(len(rows), 1 if i == 0 else 0), chunk_rows):
+                yield df.iloc[rows[start:start + chunk_rows]][columns]
+
+
+def main(argv):
+    csv_path = argv[1] if len(argv) > 1 else 'df_cleaned.csv'
+    out_dir = argv[2] if len(argv) > 2 else os.path.splitext(csv_path)[0] + '.shards'
+    n_shards = int(argv[3]) if len(argv) > 3 else DEFAULT_SHARDS
+    df = read_csv_clean(csv_path)
+    write_shards(df, out_dir, n_shards, source=file_fingerprint(csv_path))
+    print(f'{len(df)} linhas gravadas em {n_shards} shards em {out_dir}')
+
+
+if __name__ == '__main__':
+    main(sys.argv)
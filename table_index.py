@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+# Colunas exibidas na tabela de profissionais (na ordem dos registros enviados)
+TABLE_COLUMNS = ['name', 'city1', 'specialization', 'reviews', 'price', 'telemedicine']
+
+# Colunas derivadas ordenadas pela coluna de origem
+SORT_ALIASES = {'telemedicine_text': 'telemedicine'}
+
+
+class TableIndex:
+    """Postos de ordenação pré-calculados para paginar a tabela no servidor.
+
+    Cada coluna ordenável vira um array de postos inteiros (empates com o mesmo
+    posto, nulos depois de todos os valores), de modo que uma ordenação
+    multi-coluna sobre as linhas filtradas é um único `np.lexsort` de inteiros.
+    """
+
+    def __init__(self, df):
+        self.ranks = {}
+        self.null_ranks = {}
+        for column in TABLE_COLUMNS:
+            self.ranks[column], self.null_ranks[column] = _dense_rank(df[column])
+
+    @classmethod
+    def from_ranks(cls, ranks, null_ranks):
+        """Índice com postos já calculados (nos shards, os do conjunto completo, comparáveis entre shards)."""
+        index = cls.__new__(cls)
+        index.ranks = dict(ranks)
+        index.null_ranks = dict(null_ranks)
+        return index
+
+    def sort_keys(self, rows, sort_by):
+        """Postos de `rows` em cada coluna de `sort_by`, a principal primeiro (desc invertido, nulos no final)."""
+        keys = []
+        for spec in sort_by or []:
+            column = SORT_ALIASES.get(spec['column_id'], spec['column_id'])
+            if column not in self.ranks:
+                continue
+            rank = self.ranks[column][rows]
+            if spec.get('direction') == 'desc':
+                # Inverte os valores mas mantém os nulos no final
+                null_rank = self.null_ranks[column]
+                rank = np.where(rank == null_rank, null_rank, null_rank - 1 - rank)
+            keys.append(rank)
+        return keys
+
+    def sort_rows(self, rows, sort_by):
+        """Ordena `rows` pelas colunas de `sort_by` (formato do DataTable), de forma estável."""
+        keys = self.sort_keys(rows, sort_by)
+        if not keys:
+            return rows
+        # np.lexsort usa a última chave como principal
+        return rows[np.lexsort(keys[::-1])]
+
+    def page(self, rows, sort_by, page_current, page_size):
+        """Devolve as posições da página pedida e o total de páginas."""
+        page_current, page_count = page_bounds(len(rows), page_current, page_size)
+        ordered = self.sort_rows(rows, sort_by)
+        start = page_current * page_size
+        return ordered[start:start + page_size], page_current, page_count
+
+
+def page_bounds(total, page_current, page_size):
+    """Página pedida (limitada às existentes) e total de páginas para `total` linhas."""
+    page_count = max(1, -(-total // page_size))
+    return min(max(page_current or 0, 0), page_count - 1), page_count
+
+
+def _dense_rank(series):
+    # Posto denso começando em 0; nulos recebem o posto logo após o último valor. Inteiros com nulos
+    # (Int64 etc.) passam a float: o `rank` deles trata <NA> como um valor e o põe entre os demais
+    if isinstance(series.dtype, pd.api.extensions.ExtensionDtype) and pd.api.types.is_numeric_dtype(series.dtype):
+        series = series.astype(float)
+    ranks = series.rank(method='dense', na_option='keep').to_numpy()
+    null_rank = int(np.nanmax(ranks)) if np.isfinite(ranks).any() else 0
+    return np.where(np.isnan(ranks), null_rank, ranks - 1).astype(np.int32), null_rank
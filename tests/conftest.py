@@ -0,0 +1,90 @@
+"""Dados sintéticos e o caminho de referência (pandas puro) dos testes."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'benchmarks')]
+
+from columnar import read_csv_clean  # noqa: E402
+from dataset import Dataset  # noqa: E402
+from ranking import DEFAULT_WEIGHTS  # noqa: E402
+from search_index import normalize_text  # noqa: E402
+from synthetic_data import write_dataset  # noqa: E402
+
+# Linhas do conjunto sintético dos testes
+N_ROWS = 6000
+PRICE_STEP = 25
+
+
+@pytest.fixture(scope='session')
+def data_file(tmp_path_factory):
+    return write_dataset(str(tmp_path_factory.mktemp('data') / 'doctors.csv'), N_ROWS, seed=7)
+
+
+@pytest.fixture(scope='session')
+def frame(data_file):
+    return read_csv_clean(data_file)
+
+
+@pytest.fixture(scope='session')
+def dataset(frame):
+    return Dataset(frame, 'testes', PRICE_STEP, DEFAULT_WEIGHTS)
+
+
+@pytest.fixture(scope='session')
+def app_module(data_file, tmp_path_factory):
+    """O app com os dados sintéticos, calculando tudo no servidor."""
+    work = tmp_path_factory.mktemp('app')
+    os.environ.update({
+        'DASHBOARD_DATA_FILE': data_file,
+        'DASHBOARD_COLUMNS_DIR': str(work / 'cols'),
+        'DASHBOARD_SHARDS_DIR': str(work / 'shards'),
+        'DASHBOARD_CACHE_DIR': str(work / 'cache'),
+        'DASHBOARD_METRICS_DIR': str(work / 'metrics'),
+        'DASHBOARD_RELOAD_INTERVAL': '0',
+        'DASHBOARD_CLIENTSIDE_MAX_ROWS': '0',
+    })
+    import app
+    return app
+
+
+def filter_combinations(df, seed=0, count=60):
+    """Combinações de filtros variadas: valores frequentes e raros, faixas de preço e buscas."""
+    rng = np.random.default_rng(seed)
+    specializations = df['specialization'].value_counts().index[[0, 1, 5, -1]].tolist()
+    cities = df['city1'].value_counts().index[[0, 1, 30, -1]].tolist() + ['Inexistente']
+    price_min, price_max = float(df['price'].min()), float(df['price'].max())
+    ranges = [(price_min, price_max), (price_min, price_max), (100.0, 300.0), (150.0, 150.0), (200.0, price_max)]
+    terms = ['', '', '', 'silva', 'sao', 'ana', 'cardio', 'zzz']
+
+    def pick(values, all_share):
+        return 'all' if rng.random() < all_share else values[rng.integers(len(values))]
+
+    return [
+        (pick(specializations, 0.6), pick(cities, 0.6), pick([0, 1], 0.6),
+         ranges[rng.integers(len(ranges))], terms[rng.integers(len(terms))])
+        for _ in range(count)
+    ]
+
+
+def pandas_rows(df, filters):
+    """Posições das linhas que passam nos filtros, com máscaras do pandas (como o app fazia antes dos índices)."""
+    specialization, city, telemedicine, (low, high), term = filters
+    mask = (df['price'] >= low) & (df['price'] <= high)
+    if specialization != 'all':
+        mask &= df['specialization'] == specialization
+    if city != 'all':
+        mask &= df['city1'] == city
+    if telemedicine != 'all':
+        mask &= df['telemedicine'] == telemedicine
+    if term:
+        term = normalize_text(term)
+        found = np.zeros(len(df), dtype=bool)
+        for column in ('name', 'city1', 'specialization'):
+            normalized = df[column].astype(object).map(lambda value: normalize_text(value) if isinstance(value, str) else '')
+            found |= normalized.str.contains(term, regex=False).to_numpy()
+        mask &= found
+    return np.flatnonzero(mask.to_numpy())
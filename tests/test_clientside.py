@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from client_data import build_client_payload
+from conftest import PRICE_STEP, ROOT
+from dataset import Dataset
+from ranking import DEFAULT_WEIGHTS
+from search_index import normalize_text
+
+pytestmark = pytest.mark.skipif(shutil.which('node') is None, reason='node não instalado')
+
+# Roda os callbacks de assets/clientside.js no node: cada caso é (filtros, estado anterior)
+RUNNER = """
+const fs = require('fs');
+global.window = {dash_clientside: {no_update: 'no_update', callback_context: {triggered: []}}};
+eval(fs.readFileSync(process.argv[1], 'utf8'));
+const input = JSON.parse(fs.readFileSync(0, 'utf8'));
+const dashboard = window.dash_clientside.dashboard;
+console.log(JSON.stringify(input.cases.map(([filters, previous]) =>
+    dashboard.update_filter_state(...filters, input.payload, previous))));
+"""
+
+NAMES = ['Dr. Straße', 'DR. STRASSE', 'Dra. Ὀδυσσεύς', 'Dra. ΟΔΥΣΣΕΥΣ', 'Dr. Gößmann', 'Dr. İlhan', 'Dr. ılgaz',
+         'Dr. Ǆemal', 'Dra. ﬁlomena']
+TERMS = ['straße', 'STRASSE', 'ss', 'ẞ', 'οδυσσευς', 'ΟΔΥΣΣΕΎΣ', 'ς', 'gößm', 'goss', 'ilhan', 'ılgaz', 'ǆ', 'dž',
+         'fi', 'são', 'SAO', 'Sã']
+
+
+@pytest.fixture(scope='module')
+def unicode_dataset(frame):
+    df = frame.copy()
+    df['name'] = df['name'].astype(object)
+    df.loc[:len(NAMES) - 1, 'name'] = NAMES
+    return Dataset(df, 'unicode', PRICE_STEP, DEFAULT_WEIGHTS)
+
+
+def run_clientside(payload, cases):
+    result = subprocess.run(['node', '-e', RUNNER, os.path.join(ROOT, 'assets', 'clientside.js')],
+                            input=json.dumps({'payload': payload, 'cases': cases}, default=float),
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+def test_search_matches_server(unicode_dataset):
+    data = unicode_dataset
+    prices = [data.price_min, data.price_max]
+    states = run_clientside(build_client_payload(data, 10),
+                            [[['all', 'all', 'all', prices, term], None] for term in TERMS])
+    for term, state in zip(TERMS, states):
+        rows = data.search_index.search(normalize_text(term), data.filter_engine.query('all', 'all', 'all', prices))
+        assert state['filters'][4] == normalize_text(term)
+        assert state['total'] == len(rows), term
+
+
+def test_unchanged_rows_skip_the_update(unicode_dataset):
+    data = unicode_dataset
+    prices = [data.price_min, data.price_max]
+    payload = build_client_payload(data, 10)
+    first, = run_clientside(payload, [[['all', 'all', 'all', prices, 'straße'], None]])
+    # Outra busca com as mesmas linhas: sem atualização; com outras linhas (mesmo total ou não), novo estado
+    same, other = run_clientside(payload, [
+        [['all', 'all', 'all', prices, 'strasse'], first],
+        [['all', 'all', 'all', prices, 'ss'], first],
+    ])
+    assert same == 'no_update'
+    assert other['total'] != first['total'] or other['key'] != first['key']
+    # Um estado anterior com a mesma chave e o mesmo total, mas outras linhas (uma colisão da chave),
+    # não bloqueia a atualização
+    greek, = run_clientside(payload, [[['all', 'all', 'all', prices, 'οδυσσευς'], None]])
+    assert greek['total'] == first['total']
+    forged = dict(greek, key=first['key'])
+    state, = run_clientside(payload, [[['all', 'all', 'all', prices, 'straße'], forged]])
+    assert state == first
@@ -0,0 +1,88 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import columnar
+from columnar import CATEGORICAL_COLUMNS, FORMAT_VERSION, MANIFEST, read_columns, read_manifest, write_columns
+from dataset import load_dataset
+from ranking import DEFAULT_WEIGHTS
+from result_cache import file_fingerprint
+
+
+def test_round_trip_keeps_types_values_and_nulls(frame, tmp_path):
+    write_columns(frame, str(tmp_path / 'cols'))
+    loaded = read_columns(str(tmp_path / 'cols'))
+    assert list(loaded.columns) == list(frame.columns)
+    assert len(loaded) == len(frame)
+    for name in frame.columns:
+        original, copy = frame[name], loaded[name]
+        if name in CATEGORICAL_COLUMNS:
+            assert isinstance(copy.dtype, pd.CategoricalDtype)
+            assert list(copy.cat.categories) == list(original.cat.categories)
+        elif name == 'name':
+            # Texto vira categórico por dicionário; os valores (e os nulos) são os mesmos
+            assert isinstance(copy.dtype, pd.CategoricalDtype)
+        else:
+            assert copy.dtype == original.dtype
+        np.testing.assert_array_equal(copy.isna().to_numpy(), original.isna().to_numpy())
+        assert copy.astype(object).where(copy.notna(), None).tolist() == \
+            original.astype(object).where(original.notna(), None).tolist()
+
+    assert str(loaded['review_year'].dtype) == 'Int16'
+    assert loaded['review_year'].isna().any()
+    assert loaded['price'].isna().any()
+
+
+def test_nullable_and_empty_columns(tmp_path):
+    df = columnar.clean_frame(pd.DataFrame({
+        'name': ['a', None, 'c'],
+        'specialization': [None, None, None],
+        'city1': ['X', 'Y', None],
+        'reviews': [1, None, 3],
+        'price': [10.5, None, 20.0],
+        'telemedicine': [1, 0, 1],
+        'newest_review_date': [2020, None, 2021.5],
+    }))
+    write_columns(df, str(tmp_path / 'cols'))
+    loaded = read_columns(str(tmp_path / 'cols'))
+    assert loaded['review_year'].tolist()[0] == 2020
+    assert loaded['review_year'].isna().tolist() == [False, True, True]
+    assert loaded['specialization'].isna().all()
+    assert loaded['name'].isna().tolist() == [False, True, False]
+    np.testing.assert_array_equal(loaded['price'].to_numpy(), df['price'].to_numpy())
+
+
+def test_format_mismatch_forces_rebuild(data_file, tmp_path):
+    cols = str(tmp_path / 'cols')
+    columnar.main(['columnar.py', data_file, cols])
+    assert load_dataset(data_file, cols, 25, DEFAULT_WEIGHTS).source['kind'] == 'columns'
+
+    # Dados gravados por outra versão do formato: ignorados, o app volta a ler o CSV
+    path = os.path.join(cols, MANIFEST)
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest['format'] = FORMAT_VERSION - 1
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    assert read_manifest(cols) is None
+    data = load_dataset(data_file, cols, 25, DEFAULT_WEIGHTS)
+    assert data.source['kind'] == 'csv'
+    assert data.version == file_fingerprint(data_file)
+
+    # A conversão regrava no formato atual, e os dados colunares voltam a ser usados
+    columnar.main(['columnar.py', data_file, cols])
+    assert read_manifest(cols)['format'] == FORMAT_VERSION
+    assert load_dataset(data_file, cols, 25, DEFAULT_WEIGHTS).source['kind'] == 'columns'
+
+
+def test_columns_of_an_older_csv_are_not_used(data_file, tmp_path):
+    cols = str(tmp_path / 'cols')
+    copy = str(tmp_path / 'doctors.csv')
+    with open(data_file, 'rb') as source, open(copy, 'wb') as target:
+        target.write(source.read())
+    columnar.main(['columnar.py', copy, cols])
+    with open(copy, 'a', encoding='utf-8') as f:
+        f.write('\n')
+    assert load_dataset(copy, cols, 25, DEFAULT_WEIGHTS).source['kind'] == 'csv'
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from conftest import filter_combinations, pandas_rows
+from data_cube import DataCube
+from filter_engine import FilterEngine
+
+# Faixas de preço que começam ou terminam no meio das faixas do cubo (origem 30, passo 25),
+# exatamente nos seus limites, ou ficam inteiras dentro de uma só
+INNER_RANGES = [(131.0, 149.0), (135.5, 152.0), (80.0, 80.0), (55.0, 130.0), (54.9, 130.1), (30.0, 54.0),
+                (142.0, 1060.0), (1000.0, 2000.0)]
+
+
+def cube_filters(frame):
+    combinations = [filters[:4] + ('',) for filters in filter_combinations(frame, seed=3, count=40)]
+    combinations += [('all', 'all', 'all', prices, '') for prices in INNER_RANGES]
+    combinations += [(frame['specialization'].iloc[0], 'all', 1, prices, '') for prices in INNER_RANGES]
+    return combinations
+
+
+def assert_matches_rows(aggregates, sub):
+    assert aggregates.total == len(sub)
+    assert aggregates.price_count == sub['price'].notna().sum()
+    assert aggregates.reviews_count == sub['reviews'].notna().sum()
+    assert aggregates.price_sum == pytest.approx(sub['price'].astype(float).sum(), rel=1e-9)
+    assert aggregates.reviews_sum == pytest.approx(sub['reviews'].astype(float).sum(), rel=1e-9)
+
+    specializations = sub['specialization'].value_counts()
+    assert aggregates.specialization_counts().to_dict() == specializations[specializations > 0].to_dict()
+    assert aggregates.telemedicine_counts().to_dict() == sub['telemedicine'].value_counts().to_dict()
+
+    expected = sub.dropna(subset=['review_year']).groupby('review_year')['reviews'].agg(['sum', 'count'])
+    by_year = aggregates.reviews_by_year()
+    assert by_year['newest_review_date'].dt.year.tolist() == expected.index.astype(int).tolist()
+    np.testing.assert_allclose(by_year['avg_reviews'], expected['sum'] / expected['count'])
+
+
+def test_cube_query_matches_raw_rows(frame, dataset):
+    assert dataset.data_cube.price_origin == 30
+    for filters in cube_filters(frame):
+        specialization, city, telemedicine, price_range, _ = filters
+        aggregates = dataset.data_cube.query(dataset.filter_engine, specialization, city, telemedicine, price_range)
+        assert_matches_rows(aggregates, frame.iloc[pandas_rows(frame, filters)])
+
+
+def test_aggregate_rows_matches_raw_rows(frame, dataset):
+    for filters in filter_combinations(frame, seed=4, count=20):
+        rows = pandas_rows(frame, filters)
+        assert_matches_rows(dataset.data_cube.aggregate_rows(rows), frame.iloc[rows])
+
+
+def test_extended_cube_matches_raw_rows(frame):
+    head, tail = frame.iloc[:4000], frame.iloc[4000:].reset_index(drop=True)
+    cube = DataCube(head, price_origin=int(frame['price'].min()), price_step=25).extended(tail)
+    engine = FilterEngine(frame)
+    for filters in cube_filters(frame):
+        specialization, city, telemedicine, price_range, _ = filters
+        aggregates = cube.query(engine, specialization, city, telemedicine, price_range)
+        assert_matches_rows(aggregates, frame.iloc[pandas_rows(frame, filters)])
@@ -0,0 +1,66 @@
+import io
+
+import pandas as pd
+import pytest
+
+from conftest import filter_combinations, pandas_rows
+from export import available_formats
+
+
+@pytest.fixture
+def client(app_module, monkeypatch):
+    # Blocos pequenos para que a exportação passe por vários
+    monkeypatch.setattr(app_module, 'EXPORT_CHUNK_ROWS', 500)
+    return app_module.server.test_client()
+
+
+def export_args(filters):
+    specialization, city, telemedicine, (low, high), term = filters
+    return {'specialization': specialization, 'city': city, 'telemedicine': telemedicine,
+            'price_min': low, 'price_max': high, 'search': term}
+
+
+def expected_rows(app_module, frame, filters):
+    table = frame.iloc[pandas_rows(frame, filters)][app_module.TABLE_COLUMNS]
+    return table.astype({name: object for name, dtype in table.dtypes.items()
+                         if isinstance(dtype, pd.CategoricalDtype)})
+
+
+def plain(table):
+    # Nulos como None nos dois lados (o Parquet lê texto nulo como None, o pandas tem NaN)
+    table = table.astype(object)
+    return table.where(table.notna(), None)
+
+
+def test_csv_matches_pandas_filters(app_module, frame, client):
+    for filters in filter_combinations(frame, seed=11, count=15) + [('all', 'Inexistente', 'all', (0.0, 1.0), '')]:
+        response = client.get('/export', query_string=dict(export_args(filters), format='csv'))
+        assert response.status_code == 200
+        assert response.headers['Content-Disposition'] == 'attachment; filename=profissionais.csv'
+        assert response.data == expected_rows(app_module, frame, filters).to_csv(index=False).encode('utf-8')
+
+
+def test_default_filters_export_every_priced_row(frame, client):
+    # Sem filtros vale a faixa inteira de preços, como no painel: ficam fora só as linhas sem preço
+    response = client.get('/export')
+    assert response.status_code == 200
+    assert len(pd.read_csv(io.BytesIO(response.data))) == frame['price'].notna().sum()
+
+
+@pytest.mark.skipif('parquet' not in available_formats(), reason='pyarrow não instalado')
+def test_parquet_matches_pandas_filters(app_module, frame, client):
+    for filters in filter_combinations(frame, seed=12, count=8) + [('all', 'Inexistente', 'all', (0.0, 1.0), '')]:
+        response = client.get('/export', query_string=dict(export_args(filters), format='parquet'))
+        assert response.status_code == 200
+        exported = pd.read_parquet(io.BytesIO(response.data))
+        expected = expected_rows(app_module, frame, filters).reset_index(drop=True)
+        pd.testing.assert_frame_equal(plain(exported), plain(expected))
+
+
+@pytest.mark.parametrize('query', [
+    {'format': 'xlsx'},
+    {'format': 'csv', 'telemedicine': 'sim'},
+    {'format': 'csv', 'price_min': 'barato'},
+])
+def test_invalid_requests(client, query):
+    assert client.get('/export', query_string=query).status_code == 400
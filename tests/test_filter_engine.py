@@ -0,0 +1,33 @@
+import numpy as np
+
+from conftest import filter_combinations, pandas_rows
+from filter_engine import FilterEngine
+
+
+def test_query_matches_pandas(frame, dataset):
+    for filters in filter_combinations(frame):
+        specialization, city, telemedicine, price_range, term = filters
+        rows = dataset.filter_engine.query(specialization, city, telemedicine, price_range)
+        rows = dataset.search_index.search(term, rows)
+        np.testing.assert_array_equal(rows, pandas_rows(frame, filters), err_msg=repr(filters))
+
+
+def test_query_without_filters_returns_every_row(frame, dataset):
+    np.testing.assert_array_equal(dataset.filter_engine.query(), np.arange(len(frame)))
+
+
+def test_narrow_matches_query(frame, dataset):
+    engine = dataset.filter_engine
+    for specialization, city, telemedicine, price_range, _ in filter_combinations(frame, seed=1):
+        rows = engine.query(specialization, 'all', 'all', None)
+        np.testing.assert_array_equal(engine.narrow(rows, 'all', city, telemedicine, price_range),
+                                      engine.query(specialization, city, telemedicine, price_range))
+
+
+def test_extended_matches_rebuilt_engine(frame):
+    head, tail = frame.iloc[:4000], frame.iloc[4000:].reset_index(drop=True)
+    extended = FilterEngine(head).extended(tail, len(head))
+    rebuilt = FilterEngine(frame)
+    for specialization, city, telemedicine, price_range, _ in filter_combinations(frame, seed=2):
+        np.testing.assert_array_equal(extended.query(specialization, city, telemedicine, price_range),
+                                      rebuilt.query(specialization, city, telemedicine, price_range))
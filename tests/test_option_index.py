@@ -0,0 +1,71 @@
+import pandas as pd
+
+from option_index import OptionIndex
+from search_index import normalize_text
+
+SMALL = pd.DataFrame({
+    'specialization': ['Clínico Geral', 'Cardiologia', 'Cardiologia', 'Pediatria', None, 'Clínico Geral',
+                       'Cirurgia Cardíaca', 'Pediatria'],
+    'city1': ['São Paulo', 'São Paulo', 'Paulínia', 'Santos', 'Santos', 'Santo André', 'São Paulo', None],
+})
+
+
+def pandas_top(df, dimension, search_value, other_value, limit):
+    """Opções pelo pandas: contagem dos pares completos, maior primeiro, empates em ordem alfabética."""
+    other = 'city1' if dimension == 'specialization' else 'specialization'
+    pairs = df.dropna(subset=['specialization', 'city1'])
+    if other_value != 'all':
+        pairs = pairs[pairs[other] == other_value]
+    counts = pairs[dimension].astype(object).value_counts()
+    tokens = normalize_text(search_value or '').split()
+    items = [
+        (label, int(count)) for label, count in counts.items()
+        if all(any(word.startswith(token) for word in normalize_text(label).split()) for token in tokens)
+    ]
+    return sorted(items, key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def test_word_prefix_matching():
+    index = OptionIndex(SMALL)
+    labels = lambda dimension, search: sorted(label for label, _ in index.top(dimension, search, 'all', 10))
+    assert labels('city1', 'pau') == ['Paulínia', 'São Paulo']
+    assert labels('city1', 'SAO pa') == ['São Paulo']
+    assert labels('city1', 'andre santo') == ['Santo André']
+    assert labels('city1', 'aulo') == []
+    assert labels('specialization', 'card') == ['Cardiologia', 'Cirurgia Cardíaca']
+    assert labels('specialization', 'cli ger') == ['Clínico Geral']
+
+
+def test_top_matches_pandas_counts(frame):
+    index = OptionIndex(frame)
+    cities = frame['city1'].value_counts().index[[0, 3, -1]].tolist() + ['Inexistente']
+    specializations = frame['specialization'].value_counts().index[[0, -1]].tolist()
+    for search in ('', 'sao', 'ca', 'cidade 1', 'zz'):
+        for city in ['all'] + cities:
+            assert index.top('specialization', search, city, 15) == pandas_top(frame, 'specialization', search, city, 15)
+        for specialization in ['all'] + specializations:
+            assert index.top('city1', search, specialization, 15) == pandas_top(frame, 'city1', search, specialization, 15)
+
+
+def test_pair_counts_match_pandas(frame):
+    index = OptionIndex(frame)
+    expected = pd.crosstab(frame['specialization'].astype(object), frame['city1'].astype(object))
+    expected = expected.reindex(index=index.labels['specialization'], columns=index.labels['city1'], fill_value=0)
+    assert (index.pair_counts == expected.to_numpy()).all()
+
+
+def test_extended_matches_a_new_index(frame):
+    head = frame.iloc[:3500]
+    # O trecho novo traz valores inéditos nas duas dimensões
+    tail = pd.concat([frame.iloc[3500:], pd.DataFrame({
+        'specialization': ['Zootecnia', 'Acupuntura'], 'city1': ['Águas Novas', 'Cidade Nova'],
+    })], ignore_index=True)
+    extended = OptionIndex(head).extended(tail)
+    rebuilt = OptionIndex(pd.concat([head[['specialization', 'city1']].astype(object),
+                                     tail[['specialization', 'city1']].astype(object)], ignore_index=True))
+    assert extended.labels == rebuilt.labels
+    assert (extended.pair_counts == rebuilt.pair_counts).all()
+    for search in ('', 'nov', 'agua', 'zoo'):
+        for dimension in ('specialization', 'city1'):
+            assert extended.top(dimension, search, 'all', 20) == rebuilt.top(dimension, search, 'all', 20)
+    assert extended.top('city1', 'agua', 'Zootecnia', 5) == [('Águas Novas', 1)]
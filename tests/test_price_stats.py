@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+from price_stats import box_stats, histogram_bins, merge_counts, value_counts
+
+
+def samples():
+    rng = np.random.default_rng(3)
+    yield np.sort(np.round(rng.lognormal(5.3, 0.45, 2000), -1))
+    yield np.sort(rng.normal(300, 80, 500).round(2))
+    yield np.full(40, 150.0)
+    yield np.sort(rng.choice([100.0, 150.0, 150.5, 200.0, 10000.0], 300))
+    yield np.array([42.0])
+
+
+@pytest.mark.parametrize('prices', list(samples()))
+def test_histogram_counts_every_price_once(prices):
+    edges, counts = histogram_bins(*value_counts(prices), nbins=20)
+    assert counts.sum() == len(prices)
+    assert edges[0] <= prices[0] and prices[-1] < edges[-1]
+    expected = [np.count_nonzero((prices >= low) & (prices < high)) for low, high in zip(edges[:-1], edges[1:])]
+    np.testing.assert_array_equal(counts, expected)
+    if np.all(prices % 1 == 0) and len(edges) > 2:
+        # Valores inteiros nunca caem numa borda
+        assert np.all(edges % 1 == 0.5)
+
+
+@pytest.mark.parametrize('prices', list(samples()))
+def test_box_stats_match_numpy_on_raw_prices(prices):
+    box = box_stats(*value_counts(prices))
+    q1, median, q3 = np.percentile(prices, [25, 50, 75], method='hazen')
+    assert (box['q1'], box['median'], box['q3']) == (q1, median, q3)
+    iqr = q3 - q1
+    inside = prices[(prices >= q1 - 1.5 * iqr) & (prices <= q3 + 1.5 * iqr)]
+    assert box['lowerfence'] == min(q1, inside.min())
+    assert box['upperfence'] == max(q3, inside.max())
+    outside = np.unique(prices[(prices < box['lowerfence']) | (prices > box['upperfence'])])
+    np.testing.assert_array_equal(box['outliers'], outside)
+
+
+def test_outliers_keep_the_extremes_when_capped():
+    prices = np.concatenate([np.full(5000, 100.0), np.arange(1000.0, 1500.0)])
+    box = box_stats(*value_counts(prices), max_outliers=20)
+    assert len(box['outliers']) == 20
+    assert box['outliers'][0] == 1000.0 and box['outliers'][-1] == 1499.0
+
+
+def test_counts_from_parts_match_counts_of_the_whole():
+    rng = np.random.default_rng(4)
+    prices = np.round(rng.lognormal(5.3, 0.45, 3000), -1)
+    parts = np.array_split(prices, 7)
+    values, counts = merge_counts(np.concatenate([value_counts(np.sort(part))[0] for part in parts]),
+                                  np.concatenate([value_counts(np.sort(part))[1] for part in parts]))
+    expected_values, expected_counts = np.unique(prices, return_counts=True)
+    np.testing.assert_array_equal(values, expected_values)
+    np.testing.assert_array_equal(counts, expected_counts)
+    np.testing.assert_array_equal(np.repeat(*value_counts(np.sort(prices))), np.sort(prices))
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from conftest import filter_combinations, pandas_rows
+from ranking import RankingIndex, RankingWeights, ranking_scores
+
+
+def brute_force_top(df, rows, weights, k):
+    """As k melhores de `rows` ordenando todas pela pontuação, empates pela posição."""
+    subset = df.iloc[rows]
+    scores = ranking_scores(subset['reviews'].astype(float), subset['price'].astype(float), weights)
+    valid = ~np.isnan(scores)
+    order = np.lexsort((rows[valid], -scores[valid]))
+    return rows[valid][order][:k]
+
+
+def test_scores_follow_the_formula(frame):
+    weights = RankingWeights(0.5, 2.0)
+    reviews, price = frame['reviews'].astype(float), frame['price'].astype(float)
+    scores = ranking_scores(reviews, price, weights)
+    expected = (1 + reviews) ** 0.5 / (price / 100) ** 2
+    ranked = price.notna().to_numpy()
+    np.testing.assert_allclose(scores[ranked], expected[ranked], rtol=1e-12)
+    assert np.isnan(scores[~ranked]).all()
+    assert np.isnan(ranking_scores([10, 10, np.nan], [0, -5, 100], weights)).all()
+
+
+@pytest.mark.parametrize('k', [1, 10, 200])
+def test_top_matches_brute_force(frame, dataset, k):
+    for filters in filter_combinations(frame, seed=5):
+        rows = pandas_rows(frame, filters)
+        top = dataset.ranking_index.top(rows, filters[0], filters[1], k)
+        np.testing.assert_array_equal(top, brute_force_top(frame, rows, dataset.ranking_weights, k), err_msg=repr(filters))
+
+
+def test_top_with_other_weights(frame):
+    weights = RankingWeights(0.5, 2.0)
+    index = RankingIndex(frame, weights)
+    for filters in filter_combinations(frame, seed=6, count=20):
+        rows = pandas_rows(frame, filters)
+        np.testing.assert_array_equal(index.top(rows, filters[0], filters[1], 10),
+                                      brute_force_top(frame, rows, weights, 10))
+
+
+def test_scan_and_select_agree(frame, dataset):
+    # Os dois caminhos escolhidos pelo modelo de custo dão o mesmo resultado
+    index = dataset.ranking_index
+    specialization = frame['specialization'].value_counts().index[0]
+    rows = pandas_rows(frame, (specialization, 'all', 'all', (0.0, 10000.0), ''))
+    segments = index._segments(specialization, 'all')
+    np.testing.assert_array_equal(index._scan(segments, rows, 25), index._select(rows, 25))
+    np.testing.assert_array_equal(index._scan(None, rows, 25), index._select(rows, 25))
@@ -0,0 +1,86 @@
+import numpy as np
+
+from conftest import pandas_rows
+from refinement import RefinementCache, refinement_filters
+
+PRICES = (50.0, 800.0)
+
+
+def test_refinement_filters_keeps_only_what_changed():
+    previous = ('all', 'all', 'all', PRICES, 'sil')
+    assert refinement_filters(previous, previous) == ('all', 'all', 'all', None, '')
+    assert refinement_filters(previous, ('Pediatria', 'all', 1, (100.0, 300.0), 'silva')) == \
+        ('Pediatria', 'all', 1, (100.0, 300.0), 'silva')
+    assert refinement_filters(('Pediatria', 'all', 'all', PRICES, ''), ('Pediatria', 'São Paulo', 'all', PRICES, '')) == \
+        ('all', 'São Paulo', 'all', None, '')
+
+
+def test_refinement_filters_rejects_wider_results():
+    previous = ('Pediatria', 'São Paulo', 0, (100.0, 300.0), 'silva')
+    assert refinement_filters(previous, ('all', 'São Paulo', 0, (100.0, 300.0), 'silva')) is None
+    assert refinement_filters(previous, ('Psicologia', 'São Paulo', 0, (100.0, 300.0), 'silva')) is None
+    assert refinement_filters(previous, ('Pediatria', 'São Paulo', 0, (90.0, 300.0), 'silva')) is None
+    assert refinement_filters(previous, ('Pediatria', 'São Paulo', 0, (100.0, 300.0), 'silv')) is None
+    assert refinement_filters(previous, ('Pediatria', 'São Paulo', 0, (100.0, 300.0), 'santos')) is None
+
+
+def test_session_refinements_match_pandas(app_module, frame):
+    data = app_module.current_dataset()
+    full = (data.price_min, data.price_max)
+    city = frame['city1'].value_counts().index[0]
+    steps = [
+        ('all', 'all', 'all', full, 's'),
+        ('all', 'all', 'all', full, 'si'),
+        ('all', 'all', 'all', full, 'silva'),
+        ('all', city, 'all', full, 'silva'),
+        ('all', city, 1, (100, 400), 'silva'),
+        ('all', city, 1, (150, 300), 'silva'),
+        # Não são refinamentos: voltam ao total
+        ('all', city, 1, (100, 400), 'silva'),
+        ('all', 'all', 'all', full, 'ana'),
+    ]
+    refined = []
+    for step in steps:
+        filters = app_module.normalize_filters(*step)
+        previous = app_module.refinement_cache.get('sessao', data.version)
+        refined.append(previous is not None and app_module.narrow_rows(data, previous, filters) is not None)
+        rows = app_module.resolve_rows(data, filters, 'sessao')
+        np.testing.assert_array_equal(rows, pandas_rows(frame, filters), err_msg=repr(step))
+        app_module.store_rows(data, filters, rows, 'sessao')
+    assert refined == [False, True, True, True, True, True, False, False]
+
+
+def test_cache_evicts_least_recent_sessions(dataset):
+    class Entry:
+        def __init__(self, rows):
+            self.dataset = dataset
+            self.rows = rows
+
+    cache = RefinementCache(max_sessions=2, max_session_bytes=1000)
+    cache.put('a', Entry(np.arange(10)))
+    cache.put('b', Entry(np.arange(10)))
+    assert cache.get('a', dataset.version) is not None
+    cache.put('c', Entry(np.arange(10)))
+    assert cache.get('b', dataset.version) is None
+    assert cache.get('a', 'outra versão') is None
+    # Conjuntos grandes demais não são guardados
+    cache.put('d', Entry(np.arange(1000)))
+    assert cache.get('d', dataset.version) is None
+
+
+def test_refinement_cache_drops_old_versions(dataset):
+    class Entry:
+        def __init__(self, version):
+            self.dataset = type('Data', (), {'version': version})
+            self.rows = np.arange(10)
+
+    cache = RefinementCache()
+    cache.put('a', Entry('v1'))
+    cache.put('b', Entry('v1'))
+    cache.put('c', Entry('v2'))
+    # Consultada numa versão nova, a entrada antiga sai do cache
+    assert cache.get('a', 'v2') is None
+    assert 'a' not in cache._entries
+    cache.purge(keep_version='v2')
+    assert list(cache._entries) == ['c']
+    assert cache._bytes == np.arange(10).nbytes
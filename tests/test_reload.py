@@ -0,0 +1,125 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import dataset as dataset_module
+from conftest import PRICE_STEP, filter_combinations
+from dataset import load_dataset, refresh_dataset
+from ranking import DEFAULT_WEIGHTS
+from row_store import FilteredRows
+
+
+def test_reload_releases_previous_versions(app_module, monkeypatch):
+    old = app_module.current_dataset()
+    filters = app_module.normalize_filters('all', 'all', 'all', (old.price_min, old.price_max), '')
+    app_module.lookup_rows(old, filters, 'sessão')
+    app_module.client_payload(old)
+    assert app_module.refinement_cache.get('sessão', old.version) is not None
+
+    new = copy.copy(old)
+    new.version = 'nova versão'
+    monkeypatch.setattr(app_module, 'dataset', old)
+    monkeypatch.setattr(app_module, 'refresh_dataset', lambda *args, **kwargs: new)
+    kept = app_module.row_store.put(FilteredRows(new, filters, old.filter_engine.query('all', 'all', 'all', (0.0, 1.0))))
+    assert app_module.reload_data()
+
+    # Nenhum cache do worker segura mais a versão anterior (com o DataFrame e os índices dela)
+    assert app_module.current_dataset() is new
+    assert [entry.dataset.version for entry in app_module.row_store._entries.values()] == [new.version]
+    assert app_module.row_store.get(kept.key) is kept
+    assert not app_module.refinement_cache._entries
+    assert app_module.client_payload.cache_info().currsize == 0
+
+
+SORTS = [[{'column_id': 'price', 'direction': 'desc'}], [{'column_id': 'name', 'direction': 'asc'}]]
+
+
+def split_csv(data_file, tmp_path, head_rows):
+    with open(data_file, 'rb') as f:
+        lines = f.read().splitlines(keepends=True)
+    path = str(tmp_path / 'doctors.csv')
+    with open(path, 'wb') as f:
+        f.writelines(lines[:head_rows + 1])
+    return path, lines[head_rows + 1:]
+
+
+def assert_same_results(got, expected):
+    pd.testing.assert_frame_equal(got.df, expected.df)
+    assert (got.price_min, got.price_max) == (expected.price_min, expected.price_max)
+    for filters in filter_combinations(expected.df, seed=6, count=25):
+        specialization, city, telemedicine, price_range, term = filters
+        rows = got.filter_engine.query(specialization, city, telemedicine, price_range)
+        np.testing.assert_array_equal(rows, expected.filter_engine.query(specialization, city, telemedicine, price_range))
+        if term:
+            rows = got.search_index.search(term, rows)
+            np.testing.assert_array_equal(rows, expected.search_index.search(term, rows))
+        for sort_by in SORTS:
+            np.testing.assert_array_equal(got.table_index.page(rows, sort_by, 1, 20)[0],
+                                          expected.table_index.page(rows, sort_by, 1, 20)[0])
+        np.testing.assert_array_equal(got.ranking_index.top(rows, specialization, city, 10),
+                                      expected.ranking_index.top(rows, specialization, city, 10))
+        got_cube = got.data_cube.query(got.filter_engine, specialization, city, telemedicine, price_range)
+        expected_cube = expected.data_cube.query(expected.filter_engine, specialization, city, telemedicine, price_range)
+        assert got_cube.total == expected_cube.total
+        assert got_cube.price_sum == pytest.approx(expected_cube.price_sum, rel=1e-12)
+        assert got_cube.specialization_counts().to_dict() == expected_cube.specialization_counts().to_dict()
+        assert got_cube.telemedicine_counts().to_dict() == expected_cube.telemedicine_counts().to_dict()
+        pd.testing.assert_frame_equal(got_cube.reviews_by_year(), expected_cube.reviews_by_year())
+    for dimension, other in (('specialization', 'all'), ('city1', 'all'), ('city1', expected.df['specialization'][0])):
+        for search in ('', 'sao', 'ca'):
+            assert got.option_index.top(dimension, search, other, 20) == \
+                expected.option_index.top(dimension, search, other, 20)
+
+
+def test_append_matches_full_rebuild(data_file, tmp_path, monkeypatch):
+    path, tail = split_csv(data_file, tmp_path, 4000)
+    cols = str(tmp_path / 'cols')
+    current = load_dataset(path, cols, PRICE_STEP, DEFAULT_WEIGHTS)
+
+    # A última linha ainda pela metade fica para a próxima verificação
+    with open(path, 'ab') as f:
+        f.writelines(tail[:1000])
+        f.write(tail[1000][:10])
+    # Sem recarga completa: só as linhas novas são lidas
+    monkeypatch.setattr(dataset_module, 'load_dataset', None)
+    partial = refresh_dataset(current, path, cols)
+    assert partial.n_rows == 5000
+    assert partial.source['fingerprint'] is None
+
+    with open(path, 'ab') as f:
+        f.write(tail[1000][10:])
+        f.writelines(tail[1001:])
+    appended = refresh_dataset(partial, path, cols)
+    assert refresh_dataset(appended, path, cols) is None
+    monkeypatch.undo()
+
+    full = load_dataset(path, cols, PRICE_STEP, DEFAULT_WEIGHTS)
+    assert appended.version == full.version
+    assert appended.source['size'] == full.source['size']
+    assert appended.source['hasher'].digest() == full.source['hasher'].digest()
+    assert_same_results(appended, full)
+
+
+def test_edit_before_the_end_reloads_everything(data_file, tmp_path, monkeypatch):
+    path, tail = split_csv(data_file, tmp_path, 4000)
+    cols = str(tmp_path / 'cols')
+    current = load_dataset(path, cols, PRICE_STEP, DEFAULT_WEIGHTS)
+
+    # Uma linha antiga alterada (mesmo tamanho do arquivo) e outras acrescentadas
+    with open(path, 'rb') as f:
+        content = f.read()
+    header_end = content.index(b'\n') + 1
+    content = content[:header_end] + content[header_end:].replace(b'Dr(a).', b'Dr(e).', 1)
+    with open(path, 'wb') as f:
+        f.write(content)
+        f.writelines(tail)
+
+    loads = []
+    monkeypatch.setattr(dataset_module, 'load_dataset',
+                        lambda *args: loads.append(args) or load_dataset(*args))
+    refreshed = refresh_dataset(current, path, cols)
+    assert len(loads) == 1
+    assert refreshed.df['name'].iloc[0].startswith('Dr(e).')
+    assert_same_results(refreshed, load_dataset(path, cols, PRICE_STEP, DEFAULT_WEIGHTS))
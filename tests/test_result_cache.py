@@ -0,0 +1,119 @@
+import os
+import sqlite3
+
+import numpy as np
+import pytest
+
+from result_cache import ResultCache, file_fingerprint, private_directory
+
+
+class Counter:
+    """Função de cálculo que conta quantas vezes foi chamada."""
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_hit_is_shared_between_instances(tmp_path):
+    compute = Counter({'x': [1, 2, 3], 'text': 'São Paulo'})
+    first = ResultCache(str(tmp_path))
+    second = ResultCache(str(tmp_path))
+    assert first.get_or_compute('v1', ('kpis', 'all'), compute) == compute.value
+    assert second.get_or_compute('v1', ('kpis', 'all'), compute) == compute.value
+    assert compute.calls == 1
+    assert second.stats()['hits'] == 1
+    assert second.stats()['misses'] == 1
+
+
+def test_values_round_trip_without_pickle(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    packed = np.packbits(np.arange(100) % 3 == 0)
+    figure = {'data': [{'x': np.arange(3), 'y': np.array([0.5, np.nan, 2.0])}], 'layout': {}}
+    cache.get_or_compute('v1', 'rows', lambda: packed)
+    cache.get_or_compute('v1', 'figure', lambda: figure)
+    cache.get_or_compute('v1', 'kpis', lambda: ('1', 'R$ 2.00'))
+
+    np.testing.assert_array_equal(cache.get_or_compute('v1', 'rows', None), packed)
+    assert cache.get_or_compute('v1', 'figure', None) == {'data': [{'x': [0, 1, 2], 'y': [0.5, None, 2.0]}],
+                                                          'layout': {}}
+    assert cache.get_or_compute('v1', 'kpis', None) == ['1', 'R$ 2.00']
+    # Um valor sem formato seguro é calculado, mas não guardado
+    compute = Counter(object())
+    cache.get_or_compute('v1', 'object', compute)
+    cache.get_or_compute('v1', 'object', compute)
+    assert compute.calls == 2
+
+
+def test_foreign_blobs_are_misses(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    cache.get_or_compute('v1', 'key', lambda: 1)
+    # Entrada num formato desconhecido (p.ex. um pickle gravado por outro processo): recalcula
+    with sqlite3.connect(cache.path) as conn:
+        conn.execute("UPDATE entries SET value = ?", (b'\x80\x04K\x01.',))
+    compute = Counter(2)
+    assert cache.get_or_compute('v1', 'key', compute) == 2
+    assert compute.calls == 1
+
+
+def test_lru_eviction_by_entries(tmp_path):
+    cache = ResultCache(str(tmp_path), max_entries=3)
+    for key in 'abc':
+        cache.get_or_compute('v1', key, lambda: key)
+    # 'a' passa a ser a mais recente: a próxima inserção tira 'b'
+    cache.get_or_compute('v1', 'a', None)
+    cache.get_or_compute('v1', 'd', lambda: 'd')
+    stats = cache.stats()
+    assert stats['entries'] == 3
+    assert stats['evictions'] == 1
+    compute = Counter('b')
+    cache.get_or_compute('v1', 'b', compute)
+    assert compute.calls == 1
+    assert cache.get_or_compute('v1', 'a', None) == 'a'
+
+
+def test_lru_eviction_by_bytes(tmp_path):
+    value = 'x' * 1000
+    cache = ResultCache(str(tmp_path), max_bytes=2500)
+    for key in 'abc':
+        cache.get_or_compute('v1', key, lambda: value)
+    stats = cache.stats()
+    assert stats['entries'] == 2
+    assert stats['bytes'] <= 2500
+    # Um valor maior que o limite inteiro nem entra
+    cache.get_or_compute('v1', 'big', lambda: 'x' * 5000)
+    assert cache.stats()['entries'] == 2
+
+
+def test_fingerprint_change_invalidates_and_purge_removes(tmp_path):
+    data_file = tmp_path / 'dados.csv'
+    data_file.write_text('a\n1\n')
+    old_version = file_fingerprint(str(data_file))
+    cache = ResultCache(str(tmp_path / 'cache'))
+    cache.get_or_compute(old_version, 'kpis', lambda: 'antigo')
+
+    data_file.write_text('a\n1\n2\n')
+    new_version = file_fingerprint(str(data_file))
+    assert new_version != old_version
+    assert str(data_file) not in new_version
+    compute = Counter('novo')
+    assert cache.get_or_compute(new_version, 'kpis', compute) == 'novo'
+    assert compute.calls == 1
+
+    cache.purge(keep_version=new_version)
+    assert cache.stats()['entries'] == 1
+    assert cache.get_or_compute(new_version, 'kpis', None) == 'novo'
+
+
+def test_private_directory_refuses_shared_directories(tmp_path):
+    created = private_directory(str(tmp_path / 'novo'))
+    assert os.stat(created).st_mode & 0o777 == 0o700
+    shared = tmp_path / 'compartilhado'
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        ResultCache(str(shared))
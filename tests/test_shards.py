@@ -0,0 +1,145 @@
+import subprocess
+import sys
+from multiprocessing import AuthenticationError
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import PRICE_STEP, ROOT, filter_combinations, pandas_rows
+import shards
+from ranking import DEFAULT_WEIGHTS
+from row_store import FilteredRows
+from shards import SERVER_COMMAND, ShardCache, ShardPool, ShardedDataset, deployment_authkey, shard_summary, write_shards
+
+SORTS = [
+    [],
+    [{'column_id': 'price', 'direction': 'desc'}],
+    [{'column_id': 'name', 'direction': 'asc'}],
+    [{'column_id': 'city1', 'direction': 'asc'}, {'column_id': 'reviews', 'direction': 'desc'}],
+    [{'column_id': 'telemedicine_text', 'direction': 'desc'}, {'column_id': 'price', 'direction': 'asc'}],
+]
+
+
+@pytest.fixture(scope='module')
+def sharded(frame, tmp_path_factory):
+    directory = tmp_path_factory.mktemp('shards')
+    write_shards(frame, str(directory / 'data.shards'), 5)
+    address = str(directory / 'shards.sock')
+    # Servidor próprio do teste, encerrado no fim (o do app sai sozinho depois de um minuto ocioso)
+    authkey = deployment_authkey(str(directory))
+    server = subprocess.Popen([sys.executable, '-c', SERVER_COMMAND, address, '2', '0', '5'],
+                              cwd=ROOT, stdin=subprocess.PIPE)
+    server.stdin.write(authkey)
+    server.stdin.close()
+    pool = ShardPool(address, 2, 0, authkey)
+    yield ShardedDataset(str(directory / 'data.shards'), PRICE_STEP, DEFAULT_WEIGHTS, pool)
+    pool.shutdown()
+    server.terminate()
+    server.wait()
+
+
+def plain(table):
+    return table.reset_index(drop=True).astype(object)
+
+
+def single_entry(frame, dataset, filters):
+    return FilteredRows(dataset, filters, pandas_rows(frame, filters))
+
+
+def single_aggregates(dataset, entry):
+    specialization, city, telemedicine, price_range, search_term = entry.filters
+    if search_term:
+        return dataset.data_cube.aggregate_rows(entry.rows)
+    return dataset.data_cube.query(dataset.filter_engine, specialization, city, telemedicine, price_range)
+
+
+def test_summary_matches_single_frame(app_module, frame, dataset, sharded):
+    for filters in filter_combinations(frame, seed=8, count=30):
+        single = single_entry(frame, dataset, filters)
+        entry = sharded.query(filters)
+        assert entry.total == single.total
+        for got, expected in zip(entry.price_counts(), single.price_counts()):
+            np.testing.assert_array_equal(got, expected)
+
+        # Agregados somados entre os shards: os mesmos do cubo único, e as mesmas saídas do painel
+        got, expected = entry.aggregates, single_aggregates(dataset, single)
+        for name in ('total', 'price_count', 'reviews_count'):
+            assert getattr(got, name) == getattr(expected, name)
+        assert got.price_sum == pytest.approx(expected.price_sum, rel=1e-12)
+        assert got.reviews_sum == pytest.approx(expected.reviews_sum, rel=1e-12)
+        pd.testing.assert_series_equal(got.specialization_counts(), expected.specialization_counts(),
+                                       check_index_type=False)
+        pd.testing.assert_series_equal(got.telemedicine_counts(), expected.telemedicine_counts(),
+                                       check_index_type=False)
+        pd.testing.assert_frame_equal(got.reviews_by_year(), expected.reviews_by_year(), rtol=1e-12)
+        assert app_module.build_kpis(got) == app_module.build_kpis(expected)
+        for build in (app_module.build_specialization_figure, app_module.build_telemedicine_figure,
+                      app_module.build_reviews_figure):
+            for got_trace, expected_trace in zip(build(got)['data'], build(expected)['data']):
+                for key in app_module.PATCH_TRACE_KEYS:
+                    np.testing.assert_equal(got_trace.get(key), expected_trace.get(key))
+
+
+@pytest.mark.parametrize('sort_by', SORTS)
+def test_table_pages_match_single_frame(frame, dataset, sharded, sort_by):
+    for filters in filter_combinations(frame, seed=9, count=12):
+        single = single_entry(frame, dataset, filters)
+        entry = sharded.query(filters)
+        page_count = max(1, -(-single.total // 10))
+        for page in sorted({0, 1, page_count // 2, page_count - 1, page_count + 5}):
+            expected = single.table_page(sort_by, page, 10)
+            got = entry.table_page(sort_by, page, 10)
+            assert got[1:] == expected[1:]
+            pd.testing.assert_frame_equal(plain(got[0]), plain(expected[0]), check_dtype=False)
+
+
+def test_large_pages_match_single_frame(frame, dataset, sharded):
+    filters = ('all', 'all', 'all', (0.0, 10000.0), '')
+    single = single_entry(frame, dataset, filters)
+    entry = sharded.query(filters)
+    for page in (0, 3, 5):
+        pd.testing.assert_frame_equal(plain(entry.table_page(SORTS[2], page, 1000)[0]),
+                                      plain(single.table_page(SORTS[2], page, 1000)[0]), check_dtype=False)
+
+
+def test_top_matches_single_frame(frame, dataset, sharded):
+    for filters in filter_combinations(frame, seed=10, count=20):
+        expected = single_entry(frame, dataset, filters).top(10)
+        pd.testing.assert_frame_equal(plain(sharded.query(filters).top(10)), plain(expected), check_dtype=False)
+
+
+def test_frames_cover_the_filtered_rows(frame, sharded):
+    filters = ('all', 'all', 1, (100.0, 400.0), '')
+    exported = pd.concat(sharded.query(filters).frames(['name', 'price'], 100), ignore_index=True)
+    expected = frame.iloc[pandas_rows(frame, filters)][['name', 'price']]
+    assert sorted(exported['name']) == sorted(expected['name'])
+
+
+def test_wrong_authkey_is_refused(sharded):
+    impostor = ShardPool(sharded.pool.address, 2, 0, b'outra chave')
+    with pytest.raises(AuthenticationError):
+        impostor.map(shard_summary, sharded.shard_ids[:1], sharded.location, ('all', 'all', 'all', (0.0, 1.0), ''))
+    # O servidor segue atendendo os clientes com a chave certa
+    assert sharded.query(('all', 'all', 'all', (0.0, 10000.0), '')).total > 0
+
+
+def test_connect_failure_keeps_the_original_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(shards, 'SERVER_START_SECONDS', 0.2)
+    monkeypatch.setattr(ShardPool, '_start_server', lambda self: None)
+    pool = ShardPool(str(tmp_path / 'ausente.sock'), 1, 0, b'chave')
+    with pytest.raises(FileNotFoundError):
+        pool.map(shard_summary, [0])
+
+
+def test_shard_cache_stays_within_its_budget(sharded):
+    ids = sharded.shard_ids
+    sizes = [ShardCache(0).get(sharded.location, shard_id).nbytes for shard_id in ids]
+    cache = ShardCache(max(sizes) * 2)
+    for shard_id in ids:
+        cache.get(sharded.location, shard_id)
+        assert cache._bytes <= cache.max_bytes
+    # Os menos usados saem primeiro: o último shard lido continua em memória
+    assert (sharded.location.directory, ids[-1]) in cache._entries
+    assert len(cache._entries) < len(ids)
+    assert shards.default_cache_bytes(4) > 0
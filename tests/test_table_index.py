@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import filter_combinations, pandas_rows
+from table_index import TABLE_COLUMNS, TableIndex, page_bounds
+
+SMALL = pd.DataFrame({
+    'name': ['b', 'a', None, 'b', 'c', 'a', None, 'c'],
+    'city1': pd.Categorical(['X', None, 'Y', 'X', 'Y', None, 'X', 'Z']),
+    'specialization': pd.Categorical(['P', 'P', 'Q', None, 'Q', 'P', 'R', None]),
+    'reviews': pd.array([3, 1, None, 3, 0, 1, 5, None], dtype='Int64'),
+    'price': [100.0, np.nan, 50.0, 100.0, 50.0, np.nan, 75.0, 100.0],
+    'telemedicine': [1, 0, 1, 1, 0, 0, 1, 0],
+})
+
+
+def expected_order(df, rows, sort_by):
+    """Posições de `rows` ordenadas pelo pandas, com nulos no final e empates pela posição."""
+    sub = df.iloc[rows]
+    columns = [spec['column_id'].replace('telemedicine_text', 'telemedicine') for spec in sort_by]
+    ascending = [spec['direction'] == 'asc' for spec in sort_by]
+    return sub.sort_values(columns, ascending=ascending, na_position='last', kind='stable').index.to_numpy()
+
+
+def sort_specs():
+    specs = [[{'column_id': column, 'direction': direction}]
+             for column in TABLE_COLUMNS + ['telemedicine_text'] for direction in ('asc', 'desc')]
+    specs += [
+        [{'column_id': 'city1', 'direction': 'asc'}, {'column_id': 'price', 'direction': 'desc'}],
+        [{'column_id': 'specialization', 'direction': 'desc'}, {'column_id': 'reviews', 'direction': 'asc'},
+         {'column_id': 'name', 'direction': 'desc'}],
+    ]
+    return specs
+
+
+@pytest.mark.parametrize('sort_by', sort_specs())
+def test_sort_rows_matches_pandas_with_nulls_and_ties(sort_by):
+    index = TableIndex(SMALL)
+    rows = np.arange(len(SMALL))
+    np.testing.assert_array_equal(index.sort_rows(rows, sort_by), expected_order(SMALL, rows, sort_by))
+    # Subconjunto das linhas: mesma ordem relativa
+    rows = np.array([0, 2, 3, 5, 7])
+    np.testing.assert_array_equal(index.sort_rows(rows, sort_by), expected_order(SMALL, rows, sort_by))
+
+
+@pytest.mark.parametrize('sort_by', sort_specs())
+def test_pages_match_pandas(frame, dataset, sort_by):
+    df = frame.reset_index(drop=True)
+    for filters in filter_combinations(df, seed=5, count=6):
+        rows = pandas_rows(df, filters)
+        expected = expected_order(df, rows, sort_by)
+        page_count = max(1, -(-len(rows) // 25))
+        for page in (0, 1, page_count // 2, page_count - 1):
+            page_rows, page_current, count = dataset.table_index.page(rows, sort_by, page, 25)
+            assert count == page_count
+            np.testing.assert_array_equal(page_rows, expected[page_current * 25:(page_current + 1) * 25])
+
+
+def test_unknown_or_missing_sort_keeps_order():
+    index = TableIndex(SMALL)
+    rows = np.array([4, 1, 6])
+    np.testing.assert_array_equal(index.sort_rows(rows, None), rows)
+    np.testing.assert_array_equal(index.sort_rows(rows, [{'column_id': 'position', 'direction': 'asc'}]), rows)
+
+
+def test_page_bounds():
+    assert page_bounds(0, 0, 10) == (0, 1)
+    assert page_bounds(25, None, 10) == (0, 3)
+    assert page_bounds(25, 2, 10) == (2, 3)
+    # Páginas fora do intervalo ficam na última (ou na primeira)
+    assert page_bounds(25, 7, 10) == (2, 3)
+    assert page_bounds(25, -1, 10) == (0, 3)